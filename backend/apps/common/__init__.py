@@ -0,0 +1 @@
+# 各应用共用的工具模块（不是 Django 应用，不需要注册到 INSTALLED_APPS）
@@ -0,0 +1,211 @@
+"""
+数据修复类管理命令的批处理框架
+
+子类实现 get_targets() 和 transform()，框架负责：
+  1. 按主键分批读取（每批一条短查询，只读取需要的列，不加载完整模型实例、不逐行 save()）
+  2. 每批在一个短事务中写回：变更相同的记录合并为一条 UPDATE ... WHERE id IN (...)，其余用 bulk_update
+  3. 每批提交后记录断点（最后处理的主键），中断后重新运行从断点继续；全部完成后删除本次处理的目标的断点
+  4. --dry-run 只输出变更前后的差异（未读取的列在输出前补查原值），不写入数据库、不记录断点
+  5. 按时间间隔输出进度，结束时输出吞吐量汇总；--sleep 在批次之间暂停，降低对在线请求的影响
+批量写入不触发信号，完成后对有变更的数据调用 invalidate_bulk_write() 使缓存失效。
+"""
+import json
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from .conditional import invalidate_bulk_write
+
+# 进度输出的最小间隔（秒）
+PROGRESS_INTERVAL = 5
+
+
+def write_changes(model, changes):
+    """
+    批量写回 {主键: {字段: 新值}}：变更内容相同的记录合并为一条UPDATE，其余按字段组合分组 bulk_update
+    字段名使用模型字段名（外键使用 xxx_id）
+    """
+    groups = {}
+    for pk, row_changes in changes.items():
+        groups.setdefault(tuple(sorted(row_changes.items())), []).append(pk)
+    by_fields = {}
+    for items, pks in groups.items():
+        if len(pks) > 1:
+            model.objects.filter(pk__in=pks).update(**dict(items))
+        else:
+            # 只有一条记录的变更按字段组合分组，每组一次 bulk_update
+            fields = tuple(model._meta.get_field(name).name for name, _ in items)
+            by_fields.setdefault(fields, []).append(model(pk=pks[0], **dict(items)))
+    for fields, instances in by_fields.items():
+        model.objects.bulk_update(instances, fields)
+
+
+@dataclass
+class BatchTarget:
+    """
+    一组待处理的数据
+        label:      名称（用于输出和断点）
+        queryset:   待处理的记录
+        fields:     transform() 需要读取的列（不含主键）
+        namespace:  缓存命名空间，有变更时使其失效
+    """
+    label: str
+    queryset: object
+    fields: tuple
+    namespace: str = None
+
+
+class BatchCommand(BaseCommand):
+    """分批读取、批量写回、可断点续跑的数据修复命令基类"""
+    default_batch_size = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=self.default_batch_size,
+                            help=f'每批处理的记录数（默认{self.default_batch_size}）')
+        parser.add_argument('--dry-run', action='store_true', help='只输出差异，不写入数据库')
+        parser.add_argument('--diff-limit', type=int, default=50, help='--dry-run 时最多输出的差异条数（默认50）')
+        parser.add_argument('--restart', action='store_true', help='忽略上次中断留下的断点，从头开始')
+        parser.add_argument('--sleep', type=float, default=0, help='每批之间暂停的秒数，在业务高峰期运行时使用')
+
+    def get_targets(self, options):
+        """返回 [BatchTarget]"""
+        raise NotImplementedError
+
+    def transform(self, target, row):
+        """
+        处理一行数据（row 为 {'pk': ..., 字段: 值}），返回需要更新的 {字段: 新值}，没有变更时返回空字典
+        字段名使用模型字段名（外键使用 xxx_id）
+        """
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.diff_count = 0
+        # 断点文件中可能还有其他目标（如上次用 --model 只处理了一部分）的断点，只处理本次的目标
+        checkpoint = {} if options['dry_run'] else self._load_checkpoint()
+        targets = self.get_targets(options)
+        if options['restart']:
+            for target in targets:
+                checkpoint.pop(target.label, None)
+        for target in targets:
+            last_pk = checkpoint.get(target.label)
+            if last_pk is not None:
+                self.stdout.write(f'{target.label}：从上次中断处（ID > {last_pk}）继续')
+            self.run_target(target, last_pk, checkpoint)
+        if not options['dry_run']:
+            self._clear_checkpoint(checkpoint, targets)
+
+    def run_target(self, target, last_pk, checkpoint):
+        options = self.options
+        queryset = target.queryset.order_by('pk')
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        model = queryset.model
+        columns = ('pk',) + tuple(target.fields)
+        remaining = queryset.count()
+
+        scanned = changed = 0
+        start = last_report = time.monotonic()
+        while True:
+            rows = list(queryset.filter(pk__gt=last_pk or 0).values_list(*columns)[:options['batch_size']])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            scanned += len(rows)
+
+            changes = {}
+            diffs = []
+            for row in rows:
+                row = dict(zip(columns, row))
+                row_changes = self.transform(target, row)
+                if row_changes:
+                    changes[row['pk']] = row_changes
+                    diffs.append((row, row_changes))
+            changed += len(changes)
+            if options['dry_run']:
+                self._write_diffs(target, model, diffs)
+
+            if not options['dry_run']:
+                if changes:
+                    with transaction.atomic():
+                        write_changes(model, changes)
+                checkpoint[target.label] = last_pk
+                self._save_checkpoint(checkpoint)
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                self.stdout.write(
+                    f'{target.label}：已处理 {scanned}/{remaining}，变更 {changed}，'
+                    f'{scanned / (now - start):.0f} 条/秒'
+                )
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = time.monotonic() - start
+        if changed and not options['dry_run'] and target.namespace:
+            invalidate_bulk_write(target.namespace)
+        action = '需要变更' if options['dry_run'] else '变更'
+        self.stdout.write(self.style.SUCCESS(
+            f'{target.label}：处理 {scanned} 条，{action} {changed} 条，'
+            f'用时 {elapsed:.2f} 秒（{scanned / elapsed if elapsed else 0:.0f} 条/秒）'
+        ))
+
+    def _write_diffs(self, target, model, diffs):
+        """
+        输出一批的差异 [(row, row_changes)]，超过 --diff-limit 的省略
+        transform() 可能修改没有读取的列（如配速变化时的 pace_seconds），这些列的原值按批一次查询补齐
+        """
+        limit = self.options['diff_limit']
+        shown = diffs[:max(limit - self.diff_count, 0)]
+        # 第一次超过上限时提示一次
+        omitted = self.diff_count <= limit < self.diff_count + len(diffs)
+        self.diff_count += len(diffs)
+
+        missing = {name for row, row_changes in shown for name in row_changes if name not in row}
+        old_values = {}
+        if missing:
+            old_values = {
+                values.pop('pk'): values
+                for values in model.objects.filter(pk__in=[row['pk'] for row, _ in shown]).values('pk', *missing)
+            }
+        for row, row_changes in shown:
+            old = {**old_values.get(row['pk'], {}), **row}
+            diff = '，'.join(f'{name}: {old.get(name)!r} -> {value!r}' for name, value in row_changes.items())
+            self.stdout.write(f'{target.label} ID {row["pk"]}: {diff}')
+        if omitted:
+            self.stdout.write('...（更多差异省略，可通过 --diff-limit 调整）')
+
+    # 断点文件：{目标名称: 最后处理的主键}
+
+    def _checkpoint_path(self):
+        return settings.BATCH_CHECKPOINT_DIR / f'{self.__module__.rsplit(".", 1)[-1]}.json'
+
+    def _load_checkpoint(self):
+        try:
+            return json.loads(self._checkpoint_path().read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_checkpoint(self, checkpoint):
+        path = self._checkpoint_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再替换，中断时不会留下半个文件
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(checkpoint))
+        tmp_path.replace(path)
+
+    def _clear_checkpoint(self, checkpoint, targets):
+        """删除已处理完的目标的断点；还有其他目标的断点时保留断点文件"""
+        for target in targets:
+            checkpoint.pop(target.label, None)
+        if checkpoint:
+            self._save_checkpoint(checkpoint)
+            return
+        try:
+            self._checkpoint_path().unlink()
+        except FileNotFoundError:
+            pass
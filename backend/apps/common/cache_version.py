@@ -0,0 +1,82 @@
+"""
+数据版本号工具
+
+每个命名空间（如 marathon、registration）维护一个版本号，写操作时递增。
+读缓存的键中带上版本号，写入后旧键自然失效，不需要逐个删除缓存。
+版本号保存在 settings.DATA_VERSION_CACHE_ALIAS 指定的缓存中，
+该缓存需要在所有 worker 进程之间共享，否则其他进程看不到写操作。
+版本号永不过期（timeout=None），只在缓存被清空或淘汰时重新初始化。
+递增是"读取再写入"：Django 的 cache.incr() 对文件缓存等后端不是原子操作，且会按默认超时时间重新写入，
+因此递增在锁内进行——进程内用线程锁，进程之间用 settings.DATA_VERSION_LOCK_FILE 上的文件锁
+（不支持 fcntl 的平台或未配置时只有线程锁）。
+"""
+import contextlib
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只使用进程内的线程锁
+    fcntl = None
+
+VERSION_KEY = 'data_version:{namespace}'
+
+_thread_lock = threading.Lock()
+
+
+def _version_cache():
+    """获取保存版本号的缓存"""
+    return caches[getattr(settings, 'DATA_VERSION_CACHE_ALIAS', 'default')]
+
+
+def _initial_version():
+    """
+    版本号初始值使用毫秒时间戳
+    版本号丢失（缓存被清空或淘汰）后重新初始化时，不会与旧缓存键里的版本号重复
+    """
+    return int(time.time() * 1000)
+
+
+@contextlib.contextmanager
+def _version_lock():
+    """修改版本号时持有的锁：线程锁 + 跨进程的文件锁"""
+    lock_file = getattr(settings, 'DATA_VERSION_LOCK_FILE', None)
+    with _thread_lock:
+        if fcntl is None or lock_file is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(lock_file), exist_ok=True)
+        with open(lock_file, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def get_data_version(namespace):
+    """获取指定命名空间的当前版本号"""
+    version_cache = _version_cache()
+    key = VERSION_KEY.format(namespace=namespace)
+    version = version_cache.get(key)
+    if version is None:
+        with _version_lock():
+            # 使用add避免覆盖其他进程刚写入的版本号
+            version_cache.add(key, _initial_version(), timeout=None)
+            version = version_cache.get(key)
+    return version
+
+
+def bump_data_version(*namespaces):
+    """递增一个或多个命名空间的版本号，使基于旧版本号的缓存全部失效"""
+    version_cache = _version_cache()
+    with _version_lock():
+        for namespace in namespaces:
+            key = VERSION_KEY.format(namespace=namespace)
+            version = version_cache.get(key)
+            # 版本号不存在时直接初始化为新值
+            version_cache.set(key, version + 1 if version is not None else _initial_version(), timeout=None)
@@ -0,0 +1,111 @@
+"""
+条件请求工具（ETag / Last-Modified / 304）
+
+验证器只由聚合元数据计算：最大更新时间、行数和删除代数，不加载任何数据行。
+计算结果按数据版本号缓存，客户端重新验证时通常连聚合查询都不需要执行。
+列表只使用ETag：删除记录和批量写入不会改变最大更新时间，且 Last-Modified 只精确到秒，
+只带 If-Modified-Since 的客户端会在数据变化后仍然得到304；单条记录同时提供 Last-Modified。
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .cache_version import bump_data_version, get_data_version
+
+
+def _deletion_namespace(namespace):
+    """删除代数使用独立的版本号命名空间"""
+    return f'{namespace}:deletions'
+
+
+def bump_deletion_generation(namespace):
+    """
+    递增删除代数
+    删除记录不会改变剩余记录的最大更新时间，需要额外的代数区分删除前后的数据；
+    不更新 updated_at 的批量写入同样需要递增
+    """
+    bump_data_version(_deletion_namespace(namespace))
+
+
+def invalidate_bulk_write(namespace):
+    """
+    批量写入（bulk_create / bulk_update / QuerySet.update）之后调用
+    这些操作不触发模型信号，bulk_update和update也不会更新 updated_at，
+    需要手动递增数据版本号和代数，使列表缓存和ETag失效
+    """
+    bump_data_version(namespace)
+    bump_deletion_generation(namespace)
+
+
+def _make_etag(*parts):
+    """由元数据片段生成ETag"""
+    raw = ':'.join('' if part is None else str(part) for part in parts)
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def collection_validators(namespace, queryset):
+    """
+    计算整个列表的验证器 (etag, None)
+    任何一条记录变化都会改变验证器，因此同一验证器对带任意过滤参数的列表请求都成立；
+    ETag 包含删除代数（删除和批量写入时递增），列表不提供 Last-Modified（见模块说明）
+    """
+    cache_key = f'{namespace}_validators:{get_data_version(namespace)}'
+    validators = cache.get(cache_key)
+    if validators is None:
+        aggregate = queryset.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        last_modified = aggregate['last_modified']
+        etag = _make_etag(
+            queryset.model._meta.label,
+            aggregate['count'],
+            last_modified.isoformat() if last_modified else None,
+            get_data_version(_deletion_namespace(namespace)),
+        )
+        validators = (etag, None)
+        cache.set(cache_key, validators, settings.CACHE_TIMEOUT['MEDIUM'])
+    return validators
+
+
+def object_validators(namespace, queryset, pk):
+    """
+    计算单条记录的验证器 (etag, last_modified)，记录不存在时返回None
+    只查询updated_at一列，走主键索引
+    """
+    cache_key = f'{namespace}_validators:{get_data_version(namespace)}:{pk}'
+    validators = cache.get(cache_key)
+    if validators is None:
+        last_modified = queryset.filter(pk=pk).values_list('updated_at', flat=True).first()
+        if last_modified is None:
+            return None
+        validators = (_make_etag(queryset.model._meta.label, pk, last_modified.isoformat()), last_modified)
+        cache.set(cache_key, validators, settings.CACHE_TIMEOUT['MEDIUM'])
+    return validators
+
+
+def conditional_get(validators_func):
+    """
+    视图装饰器：为GET/HEAD请求添加ETag和Last-Modified（验证器中不为None的部分），验证器匹配时直接返回304
+
+    validators_func(request, *args, **kwargs) 返回 (etag, last_modified) 或 None。
+    响应带上 Cache-Control: no-cache，浏览器每次使用缓存前都会先重新验证，写操作可以立即可见。
+    可配合 method_decorator 用在 APIView / ViewSet 的方法上。
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            validators = validators_func(request, *args, **kwargs)
+            etag, last_modified = validators if validators else (None, None)
+            conditional_view = condition(
+                etag_func=lambda *a, **kw: etag,
+                last_modified_func=lambda *a, **kw: last_modified,
+            )(view_func)
+            response = conditional_view(request, *args, **kwargs)
+            if etag is not None:
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,218 @@
+"""
+键集（游标）分页
+
+按排序字段元组 (如 event_date, id) 记录上一页最后一行的位置，下一页用
+WHERE (f1, f2) < (v1, v2) 的等价条件直接定位，不使用OFFSET，也不执行COUNT(*)。
+排序字段有索引时，第N页与第1页的代价相同。
+排序元组的最后一个字段必须唯一（通常为id），否则游标位置不确定。
+可为空的排序字段按 NULLS LAST 排序（无论升序降序，空值都排在最后），游标条件中单独处理空值。
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    游标中的时间保留完整的微秒：DjangoJSONEncoder 会把时间截断到毫秒，
+    同一毫秒内的两行之间的游标位置不准确，翻页时会漏掉记录
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """键集分页：子类通过 ordering 指定排序字段元组"""
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    ordering = ('-id',)
+    # 允许客户端通过 ?ordering=field / ?ordering=-field 指定的排序字段，id会自动追加到末尾
+    ordering_param = 'ordering'
+    ordering_fields = ()
+    # ordering_fields中可为空的字段：空值排在最后，游标条件用 IS NULL / IS NOT NULL 比较
+    nullable_ordering_fields = ()
+    invalid_cursor_message = '无效的游标'
+
+    def is_requested(self, request):
+        """客户端是否请求了分页（带cursor或page_size参数）；否则视图返回不分页的完整列表"""
+        return (self.cursor_query_param in request.query_params
+                or self.page_size_query_param in request.query_params)
+
+    def get_page_size(self, request):
+        """读取每页数量，超出范围时使用默认值或上限"""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, queryset=None, view=None):
+        """
+        排序字段元组：默认使用 ordering，客户端可以在 ordering_fields 范围内指定
+        追加id作为最后一个排序字段，保证排序稳定（也是游标定位的要求）
+        """
+        value = request.query_params.get(self.ordering_param)
+        if not value:
+            return tuple(self.ordering)
+        field = value.lstrip('-')
+        if field not in self.ordering_fields:
+            raise ValidationError({'error': f'不支持按{field}排序，可选：{", ".join(self.ordering_fields)}'})
+        if field == 'id':
+            return (value,)
+        return (value, '-id' if value.startswith('-') else 'id')
+
+    def order_queryset(self, queryset, request):
+        """按 get_ordering 的结果排序。不分页的列表也使用它，保证两种模式顺序一致"""
+        return queryset.order_by(*self._order_by(self.get_ordering(request)))
+
+    def _order_by(self, ordering, reverse=False):
+        """
+        排序字段元组转换为 order_by() 的参数：可为空的字段正向时空值排在最后，
+        向前翻页（reverse，ordering已反转）时排在最前，反转回来后顺序与正向一致
+        """
+        expressions = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if name not in self.nullable_ordering_fields:
+                expressions.append(field)
+                continue
+            nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            expression = F(name)
+            expressions.append(expression.desc(**nulls) if field.startswith('-') else expression.asc(**nulls))
+        return expressions
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.page_ordering = self.get_ordering(request, queryset, view)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        # 向前翻页时反转排序方向，取到结果后再反转回来
+        ordering = self._reverse_ordering(self.page_ordering) if reverse else self.page_ordering
+        queryset = queryset.order_by(*self._order_by(ordering, reverse))
+        if position is not None:
+            queryset = queryset.filter(self._keyset_filter(ordering, position, reverse))
+
+        # 多取一行用于判断是否还有更多数据，不需要COUNT(*)
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        """分页响应体：与DRF的CursorPagination结构一致"""
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # 当前页为空（越过末尾）时，去掉游标回到第一页
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._get_position(self.page[0]), reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        """把位置编码为URL安全的游标，并替换到当前URL中"""
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, cls=CursorJSONEncoder, separators=(',', ':')).encode('utf-8')
+        cursor = base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """解析游标，返回 (位置值列表, 是否向前翻页)；没有游标时返回 (None, False)"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            payload = json.loads(raw.decode('utf-8'))
+            values = payload['p']
+            if not isinstance(values, list) or len(values) != len(self.page_ordering):
+                raise ValueError
+            # 用模型字段把JSON值还原为日期、时间等Python类型
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.page_ordering, values)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+    def _get_position(self, row):
+        """取一行在排序字段上的值，支持模型实例和 .values() 字典"""
+        names = [field.lstrip('-') for field in self.page_ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    @staticmethod
+    def _reverse_ordering(ordering):
+        return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+    def _keyset_filter(self, ordering, position, reverse=False):
+        """
+        构造 (f1, f2, ...) 在排序方向上位于 position 之后的条件：
+            f1 > v1 OR (f1 = v1 AND f2 > v2) OR ...
+        可为空的字段：正向时空值在最后，vi 不为空时"之后"还包括 fi IS NULL，vi 为空时没有"之后"；
+        向前翻页时空值在最前，vi 为空时"之后"为 fi IS NOT NULL。vi 为空时"相等"为 fi IS NULL
+        首个字段不可为空时再额外加上 f1 >= v1，让SQLite能用f1上的索引做范围扫描
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            if name not in self.nullable_ordering_fields:
+                after = Q(**{f'{name}__{lookup}': value})
+            elif value is None:
+                after = Q(**{f'{name}__isnull': False}) if reverse else None
+            else:
+                after = Q(**{f'{name}__{lookup}': value})
+                if not reverse:
+                    after |= Q(**{f'{name}__isnull': True})
+            if after is not None:
+                condition |= equal & after
+            equal &= Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+        first = ordering[0]
+        if first.lstrip('-') in self.nullable_ordering_fields:
+            return condition
+        first_lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{first_lookup}': position[0]}) & condition
@@ -0,0 +1,40 @@
+"""
+马拉松应用的缓存工具
+列表接口的响应按数据版本号缓存，模型写入时通过信号递增版本号
+条件请求的验证器（xxx_validators）配合 apps.common.conditional.conditional_get 使用
+"""
+import hashlib
+
+from apps.common.cache_version import get_data_version
+from apps.common.conditional import collection_validators, object_validators
+from .models import Marathon, MarathonRegistration
+
+# 数据版本号的命名空间
+MARATHON_NAMESPACE = 'marathon'
+REGISTRATION_NAMESPACE = 'registration'
+
+
+def list_cache_key(namespace, request, name='list'):
+    """
+    生成列表响应的缓存键：命名空间 + 接口名 + 当前版本号 + 主机名和查询参数摘要
+    查询参数排序后再计算摘要，参数顺序不同的请求共享同一份缓存
+    分页链接是包含主机名的绝对地址，所以主机名也参与摘要
+    """
+    query = sorted((key, tuple(request.GET.getlist(key))) for key in request.GET.keys())
+    digest = hashlib.md5(repr((request.get_host(), query)).encode('utf-8')).hexdigest()
+    return f'{namespace}_{name}:{get_data_version(namespace)}:{digest}'
+
+
+def marathon_list_validators(request, *args, **kwargs):
+    """赛事列表的验证器"""
+    return collection_validators(MARATHON_NAMESPACE, Marathon.objects.all())
+
+
+def marathon_detail_validators(request, pk, *args, **kwargs):
+    """单个赛事的验证器"""
+    return object_validators(MARATHON_NAMESPACE, Marathon.objects.all(), pk)
+
+
+def registration_list_validators(request, *args, **kwargs):
+    """报名赛事列表的验证器"""
+    return collection_validators(REGISTRATION_NAMESPACE, MarathonRegistration.objects.all())
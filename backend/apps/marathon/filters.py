@@ -0,0 +1,94 @@
+"""
+马拉松应用的列表过滤和排序
+查询参数直接转换为ORM条件，由数据库利用 Meta.indexes 中的索引完成过滤，
+前端只接收需要展示的数据
+"""
+import datetime
+
+from rest_framework.exceptions import ValidationError
+
+
+def _parse_date(value, name):
+    """解析 YYYY-MM-DD 格式的日期参数"""
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({'error': f'参数{name}格式错误，应为YYYY-MM-DD，当前值：{value}'})
+
+
+def _parse_id(value, name):
+    """解析整数ID参数"""
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({'error': f'参数{name}必须是整数，当前值：{value}'})
+
+
+def _parse_choices(value, choices, name):
+    """解析逗号分隔的枚举参数，如 event_type=half,full"""
+    valid = {choice for choice, _ in choices}
+    values = [item.strip() for item in value.split(',') if item.strip()]
+    invalid = [item for item in values if item not in valid]
+    if invalid:
+        raise ValidationError({'error': f'参数{name}取值无效：{",".join(invalid)}'})
+    return values
+
+
+def filter_events(queryset, params):
+    """
+    按查询参数过滤赛事或报名赛事，两个模型共用同一组参数：
+        start_date / end_date   赛事日期范围（含边界）
+        year                    赛事年份（转换为日期范围，可以使用event_date索引）
+        event_type              赛事类型，多个用逗号分隔
+        province / city / district              按地区名称过滤
+        province_id / city_id / district_id     按地区外键过滤
+        registration_status     报名状态，多个用逗号分隔（仅报名赛事）
+    """
+    model = queryset.model
+
+    start_date = params.get('start_date')
+    if start_date:
+        queryset = queryset.filter(event_date__gte=_parse_date(start_date, 'start_date'))
+    end_date = params.get('end_date')
+    if end_date:
+        queryset = queryset.filter(event_date__lte=_parse_date(end_date, 'end_date'))
+    year = params.get('year')
+    if year:
+        year = _parse_id(year, 'year')
+        if not 1 <= year <= 9999:
+            raise ValidationError({'error': f'参数year超出范围：{year}'})
+        queryset = queryset.filter(event_date__range=(datetime.date(year, 1, 1), datetime.date(year, 12, 31)))
+
+    event_type = params.get('event_type')
+    if event_type:
+        queryset = queryset.filter(event_type__in=_parse_choices(event_type, model.EVENT_TYPE_CHOICES, 'event_type'))
+
+    # 地区名称：数据库中保存的是标准化后的完整名称（如"上海市"），这里先做同样的标准化
+    normalizer = model()
+    province = params.get('province')
+    if province:
+        queryset = queryset.filter(province=normalizer.normalize_province_name(province))
+    city = params.get('city')
+    if city:
+        queryset = queryset.filter(city=normalizer.normalize_city_name(city))
+    district = params.get('district')
+    if district:
+        queryset = queryset.filter(district=normalizer.normalize_district_name(district))
+
+    # 地区外键
+    for param, field in (('province_id', 'province_obj_id'),
+                         ('city_id', 'city_obj_id'),
+                         ('district_id', 'district_obj_id')):
+        value = params.get(param)
+        if value:
+            queryset = queryset.filter(**{field: _parse_id(value, param)})
+
+    registration_status = params.get('registration_status')
+    if registration_status:
+        if not hasattr(model, 'REGISTRATION_STATUS_CHOICES'):
+            raise ValidationError({'error': '参数registration_status仅适用于报名赛事'})
+        queryset = queryset.filter(registration_status__in=_parse_choices(
+            registration_status, model.REGISTRATION_STATUS_CHOICES, 'registration_status'))
+
+    return queryset
+
@@ -0,0 +1,206 @@
+"""
+赛事地点文本 -> 省/市/区县
+
+用所有地区的完整名称和简称（如"浦东新区"、"浦东"）构建 Aho-Corasick 自动机，一次扫描找出文本中出现的
+全部地区名称，再按上下级关系选出最具体的一组：
+  1. 被更长名称覆盖的匹配丢弃（"浦东新区"中的"浦东"）
+  2. 每个候选地区的得分 = 它和它的上级在文本中不同位置出现的次数减去冲突的位置数，其次是级别（区县 > 城市 > 省份）
+     和匹配长度；冲突的位置是只匹配到同级或更高级的其他地区的位置（不可能是候选的下级），
+     同名地区靠上级区分，如"北京朝阳"得到北京市朝阳区，而不是长春市朝阳区；
+     候选的上级与文本中的其他地区矛盾时不因级别更深而胜出，如"武汉东湖"得到武汉市，而不是南昌市东湖区；
+     只在上级名称的位置上匹配到的下级（"乌鲁木齐"中的乌鲁木齐县）不作为候选
+  3. 得分最高的候选有多个且上级不同（如只写了"朝阳区"），只返回它们共同的上级部分
+自动机随进程内的地区索引按地区数据版本号重建（见regions.py）。
+"""
+import threading
+
+from .region_search import short_name
+from .regions import get_region_index
+
+# 级别深度：越具体越大
+_DEPTH = {'province': 1, 'city': 2, 'district': 3}
+
+
+class RegionMatcher:
+    """
+    地区名称的 Aho-Corasick 自动机
+        goto:    状态 -> {字符: 下一状态}
+        fail:    状态 -> 失配时跳转的状态
+        output:  状态 -> 在该状态结束的名称列表（已合并失配链上的输出）
+        regions: 名称 -> [(级别, 地区ID), ...]
+    """
+    __slots__ = ('goto', 'fail', 'output', 'regions', 'index', 'version')
+
+    def __init__(self, region_index):
+        self.index = region_index
+        self.version = region_index.version
+        self.regions = {}
+        for level, items in (
+            ('province', region_index.provinces.items()),
+            ('city', ((pk, name) for pk, (name, _) in region_index.cities.items())),
+            ('district', ((pk, name) for pk, (name, _) in region_index.districts.items())),
+        ):
+            for pk, name in items:
+                for pattern in {name, short_name(name)}:
+                    if pattern:
+                        self.regions.setdefault(pattern, []).append((level, pk))
+        self._build(self.regions)
+
+    def _build(self, patterns):
+        goto, output = [{}], [[]]
+        for pattern in patterns:
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = goto[state][char] = len(goto)
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append(pattern)
+
+        # 按层次遍历计算失配指针
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                output[next_state] = output[next_state] + output[fail[next_state]]
+        self.goto, self.fail, self.output = goto, fail, output
+
+    def find(self, text):
+        """一次扫描找出文本中出现的所有地区名称，返回 [(起始位置, 结束位置, 名称)]"""
+        goto, fail, output = self.goto, self.fail, self.output
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in output[state]:
+                matches.append((position + 1 - len(pattern), position + 1, pattern))
+        return matches
+
+    def _chain(self, level, pk):
+        """地区及其上级：[(级别, ID)]，从省份开始"""
+        if level == 'province':
+            return [('province', pk)]
+        if level == 'city':
+            return [('province', self.index.cities[pk][1]), ('city', pk)]
+        city_id = self.index.districts[pk][1]
+        return [('province', self.index.cities[city_id][1]), ('city', city_id), ('district', pk)]
+
+    def _name(self, level, pk):
+        if level == 'province':
+            return self.index.province_name(pk)
+        if level == 'city':
+            return self.index.city_name(pk)
+        return self.index.district_name(pk)
+
+    def match(self, text):
+        """
+        解析地点文本，返回 {'province_id', 'province', 'city_id', 'city', 'district_id', 'district'}，
+        未识别的级别为None；文本中没有可确定的地区时返回None
+        """
+        if not text:
+            return None
+        matches = self.find(text)
+        # 丢弃被更长匹配覆盖的匹配
+        matches = [
+            (start, end, pattern) for start, end, pattern in matches
+            if not any(
+                other_start <= start and end <= other_end and other_end - other_start > end - start
+                for other_start, other_end, _ in matches
+            )
+        ]
+        if not matches:
+            return None
+
+        # 文本中出现过的地区 -> 匹配到它的位置集合；位置 -> 该位置匹配到的最深级别
+        found = {}
+        span_depths = {}
+        for start, end, pattern in matches:
+            for region in self.regions[pattern]:
+                found.setdefault(region, set()).add((start, end))
+                span_depths[start, end] = max(span_depths.get((start, end), 0), _DEPTH[region[0]])
+
+        best_score, best_chains = None, []
+        for region in found:
+            chain = self._chain(*region)
+            ancestor_spans = set().union(*(found.get(ancestor, ()) for ancestor in chain[:-1]))
+            # 只在上级名称的位置上匹配到（如"乌鲁木齐"既是乌鲁木齐市也是乌鲁木齐县的简称），
+            # 视为上级，除非与上级同名（直辖市的"上海市"既是省份也是城市）
+            if found[region] <= ancestor_spans and len(chain) > 1:
+                if self._name(*region) != self._name(*chain[-2]):
+                    continue
+            spans = ancestor_spans | found[region]
+            depth = _DEPTH[region[0]]
+            # 不属于该候选及其上级、且只匹配到同级或更高级地区的位置，与该候选矛盾
+            conflicts = sum(1 for span, span_depth in span_depths.items()
+                            if span not in spans and span_depth <= depth)
+            score = (len(spans) - conflicts, depth, sum(end - start for start, end in spans))
+            if best_score is None or score > best_score:
+                best_score, best_chains = score, [chain]
+            elif score == best_score:
+                best_chains.append(chain)
+
+        # 多个同分候选时只保留共同的上级部分
+        chain = best_chains[0]
+        for other in best_chains[1:]:
+            common = 0
+            while common < min(len(chain), len(other)) and chain[common] == other[common]:
+                common += 1
+            chain = chain[:common]
+        if not chain:
+            return None
+
+        result = dict.fromkeys(('province_id', 'province', 'city_id', 'city', 'district_id', 'district'))
+        for level, pk in chain:
+            result[f'{level}_id'] = pk
+            result[level] = self._name(level, pk)
+        return result
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_region_matcher():
+    """获取当前进程的地点匹配器，地区索引重新加载后随之重建"""
+    global _matcher
+    region_index = get_region_index()
+    matcher = _matcher
+    if matcher is None or matcher.version != region_index.version:
+        with _matcher_lock:
+            matcher = _matcher
+            if matcher is None or matcher.version != region_index.version:
+                matcher = _matcher = RegionMatcher(region_index)
+    return matcher
+
+
+def geocode(text, matcher=None):
+    """把自由文本的地点解析为省/市/区县（见 RegionMatcher.match）"""
+    return (matcher or get_region_matcher()).match(text)
+
+
+def fill_region_from_location(instance, matcher=None):
+    """
+    赛事/报名赛事没有填写任何地区信息时，根据 location 文本补全地区字符串和外键
+    已填写省份（字符串或外键）的记录不做改动；返回是否补全
+    """
+    if instance.province or instance.province_obj_id or not instance.location:
+        return False
+    result = geocode(instance.location, matcher)
+    if result is None:
+        return False
+    instance.province, instance.province_obj_id = result['province'], result['province_id']
+    if result['city_id'] and not instance.city and not instance.city_obj_id:
+        instance.city, instance.city_obj_id = result['city'], result['city_id']
+    if result['district_id'] and not instance.district and not instance.district_obj_id:
+        instance.district, instance.district_obj_id = result['district'], result['district_id']
+    return True
@@ -0,0 +1,312 @@
+"""
+地图边界（GeoJSON）简化
+
+不同显示级别使用不同的精度，减小地图数据体积和前端解析、绘制时间：
+  1. 量化：坐标按级别精度取整到网格（如小数点后3位），去掉重复点
+  2. 拆分公共边：相邻区域共用的边界只保存一次（TopoJSON 的 arc），在交汇点处断开
+  3. 简化：每条边用 Douglas-Peucker 算法简化一次，相邻区域的边界简化结果完全相同，不会出现缝隙或重叠
+  4. 输出：还原为 GeoJSON（ECharts 直接使用），或输出 TopoJSON（公共边只传一次，体积更小）
+退化为不足3个点的环丢弃；一个区域的所有多边形都被丢弃时（面积很小的区域），改用不简化的边界，保证每个区域都有形状
+（TopoJSON 中比量化网格还小的区域没有几何对象）。
+只处理 Polygon / MultiPolygon，其他类型的几何对象保持不变。
+"""
+
+# 显示级别 -> (量化精度（小数位数）, 简化容差（度）)
+DETAIL_LEVELS = {
+    'low': (2, 0.02),      # 全国视图
+    'medium': (3, 0.004),  # 省级视图
+    'high': (4, 0.001),    # 市级视图
+}
+FULL_DETAIL = 'full'  # 原始数据，不做处理
+
+
+def douglas_peucker(points, tolerance):
+    """Douglas-Peucker 简化折线，保留首尾点；points 为坐标元组列表"""
+    count = len(points)
+    if count < 3:
+        return list(points)
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    tolerance2 = tolerance * tolerance
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first]
+        bx, by = points[last]
+        dx, dy = bx - ax, by - ay
+        length2 = dx * dx + dy * dy
+        max_distance, index = -1, None
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length2:
+                cross = (px - ax) * dy - (py - ay) * dx
+                distance = cross * cross / length2
+            else:
+                # 首尾是同一个点（闭合的环），按到该点的距离
+                distance = (px - ax) ** 2 + (py - ay) ** 2
+            if distance > max_distance:
+                max_distance, index = distance, i
+        if max_distance > tolerance2:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _quantize_ring(ring, scale):
+    """坐标取整到网格，去掉连续重复点、折返的尖刺（A→B→A）和闭合点，返回不闭合的点列表"""
+    points = []
+    for coordinate in ring:
+        point = (round(coordinate[0] * scale), round(coordinate[1] * scale))
+        if points and point == points[-1]:
+            continue
+        if len(points) > 1 and point == points[-2]:
+            # 取整后折返到前一个点，去掉尖刺；否则同一个点在环中出现两次，会被误判为交汇点
+            points.pop()
+            continue
+        points.append(point)
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points
+
+
+def _polygons(geometry):
+    """Polygon / MultiPolygon 的多边形列表，其他类型返回None"""
+    if not isinstance(geometry, dict):
+        return None
+    if geometry.get('type') == 'Polygon':
+        return [geometry.get('coordinates') or []]
+    if geometry.get('type') == 'MultiPolygon':
+        return geometry.get('coordinates') or []
+    return None
+
+
+class Topology:
+    """
+    由一组 GeoJSON feature 构建的拓扑：
+        arcs:      简化后的边（网格坐标列表），相邻区域共用
+        raw_arcs:  简化前的边
+        shapes:    每个 feature 的多边形，None 表示不是面状几何；多边形为环的列表，环为边编号的列表（~i 表示反向使用第i条边）
+    """
+
+    def __init__(self, features, digits, tolerance):
+        self.digits = digits
+        self.scale = 10 ** digits
+        rings_by_feature = []
+        for feature in features:
+            polygons = _polygons(feature.get('geometry'))
+            if polygons is None:
+                rings_by_feature.append(None)
+                continue
+            quantized = []
+            for polygon in polygons:
+                rings = [_quantize_ring(ring, self.scale) for ring in polygon]
+                # 外环退化时整个多边形丢弃，内环退化时只丢弃该内环
+                if rings and len(rings[0]) >= 3:
+                    quantized.append([ring for ring in rings if len(ring) >= 3])
+            rings_by_feature.append(quantized)
+        junctions = self._junctions(rings_by_feature)
+
+        self.raw_arcs = []
+        self._arc_index = {}
+        self.shapes = [
+            None if polygons is None else [
+                [self._cut(ring, junctions) for ring in polygon]
+                for polygon in polygons
+            ]
+            for polygons in rings_by_feature
+        ]
+        del self._arc_index
+        grid_tolerance = tolerance * self.scale
+        self.arcs = [douglas_peucker(arc, grid_tolerance) for arc in self.raw_arcs]
+
+    @staticmethod
+    def _junctions(rings_by_feature):
+        """
+        交汇点：在不同的环中前后相邻的点不同的点（公共边的端点）
+        同一个点在一个环中出现多次时（边界自身相接），按该环中所有相邻点对的集合比较
+        """
+        neighbors = {}
+        junctions = set()
+        for polygons in rings_by_feature:
+            for polygon in polygons or ():
+                for ring in polygon:
+                    ring_neighbors = {}
+                    count = len(ring)
+                    for i, point in enumerate(ring):
+                        previous, following = ring[i - 1], ring[(i + 1) % count]
+                        pair = (previous, following) if previous <= following else (following, previous)
+                        ring_neighbors.setdefault(point, set()).add(pair)
+                    for point, pairs in ring_neighbors.items():
+                        pairs = frozenset(pairs)
+                        if neighbors.setdefault(point, pairs) != pairs:
+                            junctions.add(point)
+        return junctions
+
+    def _cut(self, ring, junctions):
+        """把环在交汇点处拆分为边，返回边编号列表"""
+        starts = [i for i, point in enumerate(ring) if point in junctions]
+        if not starts:
+            # 没有交汇点的环整体作为一条闭合的边，从最小的点开始，使相同的环得到相同的边
+            start = ring.index(min(ring))
+            return [self._arc(ring[start:] + ring[:start + 1])]
+        start = starts[0]
+        rotated = ring[start:] + ring[:start] + [ring[start]]
+        offsets = [i - start for i in starts] + [len(ring)]
+        return [self._arc(rotated[begin:end + 1]) for begin, end in zip(offsets, offsets[1:])]
+
+    def _arc(self, points):
+        """登记一条边，相同（或反向相同）的边只保存一次"""
+        key = tuple(points)
+        index = self._arc_index.get(key)
+        if index is not None:
+            return index
+        index = self._arc_index.get(key[::-1])
+        if index is not None:
+            return ~index
+        index = len(self.raw_arcs)
+        self.raw_arcs.append(points)
+        self._arc_index[key] = index
+        return index
+
+    def _ring_points(self, ring, arcs):
+        """由边编号还原环的点列表（闭合），退化为不足3个点时返回None"""
+        points = []
+        for index in ring:
+            arc = arcs[index] if index >= 0 else arcs[~index][::-1]
+            points.extend(arc if not points else arc[1:])
+        if len(set(points)) < 3:
+            return None
+        return points
+
+    def feature_rings(self, feature_index):
+        """
+        一个 feature 简化后的多边形：[(多边形, [环编号列表])]，环中的点为网格坐标
+        所有多边形都退化时改用简化前的边
+        """
+        polygons = self.shapes[feature_index]
+        for arcs in (self.arcs, self.raw_arcs):
+            result = []
+            for polygon in polygons:
+                if not polygon:
+                    continue
+                exterior = self._ring_points(polygon[0], arcs)
+                if exterior is None:
+                    continue
+                rings = [(exterior, polygon[0])]
+                for hole in polygon[1:]:
+                    points = self._ring_points(hole, arcs)
+                    if points is not None:
+                        rings.append((points, hole))
+                result.append(rings)
+            if result or not polygons:
+                return result, arcs is self.arcs
+        return [], True
+
+    def coordinates(self, points):
+        scale, digits = self.scale, self.digits
+        return [[round(x / scale, digits), round(y / scale, digits)] for x, y in points]
+
+
+def _geometry(polygons, coordinates):
+    if len(polygons) == 1:
+        return {'type': 'Polygon', 'coordinates': [coordinates(points) for points, _ in polygons[0]]}
+    return {
+        'type': 'MultiPolygon',
+        'coordinates': [[coordinates(points) for points, _ in polygon] for polygon in polygons],
+    }
+
+
+def _round_geometry(geometry, digits):
+    def round_coordinates(value):
+        if value and isinstance(value[0], (int, float)):
+            return [round(v, digits) for v in value]
+        return [round_coordinates(item) for item in value]
+    return dict(geometry, coordinates=round_coordinates(geometry.get('coordinates') or []))
+
+
+def simplify_geojson(data, detail):
+    """按显示级别简化 GeoJSON（FeatureCollection），返回新的 GeoJSON"""
+    if detail == FULL_DETAIL:
+        return data
+    digits, tolerance = DETAIL_LEVELS[detail]
+    features = data.get('features') or []
+    topology = Topology(features, digits, tolerance)
+    result = []
+    for i, feature in enumerate(features):
+        feature = dict(feature)
+        if topology.shapes[i]:
+            polygons, _ = topology.feature_rings(i)
+            feature['geometry'] = _geometry(polygons, topology.coordinates)
+        elif topology.shapes[i] is not None:
+            # 比量化网格还小的区域保留原始边界（只取整），保证每个区域都有形状
+            feature['geometry'] = _round_geometry(feature['geometry'], digits)
+        result.append(feature)
+    return dict(data, features=result)
+
+
+def to_topojson(data, detail, name='regions'):
+    """
+    按显示级别简化并输出 TopoJSON（坐标量化为整数并差分编码）
+    detail 为 full 时使用最高精度量化，不做简化
+    """
+    digits, tolerance = DETAIL_LEVELS.get(detail, (DETAIL_LEVELS['high'][0], 0))
+    features = data.get('features') or []
+    topology = Topology(features, digits, tolerance)
+
+    # 退化后改用简化前边界的区域，单独追加它们用到的原始边
+    arcs = list(topology.arcs)
+    raw_arc_ids = {}
+
+    def arc_id(index, simplified):
+        if simplified:
+            return index
+        positive = index if index >= 0 else ~index
+        if positive not in raw_arc_ids:
+            raw_arc_ids[positive] = len(arcs)
+            arcs.append(topology.raw_arcs[positive])
+        return raw_arc_ids[positive] if index >= 0 else ~raw_arc_ids[positive]
+
+    geometries = []
+    for i, feature in enumerate(features):
+        geometry = {'properties': feature.get('properties') or {}}
+        if 'id' in feature:
+            geometry['id'] = feature['id']
+        if topology.shapes[i] is None:
+            # 非面状几何保持 GeoJSON 坐标
+            geometry.update(feature.get('geometry') or {'type': None})
+        else:
+            polygons, simplified = topology.feature_rings(i)
+            polygon_arcs = [
+                [[arc_id(index, simplified) for index in ring] for _, ring in polygon]
+                for polygon in polygons
+            ]
+            if not polygon_arcs:
+                geometry['type'] = None
+            elif len(polygon_arcs) == 1:
+                geometry.update(type='Polygon', arcs=polygon_arcs[0])
+            else:
+                geometry.update(type='MultiPolygon', arcs=polygon_arcs)
+        geometries.append(geometry)
+
+    # 差分编码：每条边第一个点为绝对坐标（相对于 translate），其余为与前一点的差
+    points = [point for arc in arcs for point in arc]
+    min_x = min((x for x, _ in points), default=0)
+    min_y = min((y for _, y in points), default=0)
+    encoded = []
+    for arc in arcs:
+        previous_x, previous_y = min_x, min_y
+        deltas = []
+        for x, y in arc:
+            deltas.append([x - previous_x, y - previous_y])
+            previous_x, previous_y = x, y
+        encoded.append(deltas)
+    return {
+        'type': 'Topology',
+        'transform': {
+            'scale': [1 / topology.scale, 1 / topology.scale],
+            'translate': [min_x / topology.scale, min_y / topology.scale],
+        },
+        'objects': {name: {'type': 'GeometryCollection', 'geometries': geometries}},
+        'arcs': encoded,
+    }
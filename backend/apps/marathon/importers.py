@@ -0,0 +1,187 @@
+"""
+赛事/报名赛事批量导入
+支持CSV（首行为表头）和NDJSON（每行一个JSON对象）两种格式：
+  1. 逐行校验字段（使用模型字段自身的校验规则），出错的行记入报告并跳过
+  2. 地区名称按不重复的值批量标准化，再用进程内的地区索引一次性解析外键（见regions.py），
+     没有地区列的行根据赛事地点文本识别省市区（见geocoder.py）
+  3. 在一个事务中 bulk_create 批量插入并写入全文检索索引，之后统一使缓存失效（批量写入不触发信号）
+"""
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from apps.common.conditional import invalidate_bulk_write
+from apps.search.index import index_instances
+from .cache import MARATHON_NAMESPACE, REGISTRATION_NAMESPACE
+from .models import Marathon, MarathonRegistration
+from .regions import (
+    get_region_index, sync_region_fields,
+    normalize_province_name, normalize_city_name, normalize_district_name,
+)
+from .geocoder import get_region_matcher, fill_region_from_location
+from .utils import parse_duration_seconds, parse_pace_seconds
+
+# 导入类型 -> (模型, 缓存命名空间)
+IMPORT_KINDS = {
+    'marathon': (Marathon, MARATHON_NAMESPACE),
+    'registration': (MarathonRegistration, REGISTRATION_NAMESPACE),
+}
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# 地区字段及对应的标准化函数
+REGION_NORMALIZERS = (
+    ('province', normalize_province_name),
+    ('city', normalize_city_name),
+    ('district', normalize_district_name),
+)
+
+
+def importable_fields(model):
+    """可导入的字段：可编辑的普通字段（不含主键、外键、文件字段和自动时间字段）"""
+    return {
+        field.name: field
+        for field in model._meta.concrete_fields
+        if field.editable and not field.primary_key and not field.is_relation
+        and not isinstance(field, models.FileField)
+    }
+
+
+def detect_format(filename='', content_type=''):
+    """根据文件名或Content-Type推断格式，无法推断时返回None"""
+    filename = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if filename.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    if filename.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return None
+
+
+def parse_rows(text, fmt):
+    """
+    解析导入文本，逐行产出 (行号, 数据字典或错误信息)
+    行号为原文件中的行号，便于在报告中定位
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        for row in reader:
+            # 多出的列会放在None键下，忽略
+            row.pop(None, None)
+            if not any((value or '').strip() for value in row.values()):
+                continue
+            yield reader.line_num, row
+    elif fmt == 'ndjson':
+        for line_num, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_num, f'JSON解析失败: {e}'
+                continue
+            if not isinstance(row, dict):
+                yield line_num, '每行必须是一个JSON对象'
+                continue
+            yield line_num, row
+    else:
+        raise ValueError(f'不支持的导入格式: {fmt}')
+
+
+def _clean_row(row, fields):
+    """用模型字段校验一行数据，返回 (清洗后的数据, 错误字典)"""
+    values = {}
+    errors = {}
+    for name, field in fields.items():
+        if name not in row:
+            # 未提供的字段使用模型默认值，没有默认值的必填字段报错
+            if not field.blank and not field.has_default():
+                errors[name] = '该字段是必填项'
+            continue
+        raw = row[name]
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw in ('', None) and field.null:
+            raw = None
+        elif raw is None:
+            raw = ''
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as e:
+            errors[name] = '；'.join(e.messages)
+    return values, errors
+
+
+def import_rows(kind, rows, dry_run=False, strict=False, batch_size=500):
+    """
+    批量导入赛事或报名赛事
+        kind:     'marathon' 或 'registration'
+        rows:     parse_rows() 产出的 (行号, 数据) 序列
+        dry_run:  只校验不写入
+        strict:   任意一行出错时整体不导入
+    返回导入报告：{'kind', 'total', 'created', 'errors': [{'line', 'errors'}], 'ignored_fields', 'dry_run'}
+    """
+    model, namespace = IMPORT_KINDS[kind]
+    fields = importable_fields(model)
+
+    total = 0
+    errors = []
+    ignored_fields = set()
+    valid = []
+    for line_num, row in rows:
+        total += 1
+        if isinstance(row, str):
+            errors.append({'line': line_num, 'errors': {'row': row}})
+            continue
+        ignored_fields.update(key for key in row if key not in fields)
+        values, row_errors = _clean_row(row, fields)
+        if row_errors:
+            errors.append({'line': line_num, 'errors': row_errors})
+            continue
+        valid.append(values)
+
+    # 地区名称按不重复的值标准化，每个名称只处理一次
+    for name, normalize in REGION_NORMALIZERS:
+        normalized = {}
+        for values in valid:
+            value = values.get(name)
+            if value:
+                if value not in normalized:
+                    normalized[value] = normalize(value)
+                values[name] = normalized[value]
+
+    # 一次获取地区索引和地点匹配器，所有行共用，不逐行查询地区表
+    index = get_region_index()
+    matcher = get_region_matcher()
+    instances = []
+    for values in valid:
+        instance = model(**values)
+        # 没有地区列的行根据赛事地点文本识别省市区
+        fill_region_from_location(instance, matcher)
+        sync_region_fields(instance, index)
+        if model is Marathon:
+            instance.finish_seconds = parse_duration_seconds(instance.finish_time)
+            instance.pace_seconds = parse_pace_seconds(instance.pace)
+        instances.append(instance)
+
+    created = 0
+    if instances and not dry_run and not (strict and errors):
+        with transaction.atomic():
+            created = len(model.objects.bulk_create(instances, batch_size=batch_size))
+            # bulk_create 不触发 post_save 信号，手动写入全文检索索引（与插入在同一个事务中）
+            index_instances(instances)
+        # 同样手动使列表缓存和条件请求校验值失效
+        invalidate_bulk_write(namespace)
+
+    return {
+        'kind': kind,
+        'total': total,
+        'valid': len(instances),
+        'created': created,
+        'errors': errors,
+        'ignored_fields': sorted(ignored_fields),
+        'dry_run': dry_run,
+    }
@@ -0,0 +1,163 @@
+"""
+检查赛事/报名赛事的地区字符串字段（province/city/district）与外键字段（province_obj/city_obj/district_obj）是否一致
+
+每个模型每个级别只执行一条带关联的查询，找出不一致的记录，按类型统计并输出样例：
+  unlinked:      有名称但没有外键（保存时地区匹配失败）
+  missing_name:  有外键但名称为空
+  mismatch:      名称与外键对应的地区名称不同
+  wrong_parent:  外键的上级与上一级外键不一致（如城市不属于所填省份）
+--fix 时按以下规则修复，只读取需要的列、不逐行 save()，变更通过 apps/common/batch.write_changes 批量写回：
+  名称能在（上一级外键下）匹配到地区时以名称为准重新关联外键，否则以外键为准补全/覆盖名称；
+  两者都无法确定的记录只报告不修改。按省→市→区县的顺序逐级检查和修复，上一级的修复结果用于下一级。
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from apps.common.batch import write_changes
+from apps.common.conditional import invalidate_bulk_write
+from apps.marathon.cache import MARATHON_NAMESPACE, REGISTRATION_NAMESPACE
+from apps.marathon.models import Marathon, MarathonRegistration
+from apps.marathon.regions import (
+    get_region_index, normalize_province_name, normalize_city_name, normalize_district_name,
+)
+
+TARGETS = {
+    'marathon': ('马拉松赛事', Marathon, MARATHON_NAMESPACE),
+    'registration': ('报名赛事', MarathonRegistration, REGISTRATION_NAMESPACE),
+}
+
+# 级别 -> (上一级, 地区模型中指向上一级的外键, 名称标准化函数)
+LEVELS = (
+    ('province', None, None, normalize_province_name),
+    ('city', 'province', 'province', normalize_city_name),
+    ('district', 'city', 'city', normalize_district_name),
+)
+
+CATEGORIES = {
+    'unlinked': '有名称无外键',
+    'missing_name': '有外键无名称',
+    'mismatch': '名称与外键不一致',
+    'wrong_parent': '外键与上一级不一致',
+}
+
+
+def mismatch_filter(level, parent, parent_field):
+    """某一级不一致记录的查询条件（名称与外键地区名称的比较在数据库中通过关联完成）"""
+    fk = f'{level}_obj'
+    condition = (
+        (~Q(**{level: ''}) & Q(**{f'{fk}__isnull': True}))
+        | Q(**{level: '', f'{fk}__isnull': False})
+        | (Q(**{f'{fk}__isnull': False}) & ~Q(**{level: ''}) & ~Q(**{level: F(f'{fk}__name')}))
+    )
+    if parent:
+        # 上一级外键为空时，比较结果为NULL，单独列出
+        condition |= Q(**{f'{fk}__isnull': False}) & (
+            Q(**{f'{parent}_obj__isnull': True})
+            | ~Q(**{f'{fk}__{parent_field}': F(f'{parent}_obj')})
+        )
+    return condition
+
+
+class Command(BaseCommand):
+    help = '检查赛事地区名称与地区外键是否一致，--fix 批量修复'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['marathon', 'registration', 'all'], default='all', help='检查的数据（默认全部）')
+        parser.add_argument('--fix', action='store_true', help='修复可以确定的不一致记录')
+        parser.add_argument('--samples', type=int, default=5, help='每类不一致输出的样例数（默认5）')
+        parser.add_argument('--batch-size', type=int, default=1000, help='修复时每个事务写入的记录数（默认1000）')
+
+    def handle(self, *args, **options):
+        index = get_region_index()
+        names = list(TARGETS) if options['model'] == 'all' else [options['model']]
+        total_found = total_fixed = 0
+        for name in names:
+            label, model, namespace = TARGETS[name]
+            fixed_any = False
+            for level, parent, parent_field, normalize in LEVELS:
+                found, fixed = self.audit_level(model, label, index, level, parent, parent_field, normalize, options)
+                total_found += found
+                total_fixed += fixed
+                fixed_any = fixed_any or bool(fixed)
+            if fixed_any:
+                # 批量写入不触发信号，手动使缓存失效
+                invalidate_bulk_write(namespace)
+
+        if not total_found:
+            self.stdout.write(self.style.SUCCESS('地区名称与外键全部一致'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'共发现 {total_found} 处不一致，已修复 {total_fixed} 处'))
+        else:
+            self.stdout.write(self.style.WARNING(f'共发现 {total_found} 处不一致，使用 --fix 修复'))
+
+    def audit_level(self, model, label, index, level, parent, parent_field, normalize, options):
+        """检查并（可选）修复一个级别，返回 (不一致数, 修复数)"""
+        fk_id = f'{level}_obj_id'
+        columns = ['pk', level, fk_id, f'{level}_obj__name']
+        if parent:
+            columns += [f'{parent}_obj_id', f'{level}_obj__{parent_field}_id']
+        rows = (
+            model.objects.order_by('pk')
+            .filter(mismatch_filter(level, parent, parent_field))
+            .values_list(*columns)
+        )
+
+        categories = {key: [] for key in CATEGORIES}
+        changes = {}
+        unresolved = 0
+        for row in rows:
+            pk, value, obj_id, obj_name = row[:4]
+            parent_id, obj_parent_id = row[4:] if parent else (None, None)
+            if value and obj_id is None:
+                category = 'unlinked'
+            elif parent and obj_parent_id != parent_id:
+                category = 'wrong_parent'
+            elif not value:
+                category = 'missing_name'
+            else:
+                category = 'mismatch'
+            categories[category].append(row)
+
+            # 名称能匹配到地区时以名称为准，否则外键属于正确的上级时以外键为准
+            # 地区索引中是标准化后的名称，先标准化再匹配（如"浙江" -> "浙江省"）
+            name = normalize(value) if value else value
+            if level == 'province':
+                resolved = index.province_id(name) if name else None
+            elif parent_id is None:
+                resolved = None
+            else:
+                lookup = index.city_id if level == 'city' else index.district_id
+                resolved = lookup(parent_id, name) if name else None
+            if resolved is not None:
+                row_changes = {fk_id: resolved} if resolved != obj_id else {}
+                if value != name:
+                    row_changes[level] = name
+            elif obj_id is not None and (not parent or obj_parent_id == parent_id):
+                row_changes = {level: normalize(obj_name)}
+            else:
+                row_changes = {}
+            if row_changes:
+                changes[pk] = row_changes
+            else:
+                unresolved += 1
+
+        found = sum(len(items) for items in categories.values())
+        if not found:
+            return 0, 0
+        self.stdout.write(self.style.WARNING(f'{label} {level}：{found} 条不一致（{len(changes)} 条可修复，{unresolved} 条无法确定）'))
+        for category, items in categories.items():
+            if not items:
+                continue
+            self.stdout.write(f'  {CATEGORIES[category]}（{category}）：{len(items)} 条')
+            for row in items[:options['samples']]:
+                self.stdout.write(f'    ID {row[0]}: {dict(zip(columns[1:], row[1:]))}')
+
+        if not options['fix'] or not changes:
+            return found, 0
+        pks = list(changes)
+        for start in range(0, len(pks), options['batch_size']):
+            with transaction.atomic():
+                write_changes(model, {pk: changes[pk] for pk in pks[start:start + options['batch_size']]})
+        self.stdout.write(self.style.SUCCESS(f'{label} {level}：已修复 {len(changes)} 条'))
+        return found, len(changes)
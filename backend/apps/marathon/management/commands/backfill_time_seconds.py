@@ -0,0 +1,52 @@
+"""
+批量回填赛事的 finish_seconds / pace_seconds 字段
+新增字段之后运行一次；之后每次保存赛事都会自动计算
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.common.conditional import invalidate_bulk_write
+from apps.marathon.cache import MARATHON_NAMESPACE
+from apps.marathon.models import Marathon
+from apps.marathon.utils import parse_duration_seconds, parse_pace_seconds
+
+
+class Command(BaseCommand):
+    help = '根据 finish_time / pace 字符串批量回填 finish_seconds / pace_seconds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批处理的记录数（默认1000）')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        total_count = 0
+        updated_count = 0
+
+        while True:
+            # 按主键分批读取需要的列，不加载完整的模型实例
+            rows = list(
+                Marathon.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'finish_time', 'pace', 'finish_seconds', 'pace_seconds')[:batch_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            total_count += len(rows)
+
+            changed = []
+            for pk, finish_time, pace, old_finish_seconds, old_pace_seconds in rows:
+                finish_seconds = parse_duration_seconds(finish_time)
+                pace_seconds = parse_pace_seconds(pace)
+                if (finish_seconds, pace_seconds) != (old_finish_seconds, old_pace_seconds):
+                    changed.append(Marathon(pk=pk, finish_seconds=finish_seconds, pace_seconds=pace_seconds))
+            if changed:
+                # 每批一个事务、一条批量UPDATE
+                with transaction.atomic():
+                    Marathon.objects.bulk_update(changed, ['finish_seconds', 'pace_seconds'])
+                updated_count += len(changed)
+
+        if updated_count:
+            invalidate_bulk_write(MARATHON_NAMESPACE)
+
+        self.stdout.write(self.style.SUCCESS(f'回填完成！共检查 {total_count} 条，更新 {updated_count} 条'))
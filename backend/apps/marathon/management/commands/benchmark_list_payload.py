@@ -0,0 +1,82 @@
+"""
+对比赛事列表两种序列化路径的吞吐量（行/秒）：
+  - serializer：MarathonListSerializer + JSONRenderer（原来的路径）
+  - values：.values_list() 元组直接编码为JSON字节（payloads.py）
+测试数据在事务中批量插入，结束后回滚，不会留在数据库中
+"""
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from apps.marathon.models import Marathon
+from apps.marathon.payloads import render_json, rows_to_data
+from apps.marathon.serializers import MarathonListSerializer
+
+
+class Command(BaseCommand):
+    help = '对比赛事列表的序列化器路径和 values 快速路径的吞吐量'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='测试的行数，可指定多个（默认 1000 10000 100000）')
+        parser.add_argument('--repeat', type=int, default=3, help='每种路径重复次数，取最快的一次（默认3）')
+
+    def handle(self, *args, **options):
+        fields = MarathonListSerializer.Meta.fields
+        self.stdout.write(f'{"行数":>8} {"serializer 行/秒":>18} {"values 行/秒":>16} {"加速比":>8}')
+        for row_count in options['rows']:
+            with transaction.atomic():
+                self._create_rows(row_count)
+                queryset = Marathon.objects.order_by('-event_date', '-id')
+
+                serializer_time = self._best_of(options['repeat'], lambda: JSONRenderer().render(
+                    MarathonListSerializer(queryset.all(), many=True).data))
+                values_time = self._best_of(options['repeat'], lambda: render_json(rows_to_data(
+                    Marathon, fields, queryset.all().values_list(*fields).iterator(chunk_size=2000))))
+
+                # 两条路径的输出必须完全一致
+                serializer_bytes = JSONRenderer().render(MarathonListSerializer(queryset.all(), many=True).data)
+                values_bytes = render_json(rows_to_data(Marathon, fields, queryset.all().values_list(*fields)))
+                if serializer_bytes != values_bytes:
+                    self.stdout.write(self.style.ERROR('两条路径的输出不一致！'))
+
+                self.stdout.write(
+                    f'{row_count:>8} {row_count / serializer_time:>18,.0f} {row_count / values_time:>16,.0f} '
+                    f'{serializer_time / values_time:>7.1f}x'
+                )
+                transaction.set_rollback(True)
+
+    @staticmethod
+    def _best_of(repeat, func):
+        """重复执行，返回最短耗时（秒）"""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    @staticmethod
+    def _create_rows(row_count):
+        """批量插入测试数据（bulk_create不触发信号，不会影响缓存版本号）"""
+        start_date = datetime.date(2000, 1, 1)
+        Marathon.objects.bulk_create([
+            Marathon(
+                event_name=f'测试马拉松{i}',
+                event_date=start_date + datetime.timedelta(days=i % 9000),
+                location='上海',
+                province='上海市',
+                city='上海市',
+                district='浦东新区',
+                event_type='full' if i % 2 else 'half',
+                finish_time='3:30:00',
+                pace='04:58',
+                finish_seconds=12600,
+                pace_seconds=298,
+            )
+            for i in range(row_count)
+        ], batch_size=2000)
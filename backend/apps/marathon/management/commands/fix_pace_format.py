@@ -1,60 +1,49 @@
-from django.core.management.base import BaseCommand
+"""
+修复配速数据格式，将 5:30/km 转换为 05:30
+按主键分批处理、批量写回，可断点续跑（见 apps/common/batch.py）
+"""
+from apps.common.batch import BatchCommand, BatchTarget
+from apps.marathon.cache import MARATHON_NAMESPACE
 from apps.marathon.models import Marathon
+from apps.marathon.utils import parse_pace_seconds
 
 
-class Command(BaseCommand):
+def fix_pace(pace):
+    """返回修复后的配速，格式无法识别时返回None"""
+    # 移除 /km 后缀
+    new_pace = pace.replace('/km', '').strip()
+    # 检查格式是否为 m:ss 或 mm:ss
+    parts = new_pace.split(':')
+    if len(parts) != 2:
+        return None
+    try:
+        minutes = int(parts[0])
+    except ValueError:
+        return None
+    # 确保分钟数是两位数格式
+    return f'{minutes:02d}:{parts[1]}'
+
+
+class Command(BatchCommand):
     help = '修复配速数据格式，将 5:30/km 转换为 05:30'
 
+    def get_targets(self, options):
+        self.invalid = {}
+        return [BatchTarget('马拉松赛事', Marathon.objects.exclude(pace=''), ('pace',), MARATHON_NAMESPACE)]
+
+    def transform(self, target, row):
+        old_pace = row['pace']
+        new_pace = fix_pace(old_pace)
+        if new_pace is None:
+            self.invalid[old_pace] = self.invalid.get(old_pace, 0) + 1
+            return {}
+        if new_pace == old_pace:
+            return {}
+        # 配速变化时同步更新秒数字段（原先由 save() 计算）
+        return {'pace': new_pace, 'pace_seconds': parse_pace_seconds(new_pace)}
+
     def handle(self, *args, **options):
-        events = Marathon.objects.all()
-        updated_count = 0
-        
-        for event in events:
-            old_pace = event.pace
-            if not old_pace:
-                continue
-            
-            # 移除 /km 后缀
-            new_pace = old_pace.replace('/km', '').strip()
-            
-            # 检查格式是否为 m:ss 或 mm:ss
-            if ':' in new_pace:
-                parts = new_pace.split(':')
-                if len(parts) == 2:
-                    try:
-                        minutes = int(parts[0])
-                        seconds = parts[1]
-                        # 确保分钟数是两位数格式
-                        new_pace = f'{minutes:02d}:{seconds}'
-                        
-                        if new_pace != old_pace:
-                            event.pace = new_pace
-                            event.save(update_fields=['pace'])
-                            self.stdout.write(
-                                self.style.SUCCESS(
-                                    f'Updated ID {event.id}: "{old_pace}" -> "{new_pace}"'
-                                )
-                            )
-                            updated_count += 1
-                    except ValueError:
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f'ID {event.id}: Invalid pace format "{old_pace}", skipping'
-                            )
-                        )
-                else:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'ID {event.id}: Invalid pace format "{old_pace}", expected m:ss or mm:ss'
-                        )
-                    )
-            else:
-                self.stdout.write(
-                    self.style.WARNING(
-                        f'ID {event.id}: Pace "{old_pace}" does not contain ":", skipping'
-                    )
-                )
-        
-        self.stdout.write(
-            self.style.SUCCESS(f'\n修复完成！共更新 {updated_count} 条记录')
-        )
+        super().handle(*args, **options)
+        for pace, count in sorted(self.invalid.items(), key=lambda item: -item[1]):
+            self.stdout.write(self.style.WARNING(f'无法识别的配速格式 "{pace}"（{count} 条），已跳过'))
+        self.stdout.write(self.style.SUCCESS('修复完成！'))
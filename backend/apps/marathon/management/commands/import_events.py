@@ -0,0 +1,55 @@
+"""
+从CSV/NDJSON文件批量导入赛事或报名赛事
+与 POST /api/marathon/import/ 使用同一套导入逻辑（见importers.py）
+
+用法：
+    python manage.py import_events races.csv
+    python manage.py import_events registrations.ndjson --kind registration --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.marathon.importers import IMPORT_KINDS, IMPORT_FORMATS, detect_format, parse_rows, import_rows
+
+
+class Command(BaseCommand):
+    help = '从CSV/NDJSON文件批量导入赛事或报名赛事'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='导入文件路径')
+        parser.add_argument('--kind', choices=sorted(IMPORT_KINDS), default='marathon', help='导入类型（默认marathon）')
+        parser.add_argument('--file-format', choices=IMPORT_FORMATS, help='文件格式，不传时根据扩展名推断')
+        parser.add_argument('--dry-run', action='store_true', help='只校验不写入')
+        parser.add_argument('--strict', action='store_true', help='任意一行出错时整体不导入')
+        parser.add_argument('--batch-size', type=int, default=500, help='每条INSERT语句的记录数（默认500）')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['file_format'] or detect_format(path)
+        if fmt is None:
+            raise CommandError('无法根据扩展名识别文件格式，请通过 --file-format 指定')
+
+        try:
+            # utf-8-sig 兼容Excel导出的带BOM的CSV
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(f'读取文件失败: {e}')
+
+        report = import_rows(
+            options['kind'], parse_rows(text, fmt),
+            dry_run=options['dry_run'], strict=options['strict'], batch_size=options['batch_size'],
+        )
+
+        for error in report['errors']:
+            details = '；'.join(f'{field}: {message}' for field, message in error['errors'].items())
+            self.stdout.write(self.style.WARNING(f'第 {error["line"]} 行: {details}'))
+        if report['ignored_fields']:
+            self.stdout.write(f'忽略未知字段: {", ".join(report["ignored_fields"])}')
+
+        summary = f'共 {report["total"]} 行，校验通过 {report["valid"]} 行，出错 {len(report["errors"])} 行'
+        if report['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'试运行完成！{summary}，未写入数据库'))
+        elif options['strict'] and report['errors']:
+            raise CommandError(f'{summary}，严格模式下未导入任何数据')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'导入完成！{summary}，新增 {report["created"]} 条'))
@@ -0,0 +1,45 @@
+"""
+加载全国省市区数据集，或应用行政区划代码的差异文件（格式见region_data.py）
+
+用法：
+    python manage.py load_regions                       # 加载随代码发布的完整数据集
+    python manage.py load_regions changes-2025.json     # 应用差异文件（可一次传多个，按顺序应用）
+    python manage.py load_regions --dry-run changes-2025.json
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.marathon.region_data import DEFAULT_DATASET, LEVELS, read_dataset, apply_dataset, format_stats
+
+
+class Command(BaseCommand):
+    help = '加载全国省市区数据集，或应用行政区划代码的差异文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='数据集或差异文件路径（JSON，.gz结尾时按gzip解压），默认使用内置数据集')
+        parser.add_argument('--levels', nargs='+', choices=list(LEVELS), default=list(LEVELS), help='只处理指定级别')
+        parser.add_argument('--dry-run', action='store_true', help='只统计变化，不写入数据库')
+
+    def handle(self, *args, **options):
+        for path in options['paths'] or [DEFAULT_DATASET]:
+            try:
+                dataset = read_dataset(path)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'读取 {path} 失败: {e}')
+
+            start = time.perf_counter()
+            try:
+                stats = apply_dataset(dataset, levels=options['levels'], dry_run=options['dry_run'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            elapsed = time.perf_counter() - start
+
+            self.stdout.write(f'{path}（{elapsed:.2f}秒）')
+            for line in format_stats(stats):
+                self.stdout.write(f'  {line}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('试运行完成，未写入数据库'))
+        else:
+            self.stdout.write(self.style.SUCCESS('省市区数据加载完成！'))
@@ -1,95 +1,60 @@
-from django.core.management.base import BaseCommand
-from apps.marathon.models import Marathon
+"""
+根据赛事地点（location）文本批量补全赛事/报名赛事的省市区字段
+只处理还没有任何省份信息的记录；地点文本用地区名称自动机识别（见geocoder.py），
+按主键分批处理、批量写回，可断点续跑（见 apps/common/batch.py）
+"""
+from apps.common.batch import BatchCommand, BatchTarget
+from apps.marathon.cache import MARATHON_NAMESPACE, REGISTRATION_NAMESPACE
+from apps.marathon.geocoder import get_region_matcher, fill_region_from_location
+from apps.marathon.models import Marathon, MarathonRegistration
+from apps.marathon.regions import get_region_index, sync_region_fields
 
-class Command(BaseCommand):
-    help = '迁移现有赛事数据，填充province、city和district字段'
+REGION_FIELDS = ('province', 'city', 'district', 'province_obj_id', 'city_obj_id', 'district_obj_id')
 
-    def handle(self, *args, **options):
-        # 城市到省份的映射
-        city_to_province = {
-            '北京': '北京市',
-            '上海': '上海市',
-            '天津': '天津市',
-            '重庆': '重庆市',
-            '广州': '广东省',
-            '深圳': '广东省',
-            '珠海': '广东省',
-            '东莞': '广东省',
-            '佛山': '广东省',
-            '杭州': '浙江省',
-            '宁波': '浙江省',
-            '温州': '浙江省',
-            '南京': '江苏省',
-            '苏州': '江苏省',
-            '无锡': '江苏省',
-            '常州': '江苏省',
-            '武汉': '湖北省',
-            '成都': '四川省',
-            '西安': '陕西省',
-            '郑州': '河南省',
-            '长沙': '湖南省',
-            '合肥': '安徽省',
-            '福州': '福建省',
-            '厦门': '福建省',
-            '济南': '山东省',
-            '青岛': '山东省',
-            '沈阳': '辽宁省',
-            '大连': '辽宁省',
-            '长春': '吉林省',
-            '哈尔滨': '黑龙江省',
-            '石家庄': '河北省',
-            '太原': '山西省',
-            '呼和浩特': '内蒙古自治区',
-            '南昌': '江西省',
-            '南宁': '广西壮族自治区',
-            '海口': '海南省',
-            '昆明': '云南省',
-            '贵阳': '贵州省',
-            '兰州': '甘肃省',
-            '西宁': '青海省',
-            '银川': '宁夏回族自治区',
-            '乌鲁木齐': '新疆维吾尔自治区',
-            '拉萨': '西藏自治区',
-            '台北': '台湾省',
-            '香港': '香港特别行政区',
-            '澳门': '澳门特别行政区',
-        }
+TARGETS = {
+    'marathon': ('马拉松赛事', Marathon, MARATHON_NAMESPACE),
+    'registration': ('报名赛事', MarathonRegistration, REGISTRATION_NAMESPACE),
+}
+
+
+class Command(BatchCommand):
+    help = '迁移现有赛事数据，根据赛事地点填充province、city和district字段'
+    default_batch_size = 2000
 
-        # 获取所有赛事
-        events = Marathon.objects.all()
-        updated_count = 0
-        skipped_count = 0
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--model', choices=['marathon', 'registration', 'all'], default='all', help='处理的数据（默认全部）')
 
-        for event in events:
-            location = event.location.strip()
-            
-            # 如果已经有数据，跳过
-            if event.province and event.city:
-                skipped_count += 1
-                continue
-            
-            # 尝试从location中提取城市
-            province = city_to_province.get(location)
-            
-            if province:
-                event.province = province
-                event.city = location
-                event.district = ''
-                event.save()
-                updated_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'已更新: {event.event_name} - {location} -> {province}')
-                )
-            else:
-                self.stdout.write(
-                    self.style.WARNING(f'未找到映射: {event.event_name} - {location}')
-                )
+    def get_targets(self, options):
+        self.index = get_region_index()
+        self.matcher = get_region_matcher()
+        self.unresolved = {}  # 未识别的地点 -> 记录数
+        names = list(TARGETS) if options['model'] == 'all' else [options['model']]
+        targets = []
+        for name in names:
+            label, model, namespace = TARGETS[name]
+            # 只处理省份字符串和外键都为空的记录
+            queryset = model.objects.filter(province='', province_obj__isnull=True).exclude(location='')
+            targets.append(BatchTarget(label, queryset, ('location',) + REGION_FIELDS, namespace))
+        return targets
 
-        self.stdout.write(
-            self.style.SUCCESS(
-                f'\n迁移完成！\n'
-                f'更新: {updated_count} 条\n'
-                f'跳过: {skipped_count} 条\n'
-                f'总计: {events.count()} 条'
-            )
-        )
+    def transform(self, target, row):
+        instance = target.queryset.model(**row)
+        if not fill_region_from_location(instance, self.matcher):
+            location = row['location'].strip()
+            self.unresolved[location] = self.unresolved.get(location, 0) + 1
+            return {}
+        sync_region_fields(instance, self.index)
+        return {
+            name: getattr(instance, name) for name in REGION_FIELDS
+            if getattr(instance, name) != row[name]
+        }
+
+    def handle(self, *args, **options):
+        super().handle(*args, **options)
+        unresolved = sorted(self.unresolved.items(), key=lambda item: -item[1])
+        for location, count in unresolved[:50]:
+            self.stdout.write(self.style.WARNING(f'未识别地点: {location}（{count} 条）'))
+        if len(unresolved) > 50:
+            self.stdout.write(self.style.WARNING(f'...共 {len(unresolved)} 个未识别地点'))
+        self.stdout.write(self.style.SUCCESS('迁移完成！'))
@@ -0,0 +1,493 @@
+"""
+地图数据（GeoJSON）的本地持久化存储
+
+按行政区划代码（adcode）把上游返回的 GeoJSON 保存到 settings.MAP_DATA_DIR：
+  {adcode}.json       编码后的GeoJSON字节（紧凑格式）
+  {adcode}.meta.json  元数据：获取时间、数据来源、上游的 ETag / Last-Modified
+文件先写临时文件再替换，重启后依然可用，所有 worker 进程共享。
+
+读取策略（stale-while-revalidate）：
+  1. 本地有数据时直接返回；超过 settings.MAP_DATA_MAX_AGE 的数据照常返回，同时在后台线程刷新
+  2. 本地没有数据时（某个代码第一次被请求）才同步请求上游
+  3. 上游失败时继续使用本地的旧数据
+因此一个代码获取过一次之后，地图请求不会再等待网络。
+
+请求上游（fetch_map_data）：
+  数据源在 settings.MAP_DATA_SOURCES 中配置，按优先级对冲请求：先请求第一个数据源，
+  MAP_DATA_HEDGE_DELAY 秒内没有结果或请求失败时再并发请求下一个，最先返回有效GeoJSON的数据源胜出，
+  其余未开始的请求取消。整个过程不超过 MAP_DATA_TIMEOUT 秒，而不是各数据源超时时间之和。
+  所有请求共用一个带连接池的 requests.Session（保持长连接）；刷新时对上次的数据源带上
+  If-None-Match / If-Modified-Since，上游返回304时只更新获取时间。
+
+上游故障保护：
+  每个数据源一个熔断器（SourceHealth）：连续失败 MAP_DATA_BREAKER_THRESHOLD 次后断开，
+  MAP_DATA_BREAKER_COOLDOWN 秒内不再请求；之后进入半开状态，只放行一个试探请求，成功则恢复，失败则重新断开。
+  所有数据源都获取失败的代码记入负缓存 MAP_DATA_NEGATIVE_TTL 秒，期间直接返回失败（或本地旧数据），不再请求上游。
+  各数据源的请求数、成功率和平均耗时见 source_stats()。
+
+显示级别：
+  ?detail= 为 low / medium / high 时返回简化后的边界（见geosimplify.py），可选输出 TopoJSON。
+  处理结果同样保存为文件（{adcode}.{级别}.json / {adcode}.{级别}.topo.json），原始数据更新后重新生成。
+
+预压缩：
+  每个数据文件写入时同时生成 .gz（以及安装了 brotli 包时的 .br）压缩文件，
+  视图按请求的 Accept-Encoding 直接返回对应的文件（FileResponse，可使用 sendfile），
+  请求时不再编码JSON、不再压缩，worker 进程也不在内存中保存地图数据。
+"""
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import brotli
+except ImportError:  # brotli 是可选依赖，未安装时只提供gzip
+    brotli = None
+
+from .geosimplify import FULL_DETAIL, simplify_geojson, to_topojson
+from .payloads import render_json
+
+logger = logging.getLogger(__name__)
+
+# 行政区划代码：6位数字（100000为全国）
+ADCODE_RE = re.compile(r'^\d{6}$')
+CHINA_ADCODE = '100000'
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+}
+# 同时进行的上游请求数上限（也是连接池大小）
+MAX_CONCURRENT_FETCHES = 8
+
+
+NEGATIVE_CACHE_KEY = 'map_data_failed:{code}'
+
+# 预压缩格式：Content-Encoding -> (文件后缀, 压缩函数)，按优先级排序
+PRECOMPRESSED = {}
+if brotli is not None:
+    PRECOMPRESSED['br'] = ('.br', lambda body: brotli.compress(body, quality=9))
+PRECOMPRESSED['gzip'] = ('.gz', lambda body: gzip.compress(body, compresslevel=9, mtime=0))
+
+# 输出格式 -> 处理结果的文件后缀（{级别}为显示级别）
+OUTPUT_FORMATS = {
+    'geojson': '.{detail}.json',
+    'topojson': '.{detail}.topo.json',
+}
+
+
+def map_data_sources(code):
+    """数据源列表 [(URL模板, URL)]（按优先级排序），中国地图和省份地图分别配置"""
+    sources = settings.MAP_DATA_SOURCES['china' if code == CHINA_ADCODE else 'province']
+    return [(template, template.format(code=code)) for template in sources]
+
+
+def is_geojson(data):
+    """验证数据格式"""
+    return isinstance(data, dict) and ('features' in data or 'type' in data)
+
+
+class MapDataStore:
+    """按行政区划代码保存GeoJSON的目录"""
+
+    def __init__(self, directory, max_age):
+        self.directory = directory
+        self.max_age = max_age
+
+    def path(self, code, suffix='.json'):
+        # code 已由调用方校验为6位数字，不会跳出目录
+        return os.path.join(self.directory, f'{code}{suffix}')
+
+    def read(self, code):
+        """返回 (GeoJSON字节, 元数据)，没有数据时返回 (None, None)"""
+        try:
+            with open(self.path(code), 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None, None
+        return body, self._read_meta(code)
+
+    def read_meta(self, code):
+        """只读取元数据，没有数据时返回None"""
+        if not os.path.exists(self.path(code)):
+            return None
+        return self._read_meta(code)
+
+    def _read_meta(self, code):
+        try:
+            with open(self.path(code, '.meta.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # 元数据丢失时视为已过期，下次读取时刷新
+            return {'fetched_at': 0}
+
+    def write(self, code, body, meta):
+        os.makedirs(self.directory, exist_ok=True)
+        # 先写数据再写元数据，元数据中的获取时间始终不晚于数据
+        self._write_data(self.path(code), body)
+        self.write_meta(code, meta)
+
+    def write_meta(self, code, meta):
+        self._replace(self.path(code, '.meta.json'), json.dumps(meta).encode('utf-8'))
+
+    def is_derived_fresh(self, code, suffix):
+        """由原始数据生成的文件是否存在且不早于原始数据"""
+        try:
+            return os.path.getmtime(self.path(code, suffix)) >= os.path.getmtime(self.path(code))
+        except FileNotFoundError:
+            return False
+
+    def write_derived(self, code, suffix, body):
+        self._write_data(self.path(code, suffix), body)
+
+    def _write_data(self, path, body):
+        # 先写压缩文件再替换原文件：看到新原文件的请求，拿到的压缩文件也是新的
+        for extension, compress in PRECOMPRESSED.values():
+            self._replace(path + extension, compress(body))
+        self._replace(path, body)
+
+    def _replace(self, path, content):
+        # 先写临时文件再替换，其他进程不会读到写了一半的文件
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def is_stale(self, meta):
+        return time.time() - meta.get('fetched_at', 0) > self.max_age
+
+
+def get_store():
+    return MapDataStore(settings.MAP_DATA_DIR, settings.MAP_DATA_MAX_AGE)
+
+
+class SourceHealth:
+    """
+    一个数据源的熔断器和统计
+        closed:     正常请求
+        open:       连续失败达到阈值后断开，冷却期内拒绝请求
+        half_open:  冷却期结束后只放行一个试探请求
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0
+        self.counts = dict.fromkeys(('requests', 'successes', 'not_modified', 'failures', 'invalid', 'rejected'), 0)
+        self.total_seconds = 0.0
+
+    def allow(self):
+        """是否可以请求该数据源"""
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= settings.MAP_DATA_BREAKER_COOLDOWN:
+                # 冷却期结束，放行一个试探请求
+                self.state = self.HALF_OPEN
+                return True
+            if self.state != self.CLOSED:
+                self.counts['rejected'] += 1
+                return False
+            return True
+
+    def release(self):
+        """放行的试探请求没有发出（轮到它之前已经有结果而被取消）：恢复断开状态，下次请求时重新试探"""
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record(self, outcome, seconds):
+        """
+        记录一次请求结果：successes / not_modified / invalid（数据源正常但没有可用数据）/ failures（网络错误或5xx）
+        只有 failures 计入熔断
+        """
+        with self.lock:
+            self.counts['requests'] += 1
+            self.counts[outcome] += 1
+            self.total_seconds += seconds
+            if outcome != 'failures':
+                self.state = self.CLOSED
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= settings.MAP_DATA_BREAKER_THRESHOLD:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self.lock:
+            requests_count = self.counts['requests']
+            ok = self.counts['successes'] + self.counts['not_modified']
+            return dict(
+                self.counts,
+                state=self.state,
+                consecutive_failures=self.consecutive_failures,
+                success_rate=round(ok / requests_count, 4) if requests_count else None,
+                avg_seconds=round(self.total_seconds / requests_count, 4) if requests_count else None,
+            )
+
+
+# 数据源URL模板 -> SourceHealth（进程内）
+_source_health = {}
+_source_health_lock = threading.Lock()
+
+
+def source_health(template):
+    with _source_health_lock:
+        health = _source_health.get(template)
+        if health is None:
+            health = _source_health[template] = SourceHealth()
+        return health
+
+
+def source_stats():
+    """各数据源的熔断状态和请求统计（当前进程）"""
+    with _source_health_lock:
+        items = list(_source_health.items())
+    return {template: health.stats() for template, health in items}
+
+
+_session = None
+_executor = None
+_client_lock = threading.Lock()
+
+
+def _client():
+    """进程内共用的 (Session, 线程池)，第一次使用时创建"""
+    global _session, _executor
+    if _session is None:
+        with _client_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENT_FETCHES)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update(REQUEST_HEADERS)
+                _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_FETCHES, thread_name_prefix='map-data-fetch')
+                _session = session
+    return _session, _executor
+
+
+def _fetch_source(session, template, source_url, meta, timeout):
+    """
+    请求一个数据源，返回 (GeoJSON字节, 元数据)；上游返回304时GeoJSON字节为None；数据无效或请求失败时返回None
+    请求结果记入该数据源的熔断器和统计
+    """
+    health = source_health(template)
+    start = time.monotonic()
+    outcome, result = _request_source(session, source_url, meta, timeout)
+    health.record(outcome, time.monotonic() - start)
+    return result
+
+
+def _request_source(session, source_url, meta, timeout):
+    """返回 (结果类型, 结果)，结果类型见 SourceHealth.record"""
+    headers = {}
+    # 条件请求的校验值只对产生本地数据的数据源有效
+    if meta and meta.get('source') == source_url:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    try:
+        response = session.get(source_url, timeout=timeout, headers=headers)
+    except requests.exceptions.RequestException:
+        return 'failures', None
+    if response.status_code == 304 and headers:
+        return 'not_modified', (None, dict(meta, fetched_at=time.time()))
+    if response.status_code >= 500:
+        return 'failures', None
+    if response.status_code != 200:
+        return 'invalid', None
+    try:
+        data = response.json()
+    except ValueError:
+        # 不是JSON（可能是JS文件）
+        return 'invalid', None
+    if not is_geojson(data):
+        return 'invalid', None
+    return 'successes', (render_json(data), {
+        'fetched_at': time.time(),
+        'source': source_url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    })
+
+
+def fetch_map_data(code, meta=None):
+    """
+    对冲请求各数据源，返回 (GeoJSON字节, 元数据)，全部失败或超时返回None
+    传入本地数据的元数据时使用条件请求，上游返回304时GeoJSON字节为None
+    """
+    session, executor = _client()
+    # 熔断器在真正要请求某个数据源时才检查：allow() 会把冷却期结束的数据源转为半开并占用唯一的试探机会，
+    # 提前对没有轮到的数据源调用会使它一直停留在半开状态
+    sources = list(map_data_sources(code))
+    hedge_delay = settings.MAP_DATA_HEDGE_DELAY
+    deadline = time.monotonic() + settings.MAP_DATA_TIMEOUT
+    pending = {}  # Future -> 数据源的 SourceHealth
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            # 上一个数据源超过对冲间隔仍没有结果，或已经失败时，开始请求下一个（跳过熔断中的数据源）
+            while sources:
+                template, url = sources.pop(0)
+                health = source_health(template)
+                if health.allow():
+                    pending[executor.submit(_fetch_source, session, template, url, meta, remaining)] = health
+                    break
+            if not pending:
+                return None
+            done, _ = wait(
+                pending,
+                timeout=min(remaining, hedge_delay) if sources else remaining,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                del pending[future]
+                result = future.result()
+                if result is not None:
+                    return result
+    finally:
+        # 取消还没开始的请求（占用的试探机会归还给熔断器）；已经开始的请求不再等待，结果丢弃
+        for future, health in pending.items():
+            if future.cancel():
+                health.release()
+
+
+# 正在刷新的代码及其锁：同一进程内同一个代码同时只有一个请求访问上游
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+
+
+def _refresh_lock(code):
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(code, threading.Lock())
+
+
+def refresh_map_data(code, store=None):
+    """
+    从上游获取并保存地图数据，返回最新的GeoJSON字节；上游失败时返回本地的旧数据（没有时返回None）
+    """
+    store = store or get_store()
+    with _refresh_lock(code):
+        body, meta = store.read(code)
+        # 等待锁期间其他线程已经刷新过
+        if body is not None and not store.is_stale(meta):
+            return body
+        result = fetch_map_data(code, meta if body is not None else None)
+        if result is None:
+            logger.warning('地图数据 %s 所有数据源都不可用%s', code, '，继续使用本地旧数据' if body else '')
+            # 短时间内不再请求上游，避免上游故障时每次点击地图都占用 worker 等待超时
+            cache.set(NEGATIVE_CACHE_KEY.format(code=code), True, settings.MAP_DATA_NEGATIVE_TTL)
+            return body
+        cache.delete(NEGATIVE_CACHE_KEY.format(code=code))
+        new_body, meta = result
+        if new_body is None:
+            # 上游数据没有变化，只更新获取时间
+            store.write_meta(code, meta)
+            return body
+        store.write(code, new_body, meta)
+        return new_body
+
+
+def _refresh_in_background(code, store):
+    lock = _refresh_lock(code)
+    if lock.locked():
+        # 已经在刷新
+        return
+
+    def run():
+        try:
+            refresh_map_data(code, store)
+        except Exception:
+            logger.exception('后台刷新地图数据 %s 失败', code)
+
+    threading.Thread(target=run, name=f'map-data-refresh-{code}', daemon=True).start()
+
+
+def get_map_file(code, detail=FULL_DETAIL, output='geojson'):
+    """
+    获取地图数据文件的路径（未压缩的JSON，压缩文件见 open_map_file），
+    所有数据源都不可用且本地没有数据时返回None
+        detail:  显示级别，full 为原始数据，其余见 geosimplify.DETAIL_LEVELS
+        output:  geojson 或 topojson
+    """
+    store = get_store()
+    if not _ensure_source_data(code, store):
+        return None
+    if detail == FULL_DETAIL and output == 'geojson':
+        return store.path(code)
+    suffix = OUTPUT_FORMATS[output].format(detail=detail)
+    if not store.is_derived_fresh(code, suffix):
+        # 第一次请求该级别，或原始数据已更新：重新处理并保存
+        body, _ = store.read(code)
+        data = json.loads(body)
+        if output == 'topojson':
+            derived = render_json(to_topojson(data, detail))
+        else:
+            derived = render_json(simplify_geojson(data, detail))
+        store.write_derived(code, suffix, derived)
+    return store.path(code, suffix)
+
+
+def _ensure_source_data(code, store):
+    """
+    确保本地有原始数据，返回是否有数据
+    本地数据过期时照常使用，同时在后台刷新
+    """
+    meta = store.read_meta(code)
+    # 最近获取失败过的代码（负缓存）不请求上游
+    recently_failed = cache.get(NEGATIVE_CACHE_KEY.format(code=code))
+    if meta is None:
+        # 第一次请求这个代码，只能同步获取
+        return not recently_failed and refresh_map_data(code, store) is not None
+    if store.is_stale(meta) and not recently_failed:
+        _refresh_in_background(code, store)
+    return True
+
+
+def _accepted_encodings(accept_encoding):
+    """解析 Accept-Encoding，返回可接受的编码集合（q=0 的除外）"""
+    accepted, rejected = set(), set()
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    pass
+        (accepted if q > 0 else rejected).add(coding)
+    if '*' in accepted:
+        accepted.update(coding for coding in PRECOMPRESSED if coding not in rejected)
+    return accepted
+
+
+def open_map_file(path, accept_encoding):
+    """
+    按 Accept-Encoding 打开最合适的预压缩文件，返回 (文件对象, Content-Encoding)，
+    客户端不接受压缩或压缩文件不存在时返回未压缩的文件和None
+    """
+    accepted = _accepted_encodings(accept_encoding)
+    for coding, (extension, _) in PRECOMPRESSED.items():
+        if coding in accepted:
+            try:
+                return open(path + extension, 'rb'), coding
+            except FileNotFoundError:
+                continue
+    return open(path, 'rb'), None
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marathon', '0011_marathonregistration_city_obj_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marathon',
+            name='finish_seconds',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='完赛时间（秒）'),
+        ),
+        migrations.AddField(
+            model_name='marathon',
+            name='pace_seconds',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='配速（秒/公里）'),
+        ),
+        migrations.AddIndex(
+            model_name='marathon',
+            index=models.Index(fields=['pace_seconds'], name='marathon_ma_pace_se_52a08f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marathon',
+            index=models.Index(fields=['finish_seconds'], name='marathon_ma_finish__c45e6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='marathon',
+            index=models.Index(fields=['event_type', 'finish_seconds'], name='marathon_ma_event_t_4310fc_idx'),
+        ),
+    ]
@@ -1,5 +1,10 @@
 from django.db import models
 from django.core.exceptions import ValidationError
+from .utils import parse_pace_seconds, parse_duration_seconds
+from .regions import (
+    sync_region_fields, normalize_province_name, normalize_city_name, normalize_district_name,
+)
+from .geocoder import fill_region_from_location
 
 """地区数据模型"""
 class Province(models.Model):
@@ -116,6 +121,9 @@ class Marathon(models.Model):
     event_type = models.CharField(max_length=10, choices=EVENT_TYPE_CHOICES, verbose_name="赛事类型", default='full')
     finish_time = models.CharField(max_length=20, verbose_name="完赛时间")
     pace = models.CharField(max_length=20, verbose_name="配速")
+    # 由finish_time和pace解析得到的秒数，保存时自动计算，用于排序和聚合统计
+    finish_seconds = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="完赛时间（秒）")
+    pace_seconds = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="配速（秒/公里）")
     certificate = models.ImageField(upload_to='marathon/certificates/', blank=True, null=True, verbose_name="完赛证书")
     description = models.TextField(blank=True, verbose_name="赛事描述")
     event_log = models.TextField(blank=True, verbose_name="赛事日志(Markdown格式)")
@@ -123,97 +131,16 @@ class Marathon(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
     
     def normalize_province_name(self, province):
-        """标准化省份名称：转换为地图数据需要的完整格式"""
-        if not province:
-            return province
-        
-        # 地图数据中使用的完整格式名称列表
-        full_format_provinces = [
-            '北京市', '天津市', '上海市', '重庆市',
-            '河北省', '山西省', '辽宁省', '吉林省', '黑龙江省',
-            '江苏省', '浙江省', '安徽省', '福建省', '江西省', '山东省',
-            '河南省', '湖北省', '湖南省', '广东省', '广西壮族自治区', '海南省',
-            '四川省', '贵州省', '云南省', '西藏自治区', '陕西省', '甘肃省',
-            '青海省', '宁夏回族自治区', '新疆维吾尔自治区', '内蒙古自治区',
-            '香港特别行政区', '澳门特别行政区', '台湾省'
-        ]
-        
-        # 如果已经是完整格式，直接返回
-        if province in full_format_provinces:
-            return province
-        
-        # 映射：简化格式 -> 完整格式（地图数据需要的格式）
-        province_map = {
-            '北京': '北京市',
-            '天津': '天津市',
-            '上海': '上海市',
-            '重庆': '重庆市',
-            '河北': '河北省',
-            '山西': '山西省',
-            '辽宁': '辽宁省',
-            '吉林': '吉林省',
-            '黑龙江': '黑龙江省',
-            '江苏': '江苏省',
-            '浙江': '浙江省',
-            '安徽': '安徽省',
-            '福建': '福建省',
-            '江西': '江西省',
-            '山东': '山东省',
-            '河南': '河南省',
-            '湖北': '湖北省',
-            '湖南': '湖南省',
-            '广东': '广东省',
-            '广西': '广西壮族自治区',
-            '海南': '海南省',
-            '四川': '四川省',
-            '贵州': '贵州省',
-            '云南': '云南省',
-            '西藏': '西藏自治区',
-            '陕西': '陕西省',
-            '甘肃': '甘肃省',
-            '青海': '青海省',
-            '宁夏': '宁夏回族自治区',
-            '新疆': '新疆维吾尔自治区',
-            '内蒙古': '内蒙古自治区',
-            '香港': '香港特别行政区',
-            '澳门': '澳门特别行政区',
-            '台湾': '台湾省',
-        }
-        
-        # 如果在映射表中，返回完整格式
-        if province in province_map:
-            return province_map[province]
-        
-        # 如果不在映射表中，尝试添加后缀
-        if not province.endswith(('省', '市', '自治区', '特别行政区')):
-            if province in ['北京', '天津', '上海', '重庆']:
-                return province + '市'
-            else:
-                return province + '省'
-        
-        return province
+        """标准化省份名称：转换为地图数据需要的完整格式（规则见regions.py）"""
+        return normalize_province_name(province)
     
     def normalize_city_name(self, city):
         """标准化城市名称：保持完整格式（地图数据通常使用完整格式，如"成都市"）"""
-        # 地图数据中的城市名称通常是完整格式，所以保持原样
-        if not city:
-            return city
-        # 如果已经有后缀，直接返回
-        if city.endswith(('市', '县', '区', '自治州', '盟', '地区', '自治县')):
-            return city
-        # 保持原样，不自动添加后缀（需要在输入时限制格式）
-        return city
+        return normalize_city_name(city)
     
     def normalize_district_name(self, district):
         """标准化区县名称：保持完整格式（地图数据通常使用完整格式）"""
-        # 地图数据中的区县名称通常是完整格式，所以保持原样
-        if not district:
-            return district
-        # 如果已经有后缀，直接返回
-        if district.endswith(('区', '县', '市', '自治县', '自治旗')):
-            return district
-        # 保持原样，不自动添加后缀
-        return district
+        return normalize_district_name(district)
 
     def save(self, *args, **kwargs):
         """保存时自动同步外键字段和字符串字段，并标准化为地图需要的格式"""
@@ -225,39 +152,24 @@ class Marathon(models.Model):
         if self.district:
             self.district = self.normalize_district_name(self.district)
         
-        # 3. 字符串字段 → 外键字段：当字符串字段有值时，查找并更新外键字段
-        # 更新省份外键
-        if self.province:
-            try:
-                province_obj = Province.objects.get(name=self.province)
-                self.province_obj = province_obj
-            except Province.DoesNotExist:
-                # 如果找不到匹配的省份，不更新外键
-                pass
-        # 更新城市外键
-        if self.city and self.province_obj:
-            try:
-                city_obj = City.objects.get(name=self.city, province=self.province_obj)
-                self.city_obj = city_obj
-            except City.DoesNotExist:
-                # 如果找不到匹配的城市，不更新外键
-                pass
-        # 更新区县外键
-        if self.district and self.city_obj:
-            try:
-                district_obj = District.objects.get(name=self.district, city=self.city_obj)
-                self.district_obj = district_obj
-            except District.DoesNotExist:
-                # 如果找不到匹配的区县，不更新外键
-                pass
+        # 2. 没有填写地区时根据赛事地点文本识别省市区（见geocoder.py）
+        fill_region_from_location(self)
+        
+        # 3. 同步字符串字段和外键字段：使用进程内的地区索引，不逐个查询地区表（见regions.py）
+        sync_region_fields(self)
         
-        # 2. 外键字段 → 字符串字段：如果字符串字段为空，但有外键对象，则使用外键对象的名称
-        if not self.province and self.province_obj:
-            self.province = self.normalize_province_name(self.province_obj.name)
-        if not self.city and self.city_obj:
-            self.city = self.normalize_city_name(self.city_obj.name)
-        if not self.district and self.district_obj:
-            self.district = self.normalize_district_name(self.district_obj.name)
+        # 4. 解析完赛时间和配速为秒数
+        self.finish_seconds = parse_duration_seconds(self.finish_time)
+        self.pace_seconds = parse_pace_seconds(self.pace)
+        # 只更新部分字段时，同步更新对应的秒数字段
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'finish_time' in update_fields:
+                update_fields.add('finish_seconds')
+            if 'pace' in update_fields:
+                update_fields.add('pace_seconds')
+            kwargs['update_fields'] = update_fields
         
         super().save(*args, **kwargs)
     
@@ -273,6 +185,9 @@ class Marathon(models.Model):
             models.Index(fields=['city_obj']),  # 按城市索引
             models.Index(fields=['district_obj']),  # 按区县索引
             models.Index(fields=['event_date', 'event_type']),  # 组合索引：日期和类型
+            models.Index(fields=['pace_seconds']),  # 按配速排序
+            models.Index(fields=['finish_seconds']),  # 按完赛时间排序
+            models.Index(fields=['event_type', 'finish_seconds']),  # 组合索引：各类型的最好成绩
         ]
 
 """马拉松报名赛事模型"""
@@ -334,95 +249,16 @@ class MarathonRegistration(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
     
     def normalize_province_name(self, province):
-        """标准化省份名称：转换为地图数据需要的完整格式"""
-        if not province:
-            return province
-        
-        # 地图数据中使用的完整格式名称列表
-        full_format_provinces = [
-            '北京市', '天津市', '上海市', '重庆市',
-            '河北省', '山西省', '辽宁省', '吉林省', '黑龙江省',
-            '江苏省', '浙江省', '安徽省', '福建省', '江西省', '山东省',
-            '河南省', '湖北省', '湖南省', '广东省', '广西壮族自治区', '海南省',
-            '四川省', '贵州省', '云南省', '西藏自治区', '陕西省', '甘肃省',
-            '青海省', '宁夏回族自治区', '新疆维吾尔自治区', '内蒙古自治区',
-            '香港特别行政区', '澳门特别行政区', '台湾省'
-        ]
-        
-        # 如果已经是完整格式，直接返回
-        if province in full_format_provinces:
-            return province
-        
-        # 映射：简化格式 -> 完整格式（地图数据需要的格式）
-        province_map = {
-            '北京': '北京市',
-            '天津': '天津市',
-            '上海': '上海市',
-            '重庆': '重庆市',
-            '河北': '河北省',
-            '山西': '山西省',
-            '辽宁': '辽宁省',
-            '吉林': '吉林省',
-            '黑龙江': '黑龙江省',
-            '江苏': '江苏省',
-            '浙江': '浙江省',
-            '安徽': '安徽省',
-            '福建': '福建省',
-            '江西': '江西省',
-            '山东': '山东省',
-            '河南': '河南省',
-            '湖北': '湖北省',
-            '湖南': '湖南省',
-            '广东': '广东省',
-            '广西': '广西壮族自治区',
-            '海南': '海南省',
-            '四川': '四川省',
-            '贵州': '贵州省',
-            '云南': '云南省',
-            '西藏': '西藏自治区',
-            '陕西': '陕西省',
-            '甘肃': '甘肃省',
-            '青海': '青海省',
-            '宁夏': '宁夏回族自治区',
-            '新疆': '新疆维吾尔自治区',
-            '内蒙古': '内蒙古自治区',
-            '香港': '香港特别行政区',
-            '澳门': '澳门特别行政区',
-            '台湾': '台湾省',
-        }
-        
-        # 如果在映射表中，返回完整格式
-        if province in province_map:
-            return province_map[province]
-        
-        # 如果不在映射表中，尝试添加后缀
-        if not province.endswith(('省', '市', '自治区', '特别行政区')):
-            if province in ['北京', '天津', '上海', '重庆']:
-                return province + '市'
-            else:
-                return province + '省'
-        
-        return province
+        """标准化省份名称：转换为地图数据需要的完整格式（规则见regions.py）"""
+        return normalize_province_name(province)
     
     def normalize_city_name(self, city):
         """标准化城市名称：保持完整格式（地图数据通常使用完整格式，如"成都市"）"""
-        if not city:
-            return city
-        # 如果已经有后缀，直接返回
-        if city.endswith(('市', '县', '区', '自治州', '盟', '地区', '自治县')):
-            return city
-        # 保持原样，不自动添加后缀（需要在输入时限制格式）
-        return city
+        return normalize_city_name(city)
     
     def normalize_district_name(self, district):
         """标准化区县名称：保持完整格式（地图数据通常使用完整格式）"""
-        if not district:
-            return district
-        # 如果已经有后缀，直接返回
-        if district.endswith(('区', '县', '市', '自治县', '自治旗')):
-            return district
-        # 保持原样，不自动添加后缀
-        return district
+        return normalize_district_name(district)
 
     def save(self, *args, **kwargs):
         """保存时自动同步外键字段和字符串字段，并标准化为地图需要的格式"""
@@ -434,39 +270,11 @@ class MarathonRegistration(models.Model):
         if self.district:
             self.district = self.normalize_district_name(self.district)
         
-        # 3. 字符串字段 → 外键字段：当字符串字段有值时，查找并更新外键字段
-        # 更新省份外键
-        if self.province:
-            try:
-                province_obj = Province.objects.get(name=self.province)
-                self.province_obj = province_obj
-            except Province.DoesNotExist:
-                # 如果找不到匹配的省份，不更新外键
-                pass
-        # 更新城市外键
-        if self.city and self.province_obj:
-            try:
-                city_obj = City.objects.get(name=self.city, province=self.province_obj)
-                self.city_obj = city_obj
-            except City.DoesNotExist:
-                # 如果找不到匹配的城市，不更新外键
-                pass
-        # 更新区县外键
-        if self.district and self.city_obj:
-            try:
-                district_obj = District.objects.get(name=self.district, city=self.city_obj)
-                self.district_obj = district_obj
-            except District.DoesNotExist:
-                # 如果找不到匹配的区县，不更新外键
-                pass
+        # 2. 没有填写地区时根据赛事地点文本识别省市区（见geocoder.py）
+        fill_region_from_location(self)
         
-        # 2. 外键字段 → 字符串字段：如果字符串字段为空，但有外键对象，则使用外键对象的名称
-        if not self.province and self.province_obj:
-            self.province = self.normalize_province_name(self.province_obj.name)
-        if not self.city and self.city_obj:
-            self.city = self.normalize_city_name(self.city_obj.name)
-        if not self.district and self.district_obj:
-            self.district = self.normalize_district_name(self.district_obj.name)
+        # 3. 同步字符串字段和外键字段：使用进程内的地区索引，不逐个查询地区表（见regions.py）
+        sync_region_fields(self)
         
         super().save(*args, **kwargs)
     
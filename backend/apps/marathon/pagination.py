@@ -0,0 +1,16 @@
+"""马拉松应用的分页类"""
+from apps.common.pagination import KeysetPagination
+
+
+class MarathonCursorPagination(KeysetPagination):
+    """赛事列表游标分页：按 (event_date, id) 倒序，使用event_date索引"""
+    ordering = ('-event_date', '-id')
+    ordering_fields = ('event_date', 'created_at', 'pace_seconds', 'finish_seconds', 'id')
+    # 可为空的排序字段：没有成绩的赛事按这些字段排序时排在最后
+    nullable_ordering_fields = ('pace_seconds', 'finish_seconds')
+
+
+class RegistrationCursorPagination(KeysetPagination):
+    """报名赛事列表游标分页：按 (event_date, id) 升序，使用event_date索引"""
+    ordering = ('event_date', 'id')
+    ordering_fields = ('event_date', 'created_at', 'id')
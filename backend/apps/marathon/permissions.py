@@ -19,3 +19,10 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         
         # 写入操作需要检查session中的is_admin
         return request.session.get('is_admin', False)
+
+
+class IsAdmin(permissions.BasePermission):
+    """所有操作都需要管理员登录（检查session中的is_admin），用于运维类接口"""
+
+    def has_permission(self, request, view):
+        return request.session.get('is_admin', False)
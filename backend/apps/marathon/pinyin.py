@@ -0,0 +1,79 @@
+"""
+汉字拼音首字母（用于地区名称的拼音首字母检索，如"浦东" -> "pd"）
+
+GB2312一级汉字按拼音排序，编码落在哪个区间就对应哪个首字母；
+二级汉字按部首排序，地名中用到的二级汉字单独列出。多音字按地名中的读音在 PLACE_NAME_INITIALS 中修正。
+不依赖第三方拼音库，找不到首字母的字符返回None。
+"""
+from bisect import bisect_right
+
+# GB2312一级汉字（0xB0A1 - 0xD7F9）各首字母的起始编码
+_GB2312_STARTS = (
+    0xB0A1, 0xB0C5, 0xB2C1, 0xB4EE, 0xB6EA, 0xB7A2, 0xB8C1, 0xB9FE, 0xBBF7,
+    0xBFA6, 0xC0AC, 0xC2E8, 0xC4C3, 0xC5B6, 0xC5BE, 0xC6DA, 0xC8BB, 0xC8F6,
+    0xCBFA, 0xCDDA, 0xCEF4, 0xD1B9, 0xD4D1,
+)
+_GB2312_LETTERS = 'abcdefghjklmnopqrstwxyz'
+_GB2312_END = 0xD7F9
+
+# 地名中常见的GB2312二级汉字及GB2312以外的汉字
+RARE_CHAR_INITIALS = {
+    '亳': 'b', '仡': 'g', '仫': 'm', '佤': 'w', '偃': 'y', '儋': 'd', '兖': 'y', '圩': 'x', '圳': 'z',
+    '坂': 'b', '坻': 'd', '埇': 'y', '妃': 'f', '婺': 'w', '宕': 'd', '岐': 'q', '岑': 'c', '岚': 'l',
+    '岢': 'k', '岫': 'x', '岱': 'd', '岷': 'm', '峄': 'y', '峒': 't', '崂': 'l', '崃': 'l', '崆': 'k',
+    '嵊': 's', '嵩': 's', '庵': 'a', '弋': 'y', '攸': 'y', '旌': 'j', '晖': 'h', '暨': 'j', '朐': 'q',
+    '杞': 'q', '枞': 'z', '柘': 'z', '栾': 'l', '桦': 'h', '梓': 'z', '棣': 'd', '榕': 'r', '歙': 's',
+    '汨': 'm', '汶': 'w', '沅': 'y', '沐': 'm', '沭': 's', '泗': 's', '泸': 'l', '泾': 'j', '洮': 't',
+    '浈': 'z', '浉': 's', '浏': 'l', '浔': 'x', '浠': 'x', '涞': 'l', '涿': 'z', '淅': 'x', '淇': 'q',
+    '淞': 's', '渌': 'l', '渑': 'm', '湄': 'm', '湟': 'h', '溆': 'x', '溧': 'l', '滕': 't', '漯': 'l',
+    '潢': 'h', '潼': 't', '澧': 'l', '濂': 'l', '濉': 's', '濠': 'h', '濮': 'p', '瀍': 'c', '灞': 'b',
+    '犍': 'q', '猇': 'x', '猗': 'y', '珙': 'g', '琊': 'y', '璧': 'b', '瓯': 'o', '畲': 's', '盱': 'x',
+    '眙': 'y', '睢': 's', '砀': 'd', '硚': 'q', '碚': 'b', '磴': 'd', '祜': 'h', '禅': 'c', '禺': 'y',
+    '秭': 'z', '稷': 'j', '筠': 'j', '綦': 'q', '绛': 'j', '缙': 'j', '罘': 'f', '耒': 'l', '芗': 'x',
+    '芙': 'f', '芮': 'r', '芷': 'z', '茌': 'c', '荥': 'x', '莒': 'j', '莘': 's', '莞': 'g', '蒗': 'l',
+    '蓥': 'y', '蔺': 'l', '蕲': 'q', '藁': 'g', '蛟': 'j', '蠡': 'l', '衢': 'q', '覃': 't', '讷': 'n',
+    '诏': 'z', '谯': 'q', '赉': 'l', '迦': 'j', '邕': 'y', '邗': 'h', '邛': 'q', '邡': 'f', '邳': 'p',
+    '邺': 'y', '郏': 'j', '郓': 'y', '郫': 'p', '郯': 't', '郾': 'y', '鄄': 'j', '鄞': 'y', '鄠': 'h',
+    '鄢': 'y', '鄯': 's', '鄱': 'p', '醴': 'l', '闵': 'm', '阆': 'l', '阡': 'q', '陂': 'p', '陉': 'x',
+    '陟': 'z', '隰': 'x', '颍': 'y', '驿': 'y', '骅': 'h', '鲅': 'b', '鸠': 'j', '麒': 'q', '麟': 'l',
+    '黟': 'y',
+}
+
+# 多音字在地名中的读音与GB2312排序位置不一致时，按地名前缀修正
+PLACE_NAME_INITIALS = {
+    '重庆': 'cq', '单县': 'sx', '番禺': 'py', '铅山': 'ys', '涡阳': 'gy', '蔚县': 'yx',
+    '乐清': 'yq', '东阿': 'de', '洪洞': 'ht',
+}
+
+
+def char_initial(char):
+    """单个字符的拼音首字母（字母和数字原样返回小写），找不到时返回None"""
+    if char.isascii():
+        return char.lower() if char.isalnum() else None
+    if char in RARE_CHAR_INITIALS:
+        return RARE_CHAR_INITIALS[char]
+    try:
+        encoded = char.encode('gb2312')
+    except UnicodeEncodeError:
+        return None
+    if len(encoded) != 2:
+        return None
+    code = encoded[0] << 8 | encoded[1]
+    if not _GB2312_STARTS[0] <= code <= _GB2312_END:
+        return None
+    return _GB2312_LETTERS[bisect_right(_GB2312_STARTS, code) - 1]
+
+
+def initials(text):
+    """整个字符串的拼音首字母，如"浦东新区" -> "pdxq"；有字符找不到首字母时返回None"""
+    for prefix, prefix_initials in PLACE_NAME_INITIALS.items():
+        if text.startswith(prefix):
+            rest = initials(text[len(prefix):])
+            return None if rest is None else prefix_initials + rest
+    letters = []
+    for char in text:
+        letter = char_initial(char)
+        if letter is None:
+            return None
+        letters.append(letter)
+    return ''.join(letters)
@@ -0,0 +1,150 @@
+"""
+全国省市区数据集的加载
+数据集以压缩JSON文件随代码发布（data/regions.json.gz），按行政区划代码组织：
+    {
+        "provinces": [[代码, 名称], ...],
+        "cities":    [[代码, 名称, 省份代码], ...],
+        "districts": [[代码, 名称, 城市代码], ...]
+    }
+行政区划调整时提供同样格式的差异文件，另外可以包含：
+    "recode": {"districts": {"旧代码": "新代码"}}   代码变更：只改代码，保留原记录（赛事的地区外键不受影响）
+    "remove": {"districts": ["代码", ...]}          撤销的行政区划
+加载时每一级只做几次批量查询和写入（bulk_create / bulk_update），全部在一个事务中完成
+"""
+import gzip
+import json
+from pathlib import Path
+
+from django.db import transaction
+
+from .models import Province, City, District
+from .regions import invalidate_region_index
+
+# 随代码发布的完整数据集
+DEFAULT_DATASET = Path(__file__).resolve().parent / 'data' / 'regions.json.gz'
+
+# 级别 -> (模型, 上级级别, 上级外键字段)，按从上到下的顺序处理
+LEVELS = {
+    'provinces': (Province, None, None),
+    'cities': (City, 'provinces', 'province'),
+    'districts': (District, 'cities', 'city'),
+}
+
+LEVEL_NAMES = {'provinces': '省份', 'cities': '城市', 'districts': '区县'}
+
+
+def read_dataset(path=DEFAULT_DATASET):
+    """读取数据集或差异文件（.gz结尾时按gzip解压）"""
+    path = str(path)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _recode(model, recode):
+    """代码变更：旧代码 -> 新代码，新代码已被其他记录占用时报错；返回变更的记录数"""
+    taken = set(
+        model.objects.filter(code__in=recode.values()).exclude(code__in=recode.keys())
+        .values_list('code', flat=True)
+    )
+    if taken:
+        raise ValueError(f'{model._meta.verbose_name}代码变更冲突，新代码已被占用: {", ".join(sorted(taken))}')
+    rows = list(model.objects.filter(code__in=recode.keys()).only('id', 'code'))
+    if not rows:
+        return 0
+    # 先改成临时代码再改成新代码，允许代码互换（如 A->B、B->A）而不违反唯一约束
+    new_codes = {row.id: recode[row.code] for row in rows}
+    for row in rows:
+        row.code = f'~{row.id}'
+    model.objects.bulk_update(rows, ['code'])
+    for row in rows:
+        row.code = new_codes[row.id]
+    model.objects.bulk_update(rows, ['code'])
+    return len(rows)
+
+
+def apply_dataset(dataset, levels=tuple(LEVELS), dry_run=False, batch_size=500):
+    """
+    将数据集/差异文件应用到数据库
+        levels:   只处理指定的级别（上级级别的代码仍会用于解析外键）
+        dry_run:  在事务中执行后回滚，只返回统计
+    返回每一级的统计：{级别: {'created', 'updated', 'recoded', 'removed', 'skipped'}}
+    已存在的记录按代码匹配，名称或上级变化时更新；数据集中没有的记录不会被删除（除非列在remove中）
+    """
+    stats = {}
+    codes = {}  # 级别 -> {代码: ID}，供下一级解析外键
+
+    with transaction.atomic():
+        for level, (model, parent_level, parent_field) in LEVELS.items():
+            if level not in levels:
+                continue
+            level_stats = stats[level] = {'created': 0, 'updated': 0, 'recoded': 0, 'removed': 0, 'skipped': 0}
+            parent_attr = f'{parent_field}_id' if parent_field else None
+
+            # 1. 代码变更（先于新增执行，避免把改了代码的区划当成新记录）
+            recode = dataset.get('recode', {}).get(level)
+            if recode:
+                level_stats['recoded'] = _recode(model, recode)
+
+            # 2. 按代码比对现有记录（一条查询）
+            columns = ('code', 'id', 'name') + ((parent_attr,) if parent_attr else ())
+            existing = {row[0]: row[1:] for row in model.objects.order_by().values_list(*columns)}
+            if parent_level and parent_level not in codes:
+                parent_model = LEVELS[parent_level][0]
+                codes[parent_level] = dict(parent_model.objects.order_by().values_list('code', 'id'))
+            parent_ids = codes.get(parent_level, {})
+
+            new, changed = [], []
+            for row in dataset.get(level, ()):
+                code, name = row[0], row[1]
+                values = {'code': code, 'name': name}
+                if parent_attr:
+                    parent_id = parent_ids.get(row[2])
+                    if parent_id is None:
+                        # 上级区划不存在，跳过
+                        level_stats['skipped'] += 1
+                        continue
+                    values[parent_attr] = parent_id
+                current = existing.get(code)
+                if current is None:
+                    new.append(model(**values))
+                elif current[1:] != tuple(values[key] for key in columns[2:]):
+                    changed.append(model(id=current[0], **values))
+
+            # 3. 批量更新和批量新增（名称唯一等冲突的记录直接忽略）
+            if changed:
+                model.objects.bulk_update(changed, ['name'] + ([parent_field] if parent_field else []), batch_size=batch_size)
+                level_stats['updated'] = len(changed)
+            if new:
+                model.objects.bulk_create(new, batch_size=batch_size, ignore_conflicts=True)
+
+            # 4. 撤销的区划（关联的赛事地区外键会被置空）
+            removed = dataset.get('remove', {}).get(level)
+            if removed:
+                level_stats['removed'] = model.objects.filter(code__in=removed).delete()[1].get(model._meta.label, 0)
+
+            # ignore_conflicts 时无法得知实际插入的行数，用插入前后的代码集合计算
+            codes[level] = dict(model.objects.order_by().values_list('code', 'id'))
+            level_stats['created'] = len(codes[level].keys() - existing.keys())
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    if not dry_run and any(any(level_stats.values()) for level_stats in stats.values()):
+        # 批量写入不触发地区模型的信号，手动使各进程的地区索引失效
+        invalidate_region_index()
+    return stats
+
+
+def format_stats(stats):
+    """统计结果的文字描述，每级一行"""
+    lines = []
+    for level, level_stats in stats.items():
+        line = (
+            f'{LEVEL_NAMES[level]}：新增 {level_stats["created"]} 个，更新 {level_stats["updated"]} 个，'
+            f'代码变更 {level_stats["recoded"]} 个，撤销 {level_stats["removed"]} 个'
+        )
+        if level_stats['skipped']:
+            line += f'，上级不存在而跳过 {level_stats["skipped"]} 个'
+        lines.append(line)
+    return lines
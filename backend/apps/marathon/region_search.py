@@ -0,0 +1,128 @@
+"""
+地区名称的前缀检索（用于管理后台输入地点时的自动补全）
+
+对所有省、市、区县建立一个排好序的 (检索键, 地区) 数组，前缀查询用二分查找定位，不查数据库。
+每个地区的检索键包括：完整名称、简称（去掉行政区划后缀和民族名称，如"浦东新区" -> "浦东"）
+以及二者的拼音首字母（"pdxq"、"pd"）。
+索引随进程内的地区索引一起按地区数据版本号重建（见regions.py）。
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left
+
+from .pinyin import initials
+from .regions import get_region_index
+
+LEVEL_PROVINCE, LEVEL_CITY, LEVEL_DISTRICT = 'province', 'city', 'district'
+# 结果排序时的级别顺序：同样匹配程度下省份在前
+_LEVEL_ORDER = {LEVEL_PROVINCE: 0, LEVEL_CITY: 1, LEVEL_DISTRICT: 2}
+
+# 行政区划后缀，按长度从长到短匹配
+_SUFFIXES = (
+    '特别行政区', '自治区', '自治州', '自治县', '自治旗', '林区', '矿区', '新区', '地区',
+    '省', '市', '区', '县', '旗', '盟',
+)
+# 自治区划名称中的民族名称，如"恩施土家族苗族" -> "恩施"、"新疆维吾尔" -> "新疆"
+_ETHNIC_RE = re.compile(r'^(.{2,}?)(?:(?:.{1,4}?族)+|维吾尔)$')
+
+
+def short_name(name):
+    """地区简称：去掉行政区划后缀和民族名称，简称不足两个字时返回None"""
+    for suffix in _SUFFIXES:
+        if name.endswith(suffix) and len(name) > len(suffix):
+            name = name[:-len(suffix)]
+            break
+    else:
+        return None
+    match = _ETHNIC_RE.match(name)
+    if match:
+        name = match.group(1)
+    return name if len(name) >= 2 else None
+
+
+class RegionSearchIndex:
+    """
+    前缀检索索引：keys 为排好序的检索键，entries[i] 为 keys[i] 对应的地区 (级别, ID, 名称, 上级ID)，
+    ranks[i] 为该地区的排序值（省、市、区县依次靠后，同级名称短的靠前）
+    """
+    __slots__ = ('keys', 'entries', 'ranks', 'version')
+
+    def __init__(self, region_index):
+        pairs = []
+        for level, regions in (
+            (LEVEL_PROVINCE, ((pk, name, None) for pk, name in region_index.provinces.items())),
+            (LEVEL_CITY, ((pk, name, parent) for pk, (name, parent) in region_index.cities.items())),
+            (LEVEL_DISTRICT, ((pk, name, parent) for pk, (name, parent) in region_index.districts.items())),
+        ):
+            for pk, name, parent in regions:
+                entry = (level, pk, name, parent)
+                short = short_name(name)
+                keys = {name, short}
+                keys.add(initials(name))
+                if short:
+                    keys.add(initials(short))
+                keys.discard(None)
+                pairs.extend((key, entry) for key in keys)
+        pairs.sort(key=lambda pair: pair[0])
+        self.keys = [key for key, _ in pairs]
+        self.entries = [entry for _, entry in pairs]
+        self.ranks = [(_LEVEL_ORDER[entry[0]], len(entry[2]), entry[1]) for entry in self.entries]
+        self.version = region_index.version
+
+    def search(self, query, limit=10):
+        """
+        前缀检索，返回 [(级别, ID, 名称, 上级ID)]
+        检索键完全匹配的地区排在前面，其次按省、市、区县和名称长度排序
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        keys, entries, ranks = self.keys, self.entries, self.ranks
+        matches = {}
+        position = bisect_left(keys, query)
+        end = len(keys)
+        while position < end and keys[position].startswith(query):
+            # 同一地区有多个检索键命中时取最靠前的排序
+            rank = (keys[position] != query, ranks[position])
+            entry = entries[position]
+            if entry not in matches or rank < matches[entry]:
+                matches[entry] = rank
+            position += 1
+        return heapq.nsmallest(limit, matches, key=matches.__getitem__)
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+
+def get_region_search_index():
+    """获取当前进程的检索索引，地区索引重新加载后随之重建"""
+    global _search_index
+    region_index = get_region_index()
+    index = _search_index
+    if index is None or index.version != region_index.version:
+        with _search_index_lock:
+            index = _search_index
+            if index is None or index.version != region_index.version:
+                index = _search_index = RegionSearchIndex(region_index)
+    return index
+
+
+def search_regions(query, limit=10):
+    """
+    检索地区，每个结果带完整的上级路径：
+        {'level': 'district', 'id': 区县ID, 'name': '浦东新区',
+         'path': [[省份ID, '上海市'], [城市ID, '上海市'], [区县ID, '浦东新区']]}
+    """
+    region_index = get_region_index()
+    results = []
+    for level, pk, name, parent in get_region_search_index().search(query, limit=limit):
+        path = [[pk, name]]
+        if level == LEVEL_DISTRICT:
+            path.insert(0, [parent, region_index.city_name(parent)])
+            parent = region_index.cities[parent][1] if parent in region_index.cities else None
+        if level != LEVEL_PROVINCE and parent is not None:
+            path.insert(0, [parent, region_index.province_name(parent)])
+        results.append({'level': level, 'id': pk, 'name': name, 'path': path})
+    return results
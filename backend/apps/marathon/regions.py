@@ -0,0 +1,223 @@
+"""
+进程内的地区索引
+
+把省、市、区县表一次性加载为不可变的 名称→ID / ID→名称 映射，
+Marathon.save / MarathonRegistration.save 和批量处理都通过它解析地区外键，不再逐行查询数据库。
+地区表变化时（信号或批量导入后调用 invalidate_region_index）递增 regions 数据版本号，
+各进程在下次使用时发现版本号变化并重新加载。
+"""
+import hashlib
+import threading
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.common.cache_version import bump_data_version, get_data_version
+from .payloads import render_json
+
+# 地区数据版本号的命名空间
+REGIONS_NAMESPACE = 'regions'
+
+# 地图数据中使用的完整格式省份名称
+FULL_FORMAT_PROVINCES = (
+    '北京市', '天津市', '上海市', '重庆市',
+    '河北省', '山西省', '辽宁省', '吉林省', '黑龙江省',
+    '江苏省', '浙江省', '安徽省', '福建省', '江西省', '山东省',
+    '河南省', '湖北省', '湖南省', '广东省', '广西壮族自治区', '海南省',
+    '四川省', '贵州省', '云南省', '西藏自治区', '陕西省', '甘肃省',
+    '青海省', '宁夏回族自治区', '新疆维吾尔自治区', '内蒙古自治区',
+    '香港特别行政区', '澳门特别行政区', '台湾省',
+)
+
+# 简化格式 -> 完整格式（地图数据需要的格式）
+PROVINCE_SHORT_NAMES = {
+    '北京': '北京市', '天津': '天津市', '上海': '上海市', '重庆': '重庆市',
+    '河北': '河北省', '山西': '山西省', '辽宁': '辽宁省', '吉林': '吉林省', '黑龙江': '黑龙江省',
+    '江苏': '江苏省', '浙江': '浙江省', '安徽': '安徽省', '福建': '福建省', '江西': '江西省', '山东': '山东省',
+    '河南': '河南省', '湖北': '湖北省', '湖南': '湖南省', '广东': '广东省', '广西': '广西壮族自治区', '海南': '海南省',
+    '四川': '四川省', '贵州': '贵州省', '云南': '云南省', '西藏': '西藏自治区', '陕西': '陕西省', '甘肃': '甘肃省',
+    '青海': '青海省', '宁夏': '宁夏回族自治区', '新疆': '新疆维吾尔自治区', '内蒙古': '内蒙古自治区',
+    '香港': '香港特别行政区', '澳门': '澳门特别行政区', '台湾': '台湾省',
+}
+
+
+def normalize_province_name(province):
+    """标准化省份名称：转换为地图数据需要的完整格式"""
+    if not province:
+        return province
+    # 如果已经是完整格式，直接返回
+    if province in FULL_FORMAT_PROVINCES:
+        return province
+    # 如果在映射表中，返回完整格式
+    if province in PROVINCE_SHORT_NAMES:
+        return PROVINCE_SHORT_NAMES[province]
+    # 如果不在映射表中，尝试添加后缀
+    if not province.endswith(('省', '市', '自治区', '特别行政区')):
+        return province + '省'
+    return province
+
+
+def normalize_city_name(city):
+    """标准化城市名称：保持完整格式（地图数据通常使用完整格式，如"成都市"），不自动添加后缀"""
+    return city
+
+
+def normalize_district_name(district):
+    """标准化区县名称：保持完整格式（地图数据通常使用完整格式），不自动添加后缀"""
+    return district
+
+
+class RegionIndex:
+    """
+    不可变的地区索引
+        province_ids:  省份名称 -> 省份ID
+        city_ids:      (省份ID, 城市名称) -> 城市ID
+        district_ids:  (城市ID, 区县名称) -> 区县ID
+        provinces:     省份ID -> 省份名称
+        cities:        城市ID -> (城市名称, 省份ID)
+        districts:     区县ID -> (区县名称, 城市ID)
+    """
+    __slots__ = ('province_ids', 'city_ids', 'district_ids', 'provinces', 'cities', 'districts', 'version')
+
+    def __init__(self, provinces, cities, districts, version=None):
+        """provinces: [(id, name)]，cities: [(id, name, province_id)]，districts: [(id, name, city_id)]"""
+        set_ = object.__setattr__
+        set_(self, 'provinces', MappingProxyType({pk: name for pk, name in provinces}))
+        set_(self, 'cities', MappingProxyType({pk: (name, parent) for pk, name, parent in cities}))
+        set_(self, 'districts', MappingProxyType({pk: (name, parent) for pk, name, parent in districts}))
+        set_(self, 'province_ids', MappingProxyType({name: pk for pk, name in provinces}))
+        set_(self, 'city_ids', MappingProxyType({(parent, name): pk for pk, name, parent in cities}))
+        set_(self, 'district_ids', MappingProxyType({(parent, name): pk for pk, name, parent in districts}))
+        set_(self, 'version', version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('RegionIndex 是不可变对象')
+
+    @classmethod
+    def load(cls, version=None):
+        """从数据库加载（三条查询）"""
+        from .models import Province, City, District
+        return cls(
+            list(Province.objects.order_by().values_list('id', 'name')),
+            list(City.objects.order_by().values_list('id', 'name', 'province_id')),
+            list(District.objects.order_by().values_list('id', 'name', 'city_id')),
+            version=version,
+        )
+
+    def province_id(self, name):
+        return self.province_ids.get(name)
+
+    def city_id(self, province_id, name):
+        return self.city_ids.get((province_id, name))
+
+    def district_id(self, city_id, name):
+        return self.district_ids.get((city_id, name))
+
+    def province_name(self, province_id):
+        return self.provinces.get(province_id)
+
+    def city_name(self, city_id):
+        city = self.cities.get(city_id)
+        return city[0] if city else None
+
+    def district_name(self, district_id):
+        district = self.districts.get(district_id)
+        return district[0] if district else None
+
+    def tree(self, province_id=None, city_id=None):
+        """
+        省→市→区县树，紧凑的嵌套数组，各级按ID排序：
+            [[省份ID, 省份名称, [[城市ID, 城市名称, [[区县ID, 区县名称], ...]], ...]], ...]
+        指定province_id时只返回该省的城市列表，指定city_id时只返回该市的区县列表；不存在时返回None
+        """
+        districts_by_city = {}
+        for pk in sorted(self.districts):
+            name, parent = self.districts[pk]
+            districts_by_city.setdefault(parent, []).append([pk, name])
+        if city_id is not None:
+            return districts_by_city.get(city_id, []) if city_id in self.cities else None
+
+        cities_by_province = {}
+        for pk in sorted(self.cities):
+            name, parent = self.cities[pk]
+            cities_by_province.setdefault(parent, []).append([pk, name, districts_by_city.get(pk, [])])
+        if province_id is not None:
+            return cities_by_province.get(province_id, []) if province_id in self.provinces else None
+
+        return [[pk, self.provinces[pk], cities_by_province.get(pk, [])] for pk in sorted(self.provinces)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_region_index():
+    """获取当前进程的地区索引，地区数据版本号变化时重新加载"""
+    global _index
+    version = get_data_version(REGIONS_NAMESPACE)
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            index = _index
+            if index is None or index.version != version:
+                index = _index = RegionIndex.load(version=version)
+    return index
+
+
+def region_tree_payload(province_id=None, city_id=None):
+    """
+    地区树（或子树）编码后的JSON字节和强ETag：(payload, etag)，子树不存在时返回None
+    按地区数据版本号缓存，地区表不变时每个进程只编码一次
+    """
+    index = get_region_index()
+    cache_key = f'regions_tree:{index.version}:{province_id or ""}:{city_id or ""}'
+    cached = cache.get(cache_key)
+    if cached is None:
+        tree = index.tree(province_id=province_id, city_id=city_id)
+        if tree is None:
+            return None
+        payload = render_json(tree)
+        # 强ETag：内容的哈希，内容相同则ETag相同，与进程和版本号无关
+        cached = (payload, '"%s"' % hashlib.sha1(payload).hexdigest())
+        cache.set(cache_key, cached, settings.CACHE_TIMEOUT['LONG'])
+    return cached
+
+
+def invalidate_region_index():
+    """地区表变化后调用，使所有进程的地区索引在下次使用时重新加载"""
+    bump_data_version(REGIONS_NAMESPACE)
+
+
+def sync_region_fields(instance, index=None):
+    """
+    同步赛事/报名赛事的地区字符串字段和外键字段（字符串字段需已标准化），只使用内存索引：
+      1. 字符串字段 → 外键字段：字符串能匹配到地区时更新外键，匹配不到时保留原外键
+      2. 外键字段 → 字符串字段：字符串为空但有外键时，用外键对应的名称补全
+    """
+    index = index or get_region_index()
+
+    # 1. 字符串字段 → 外键字段
+    if instance.province:
+        province_id = index.province_id(instance.province)
+        if province_id is not None:
+            instance.province_obj_id = province_id
+    if instance.city and instance.province_obj_id:
+        city_id = index.city_id(instance.province_obj_id, instance.city)
+        if city_id is not None:
+            instance.city_obj_id = city_id
+    if instance.district and instance.city_obj_id:
+        district_id = index.district_id(instance.city_obj_id, instance.district)
+        if district_id is not None:
+            instance.district_obj_id = district_id
+
+    # 2. 外键字段 → 字符串字段（外键不在索引中时才回退到查询关联对象）
+    if not instance.province and instance.province_obj_id:
+        name = index.province_name(instance.province_obj_id) or instance.province_obj.name
+        instance.province = normalize_province_name(name)
+    if not instance.city and instance.city_obj_id:
+        name = index.city_name(instance.city_obj_id) or instance.city_obj.name
+        instance.city = normalize_city_name(name)
+    if not instance.district and instance.district_obj_id:
+        name = index.district_name(instance.district_obj_id) or instance.district_obj.name
+        instance.district = normalize_district_name(name)
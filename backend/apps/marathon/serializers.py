@@ -8,7 +8,8 @@ class MarathonListSerializer(serializers.ModelSerializer):
         model = Marathon
         fields = [
             'id', 'event_name', 'event_date', 'location', 
-            'province', 'city', 'district', 'event_type', 'finish_time', 'pace'
+            'province', 'city', 'district', 'event_type', 'finish_time', 'pace',
+            'finish_seconds', 'pace_seconds'
         ]
 
 """马拉松赛事完整序列化器（用于详情视图）"""
@@ -20,10 +21,11 @@ class MarathonSerializer(serializers.ModelSerializer):
             'id', 'event_name', 'event_date', 'location', 
             'province', 'city', 'district',
             'event_type', 'finish_time', 'pace',
+            'finish_seconds', 'pace_seconds',
             'certificate', 'description', 'event_log',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']  # 只读字段
+        read_only_fields = ['finish_seconds', 'pace_seconds', 'created_at', 'updated_at']  # 只读字段（秒数由模型保存时计算）
 
     def normalize_province_name(self, province):
         """标准化省份名称：转换为地图数据需要的完整格式"""
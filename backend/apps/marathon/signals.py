@@ -0,0 +1,45 @@
+"""
+马拉松应用的信号处理
+赛事和报名赛事写入或删除后递增数据版本号，使列表缓存立即失效；
+地区表变化后使进程内的地区索引失效
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.common.cache_version import bump_data_version
+from apps.common.conditional import bump_deletion_generation
+from .cache import MARATHON_NAMESPACE, REGISTRATION_NAMESPACE
+from .models import Marathon, MarathonRegistration, Province, City, District
+from .regions import invalidate_region_index
+
+
+@receiver([post_save, post_delete], sender=Marathon)
+def invalidate_marathon_cache(sender, **kwargs):
+    """赛事变更（包括上传证书）后使赛事列表缓存失效"""
+    bump_data_version(MARATHON_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=MarathonRegistration)
+def invalidate_registration_cache(sender, **kwargs):
+    """报名赛事变更后使报名列表缓存失效"""
+    bump_data_version(REGISTRATION_NAMESPACE)
+
+
+@receiver(post_delete, sender=Marathon)
+def bump_marathon_deletion_generation(sender, **kwargs):
+    """赛事删除后递增删除代数，使列表ETag变化"""
+    bump_deletion_generation(MARATHON_NAMESPACE)
+
+
+@receiver(post_delete, sender=MarathonRegistration)
+def bump_registration_deletion_generation(sender, **kwargs):
+    """报名赛事删除后递增删除代数，使列表ETag变化"""
+    bump_deletion_generation(REGISTRATION_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=Province)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=District)
+def invalidate_regions(sender, **kwargs):
+    """省、市、区县变更后重新加载地区索引"""
+    invalidate_region_index()
@@ -1,4 +1,5 @@
 // 级联选择功能 - 省市区三级联动
+// 省市区树只请求一次（/api/marathon/regions/tree/，浏览器可长期缓存），之后切换省份/城市不再请求接口
 
 document.addEventListener('DOMContentLoaded', function() {
     console.log('级联选择脚本已加载');
@@ -21,83 +22,56 @@ document.addEventListener('DOMContentLoaded', function() {
     const initialCity = citySelect.value;
     const initialDistrict = districtSelect ? districtSelect.value : '';
     
+    // 省份ID -> [[城市ID, 名称, 区县列表]]，城市ID -> [[区县ID, 名称]]
+    const citiesByProvince = {};
+    const districtsByCity = {};
+    
+    // 用 [ID, 名称] 列表填充选择框
+    function fillOptions(select, items, initialValue) {
+        select.innerHTML = '<option value="">---------</option>';
+        items.forEach(item => {
+            const option = document.createElement('option');
+            option.value = item[0];
+            option.textContent = item[1];
+            select.appendChild(option);
+        });
+        // 如果有初始值，尝试选中
+        if (initialValue) {
+            select.value = initialValue;
+        }
+    }
+    
     // 监听省份选择变化
     provinceSelect.addEventListener('change', function() {
-        const provinceId = this.value;
-        
-        // 清空城市和区县选择
-        citySelect.innerHTML = '<option value="">---------</option>';
+        fillOptions(citySelect, citiesByProvince[this.value] || [], initialCity);
         if (districtSelect) {
-            districtSelect.innerHTML = '<option value="">---------</option>';
-        }
-        
-        // 如果没有选择省份，直接返回
-        if (!provinceId) {
-            return;
+            // 触发城市变化事件，加载区县
+            citySelect.dispatchEvent(new Event('change'));
         }
-        
-        // 获取该省份下的城市列表
-        fetch(`/api/marathon/city/?province=${provinceId}`)
-            .then(response => response.json())
-            .then(data => {
-                // 添加城市选项
-                data.forEach(city => {
-                    const option = document.createElement('option');
-                    option.value = city.id;
-                    option.textContent = city.name;
-                    citySelect.appendChild(option);
-                });
-                
-                // 如果有初始值，尝试选中
-                if (initialCity) {
-                    citySelect.value = initialCity;
-                    // 触发城市变化事件，加载区县
-                    citySelect.dispatchEvent(new Event('change'));
-                }
-            })
-            .catch(error => {
-                console.error('获取城市列表失败:', error);
-            });
     });
     
     // 监听城市选择变化
     if (districtSelect) {
         citySelect.addEventListener('change', function() {
-            const cityId = this.value;
-            
-            // 清空区县选择
-            districtSelect.innerHTML = '<option value="">---------</option>';
-            
-            // 如果没有选择城市，直接返回
-            if (!cityId) {
-                return;
-            }
-            
-            // 获取该城市下的区县列表
-            fetch(`/api/marathon/district/?city=${cityId}`)
-                .then(response => response.json())
-                .then(data => {
-                    // 添加区县选项
-                    data.forEach(district => {
-                        const option = document.createElement('option');
-                        option.value = district.id;
-                        option.textContent = district.name;
-                        districtSelect.appendChild(option);
-                    });
-                    
-                    // 如果有初始值，尝试选中
-                    if (initialDistrict) {
-                        districtSelect.value = initialDistrict;
-                    }
-                })
-                .catch(error => {
-                    console.error('获取区县列表失败:', error);
-                });
+            fillOptions(districtSelect, districtsByCity[this.value] || [], initialDistrict);
         });
     }
     
-    // 页面加载时，如果已经选择了省份，触发加载城市
-    if (provinceSelect.value) {
-        provinceSelect.dispatchEvent(new Event('change'));
-    }
+    fetch('/api/marathon/regions/tree/')
+        .then(response => response.json())
+        .then(tree => {
+            tree.forEach(([provinceId, provinceName, cities]) => {
+                citiesByProvince[provinceId] = cities;
+                cities.forEach(([cityId, cityName, districts]) => {
+                    districtsByCity[cityId] = districts;
+                });
+            });
+            // 页面加载时，如果已经选择了省份，填充城市和区县
+            if (provinceSelect.value) {
+                provinceSelect.dispatchEvent(new Event('change'));
+            }
+        })
+        .catch(error => {
+            console.error('获取省市区数据失败:', error);
+        });
 });
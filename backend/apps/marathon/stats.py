@@ -0,0 +1,166 @@
+"""
+马拉松数据统计
+所有统计都在数据库中用聚合查询完成，不把赛事逐行取到Python里计算
+"""
+from django.db import connection
+from django.db.models import Avg, Count, F, Max, Min, Window
+from django.db.models.functions import ExtractYear, RowNumber
+
+from .utils import format_seconds
+
+
+def _rollup(queryset, group_fields):
+    """按 group_fields 分组统计赛事数量和平均配速，一条GROUP BY查询"""
+    rows = (
+        queryset
+        .exclude(**{group_fields[-1]: ''})
+        .values(*group_fields)
+        .annotate(count=Count('id'), avg_pace_seconds=Avg('pace_seconds'))
+        .order_by(*group_fields)
+    )
+    result = []
+    for row in rows:
+        avg_pace_seconds = row['avg_pace_seconds']
+        result.append({
+            **{field: row[field] for field in group_fields},
+            'count': row['count'],
+            'avg_pace_seconds': round(avg_pace_seconds, 1) if avg_pace_seconds is not None else None,
+            'avg_pace': format_seconds(avg_pace_seconds),
+        })
+    return result
+
+
+def region_stats(queryset):
+    """
+    省、市、区县三级的赛事数量和平均配速，每级一条GROUP BY查询
+    返回结构：
+        {'provinces': [{'province', 'count', 'avg_pace_seconds', 'avg_pace'}, ...],
+         'cities': [{'province', 'city', ...}, ...],
+         'districts': [{'province', 'city', 'district', ...}, ...]}
+    """
+    return {
+        'provinces': _rollup(queryset, ['province']),
+        'cities': _rollup(queryset, ['province', 'city']),
+        'districts': _rollup(queryset, ['province', 'city', 'district']),
+    }
+
+
+def time_stats(queryset):
+    """
+    按赛事类型统计配速和完赛时间的最小值、最大值、平均值，一条GROUP BY查询
+    使用 pace_seconds / finish_seconds 整数列，没有成绩的赛事不参与统计
+    """
+    rows = (
+        queryset
+        .values('event_type')
+        .annotate(
+            count=Count('id'),
+            min_pace_seconds=Min('pace_seconds'),
+            max_pace_seconds=Max('pace_seconds'),
+            avg_pace_seconds=Avg('pace_seconds'),
+            min_finish_seconds=Min('finish_seconds'),
+            max_finish_seconds=Max('finish_seconds'),
+            avg_finish_seconds=Avg('finish_seconds'),
+        )
+        .order_by('event_type')
+    )
+    result = []
+    for row in rows:
+        item = {'event_type': row['event_type'], 'count': row['count']}
+        for prefix in ('min', 'max', 'avg'):
+            pace_seconds = row[f'{prefix}_pace_seconds']
+            finish_seconds = row[f'{prefix}_finish_seconds']
+            item[f'{prefix}_pace_seconds'] = round(pace_seconds, 1) if pace_seconds is not None else None
+            item[f'{prefix}_pace'] = format_seconds(pace_seconds)
+            item[f'{prefix}_finish_seconds'] = round(finish_seconds, 1) if finish_seconds is not None else None
+            item[f'{prefix}_finish_time'] = format_seconds(finish_seconds, with_hours=True)
+        result.append(item)
+    return result
+
+
+def progression_stats(queryset):
+    """
+    按赛事类型统计个人最好成绩（PB）和逐年进步情况，共两条查询：
+      1. 窗口函数 ROW_NUMBER() 取每个赛事类型完赛时间最短的一场作为PB
+      2. 按 (赛事类型, 年份) 聚合出年度最好成绩和平均配速，
+         外层用 LAG() 取上一年的值计算进步幅度，用累计 MIN() 得到截至当年的PB
+    返回结构：
+        [{'event_type', 'personal_best': {...} 或 None,
+          'years': [{'year', 'count', 'best_finish_seconds', 'best_finish_time',
+                     'best_pace_seconds', 'best_pace', 'avg_pace_seconds', 'avg_pace',
+                     'best_finish_delta', 'avg_pace_delta',
+                     'running_best_finish_seconds', 'running_best_finish_time'}, ...]}, ...]
+    delta为本年减上一年的秒数，负数表示进步；第一年为None
+    """
+    queryset = queryset.filter(finish_seconds__isnull=False).order_by()
+
+    # 1. 每个赛事类型的PB
+    personal_bests = {}
+    pb_rows = (
+        queryset
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F('event_type')],
+            order_by=[F('finish_seconds').asc(), F('event_date').asc(), F('id').asc()],
+        ))
+        .filter(rank=1)
+        .values('id', 'event_type', 'event_name', 'event_date', 'finish_time', 'finish_seconds', 'pace', 'pace_seconds')
+    )
+    for row in pb_rows:
+        event_type = row.pop('event_type')
+        row['event_date'] = row['event_date'].isoformat()
+        personal_bests[event_type] = row
+
+    # 2. 年度聚合（内层由ORM生成，沿用过滤条件）+ 窗口函数（外层）
+    yearly = (
+        queryset
+        .annotate(year=ExtractYear('event_date'))
+        .values('event_type', 'year')
+        .annotate(
+            count=Count('id'),
+            best_finish_seconds=Min('finish_seconds'),
+            best_pace_seconds=Min('pace_seconds'),
+            avg_pace_seconds=Avg('pace_seconds'),
+        )
+        .order_by()
+    )
+    inner_sql, params = yearly.query.sql_with_params()
+    sql = f'''
+        SELECT event_type, year, count, best_finish_seconds, best_pace_seconds, avg_pace_seconds,
+               LAG(best_finish_seconds) OVER w AS prev_best_finish_seconds,
+               LAG(avg_pace_seconds) OVER w AS prev_avg_pace_seconds,
+               MIN(best_finish_seconds) OVER w AS running_best_finish_seconds
+        FROM ({inner_sql}) AS yearly
+        WINDOW w AS (PARTITION BY event_type ORDER BY year)
+        ORDER BY event_type, year
+    '''
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        yearly_rows = [dict(zip(columns, values)) for values in cursor.fetchall()]
+
+    result = {}
+    for row in yearly_rows:
+        prev_best, prev_avg = row['prev_best_finish_seconds'], row['prev_avg_pace_seconds']
+        avg_pace_seconds = row['avg_pace_seconds']
+        item = {
+            'year': row['year'],
+            'count': row['count'],
+            'best_finish_seconds': row['best_finish_seconds'],
+            'best_finish_time': format_seconds(row['best_finish_seconds'], with_hours=True),
+            'best_pace_seconds': row['best_pace_seconds'],
+            'best_pace': format_seconds(row['best_pace_seconds']),
+            'avg_pace_seconds': round(avg_pace_seconds, 1) if avg_pace_seconds is not None else None,
+            'avg_pace': format_seconds(avg_pace_seconds),
+            'best_finish_delta': row['best_finish_seconds'] - prev_best if prev_best is not None else None,
+            'avg_pace_delta': (round(avg_pace_seconds - prev_avg, 1)
+                               if avg_pace_seconds is not None and prev_avg is not None else None),
+            'running_best_finish_seconds': row['running_best_finish_seconds'],
+            'running_best_finish_time': format_seconds(row['running_best_finish_seconds'], with_hours=True),
+        }
+        result.setdefault(row['event_type'], []).append(item)
+
+    return [
+        {'event_type': event_type, 'personal_best': personal_bests.get(event_type), 'years': years}
+        for event_type, years in sorted(result.items())
+    ]
@@ -1,3 +1,984 @@
-from django.test import TestCase
+import datetime
+import gzip
+import io
+import json
+import pickle
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.cache_version import VERSION_KEY, bump_data_version, get_data_version
+from apps.common.conditional import invalidate_bulk_write
+
+from . import mapdata
+from .cache import MARATHON_NAMESPACE
+from .models import City, District, Marathon, MarathonRegistration, Province
+from .geocoder import RegionMatcher
+from .importers import detect_format, import_rows, parse_rows
+from .pagination import MarathonCursorPagination, RegistrationCursorPagination
+from .regions import RegionIndex, get_region_index, invalidate_region_index
+from .payloads import render_json, rows_to_data
+from .serializers import MarathonListSerializer, MarathonRegistrationListSerializer, MarathonSerializer
+
+
+def create_marathon(**kwargs):
+    values = {
+        'event_name': '上海马拉松',
+        'event_date': datetime.date(2025, 11, 30),
+        'location': '上海',
+        'event_type': 'full',
+        'finish_time': '3:30:00',
+        'pace': '04:58',
+    }
+    values.update(kwargs)
+    return Marathon.objects.create(**values)
+
+
+def create_registration(**kwargs):
+    values = {
+        'event_name': '厦门马拉松',
+        'event_date': datetime.date(2026, 1, 4),
+        'location': '厦门',
+    }
+    values.update(kwargs)
+    return MarathonRegistration.objects.create(**values)
+
+
+class ConditionalGetTests(TestCase):
+    """列表和详情的 ETag / 304"""
+
+    def setUp(self):
+        cache.clear()
+        self.marathon = create_marathon()
+        create_marathon(event_name='北京马拉松', event_date=datetime.date(2025, 4, 20))
+
+    def test_list_not_modified_with_etag(self):
+        response = self.client.get('/api/marathon/')
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        # 带任意过滤参数的列表共用同一个验证器
+        response = self.client.get('/api/marathon/?year=2025', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_has_no_last_modified(self):
+        response = self.client.get('/api/marathon/')
+        self.assertNotIn('Last-Modified', response)
+        # 只带 If-Modified-Since 的请求总是得到完整响应
+        response = self.client.get('/api/marathon/', HTTP_IF_MODIFIED_SINCE='Wed, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_on_update_delete_and_bulk_write(self):
+        etags = [self.client.get('/api/marathon/')['ETag']]
+        self.marathon.event_name = '上海国际马拉松'
+        self.marathon.save()
+        etags.append(self.client.get('/api/marathon/')['ETag'])
+        Marathon.objects.filter(pk=self.marathon.pk).delete()
+        etags.append(self.client.get('/api/marathon/')['ETag'])
+        # QuerySet.update() 不改变数量也不触发信号，由 invalidate_bulk_write 使验证器失效
+        Marathon.objects.update(location='北京')
+        invalidate_bulk_write(MARATHON_NAMESPACE)
+        etags.append(self.client.get('/api/marathon/')['ETag'])
+        self.assertEqual(len(set(etags)), 4)
+        response = self.client.get('/api/marathon/', HTTP_IF_NONE_MATCH=etags[1])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+    def test_detail_validators(self):
+        response = self.client.get(f'/api/marathon/{self.marathon.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(f'/api/marathon/{self.marathon.pk}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_registration_list_etag(self):
+        create_registration()
+        etag = self.client.get('/api/marathon/registration/')['ETag']
+        create_registration(event_name='无锡马拉松')
+        response = self.client.get('/api/marathon/registration/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+
+class CursorPaginationTests(TestCase):
+    """列表的键集（游标）分页"""
+
+    def setUp(self):
+        cache.clear()
+        # 多个赛事日期相同，验证按id区分同一日期内的游标位置
+        dates = [datetime.date(2025, 3, 1), datetime.date(2025, 3, 1), datetime.date(2025, 4, 20),
+                 datetime.date(2025, 4, 20), datetime.date(2025, 4, 20), datetime.date(2025, 11, 30)]
+        self.marathons = [create_marathon(event_name=f'赛事{i}', event_date=date) for i, date in enumerate(dates)]
+        self.registrations = [create_registration(event_name=f'报名{i}', event_date=date) for i, date in enumerate(dates)]
+
+    def walk(self, url):
+        """沿next链接取完所有页，返回 (每页的id列表, 最后一页的响应体)"""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            pages.append([row['id'] for row in body['results']])
+            url = body['next']
+        return pages, body
+
+    def test_marathon_pages(self):
+        pages, last = self.walk('/api/marathon/?page_size=4')
+        expected = [m.pk for m in sorted(self.marathons, key=lambda m: (m.event_date, m.pk), reverse=True)]
+        self.assertEqual(pages, [expected[:4], expected[4:]])
+        self.assertIsNotNone(last['previous'])
+        # 不分页的列表与游标分页的顺序一致
+        self.assertEqual([row['id'] for row in self.client.get('/api/marathon/').json()], expected)
+
+    def test_registration_pages(self):
+        pages, _ = self.walk('/api/marathon/registration/?page_size=2')
+        expected = [r.pk for r in sorted(self.registrations, key=lambda r: (r.event_date, r.pk))]
+        self.assertEqual(pages, [expected[0:2], expected[2:4], expected[4:6]])
+
+    def test_previous_link(self):
+        first = self.client.get('/api/marathon/?page_size=2').json()
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual([row['id'] for row in back['results']], [row['id'] for row in first['results']])
+        self.assertIsNone(back['previous'])
+
+    def test_new_rows_do_not_shift_pages(self):
+        first = self.client.get('/api/marathon/?page_size=3').json()
+        # 翻页过程中插入排在前面的新赛事，下一页不会重复已返回的记录
+        create_marathon(event_name='新赛事', event_date=datetime.date(2026, 1, 1))
+        second = self.client.get(first['next']).json()
+        seen = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(second['results']), 3)
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', 'eyJwIjpbMV19', 'eyJwIjpbIngiLCJ5Il19'):
+            response = self.client.get('/api/marathon/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404)
+
+
+class FilterTests(TestCase):
+    """列表的过滤和排序参数"""
+
+    def setUp(self):
+        cache.clear()
+        # 地区数据由迁移导入
+        self.zhejiang = Province.objects.get(name='浙江省')
+        self.hangzhou = City.objects.get(name='杭州市')
+        self.full = create_marathon(event_name='杭州马拉松', event_date=datetime.date(2024, 11, 3),
+                                    location='杭州', province='浙江', city='杭州市')
+        self.half = create_marathon(event_name='上海半马', event_date=datetime.date(2025, 4, 20),
+                                    location='上海', province='上海', event_type='half',
+                                    finish_time='1:40:00', pace='04:44')
+        self.ten = create_marathon(event_name='元旦10公里', event_date=datetime.date(2025, 1, 1),
+                                   location='上海', province='上海市', event_type='10km',
+                                   finish_time='45:00', pace='04:30')
+
+    def ids(self, url='/api/marathon/', **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()]
+
+    def test_date_filters(self):
+        self.assertEqual(self.ids(year=2025), [self.half.pk, self.ten.pk])
+        self.assertEqual(self.ids(start_date='2024-12-01', end_date='2025-01-31'), [self.ten.pk])
+
+    def test_event_type_filter(self):
+        self.assertEqual(self.ids(event_type='half,10km'), [self.half.pk, self.ten.pk])
+        self.assertEqual(self.ids(event_type='full'), [self.full.pk])
+
+    def test_region_filters(self):
+        # 名称参数与保存时一样先标准化
+        self.assertEqual(self.ids(province='上海'), [self.half.pk, self.ten.pk])
+        self.assertEqual(self.ids(province='浙江省', city='杭州市'), [self.full.pk])
+        self.assertEqual(self.ids(province_id=self.zhejiang.pk), [self.full.pk])
+        self.assertEqual(self.ids(city_id=self.hangzhou.pk), [self.full.pk])
+
+    def test_registration_status_filter(self):
+        waiting = create_registration(registration_status='won')
+        create_registration(event_name='无锡马拉松')
+        self.assertEqual(self.ids('/api/marathon/registration/', registration_status='won'), [waiting.pk])
+        # 赛事没有报名状态
+        response = self.client.get('/api/marathon/', {'registration_status': 'won'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_params(self):
+        for params in ({'start_date': '2025/01/01'}, {'year': 'abc'}, {'year': '0'},
+                       {'event_type': 'ultra'}, {'province_id': 'x'}, {'ordering': 'event_name'}):
+            response = self.client.get('/api/marathon/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
+
+    def test_ordering(self):
+        self.assertEqual(self.ids(ordering='pace_seconds'), [self.ten.pk, self.half.pk, self.full.pk])
+        self.assertEqual(self.ids(ordering='-finish_seconds'), [self.full.pk, self.half.pk, self.ten.pk])
+        self.assertEqual(self.ids(ordering='event_date'), [self.full.pk, self.ten.pk, self.half.pk])
+
+    def test_ordering_with_cursor(self):
+        # 同一个分页器实例先翻页再校验排序字段：排序字段白名单不能被当前页的排序元组覆盖
+        first = self.client.get('/api/marathon/', {'ordering': '-pace_seconds', 'page_size': 2}).json()
+        self.assertEqual([row['id'] for row in first['results']], [self.full.pk, self.half.pk])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([row['id'] for row in second['results']], [self.ten.pk])
+
+
+class RegionStatsTests(TestCase):
+    """省市区三级统计"""
+
+    def setUp(self):
+        cache.clear()
+        create_marathon(location='杭州', province='浙江省', city='杭州市', district='西湖区', pace='05:00')
+        create_marathon(location='杭州', province='浙江省', city='杭州市', pace='04:00',
+                        event_date=datetime.date(2024, 11, 3))
+        create_marathon(location='宁波', province='浙江省', city='宁波市', pace='06:00', event_type='half')
+        create_marathon(location='上海', province='上海市', pace='')
+
+    def test_rollup(self):
+        data = self.client.get('/api/marathon/stats/regions/').json()
+        self.assertEqual(data['provinces'], [
+            {'province': '上海市', 'count': 1, 'avg_pace_seconds': None, 'avg_pace': None},
+            {'province': '浙江省', 'count': 3, 'avg_pace_seconds': 300.0, 'avg_pace': '05:00'},
+        ])
+        # 没有城市/区县的赛事不出现在下一级
+        self.assertEqual([(row['city'], row['count']) for row in data['cities']], [('宁波市', 1), ('杭州市', 2)])
+        self.assertEqual(data['districts'], [{
+            'province': '浙江省', 'city': '杭州市', 'district': '西湖区',
+            'count': 1, 'avg_pace_seconds': 300.0, 'avg_pace': '05:00',
+        }])
+
+    def test_filters(self):
+        data = self.client.get('/api/marathon/stats/regions/', {'year': 2024}).json()
+        self.assertEqual([(row['city'], row['avg_pace']) for row in data['cities']], [('杭州市', '04:00')])
+        data = self.client.get('/api/marathon/stats/regions/', {'event_type': 'half'}).json()
+        self.assertEqual([row['province'] for row in data['provinces']], ['浙江省'])
+        self.assertEqual(self.client.get('/api/marathon/stats/regions/', {'year': 'x'}).status_code, 400)
+
+    def test_cached_until_write(self):
+        self.client.get('/api/marathon/stats/regions/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/marathon/stats/regions/')
+        create_marathon(location='宁波', province='浙江省', city='宁波市', pace='06:00')
+        data = self.client.get('/api/marathon/stats/regions/').json()
+        self.assertEqual(data['provinces'][1]['count'], 4)
+
+
+class NullOrderingTests(TestCase):
+    """按可为空的成绩字段排序：没有成绩的赛事排在最后，不会被排除"""
+
+    def setUp(self):
+        cache.clear()
+        paces = ['05:00', '', '04:30', '', '05:00', '06:00', '']
+        self.marathons = [create_marathon(event_name=f'赛事{i}', pace=pace) for i, pace in enumerate(paces)]
+
+    def expected(self, descending):
+        with_pace = sorted((m for m in self.marathons if m.pace_seconds is not None),
+                           key=lambda m: (m.pace_seconds, m.pk), reverse=descending)
+        without_pace = sorted((m for m in self.marathons if m.pace_seconds is None),
+                              key=lambda m: m.pk, reverse=descending)
+        return [m.pk for m in with_pace + without_pace]
+
+    def test_unpaginated_list_keeps_null_rows(self):
+        for ordering, descending in (('pace_seconds', False), ('-pace_seconds', True)):
+            rows = self.client.get('/api/marathon/', {'ordering': ordering}).json()
+            self.assertEqual([row['id'] for row in rows], self.expected(descending))
+
+    def test_cursor_walk_and_back(self):
+        for ordering, descending in (('pace_seconds', False), ('-pace_seconds', True)):
+            url, pages = f'/api/marathon/?ordering={ordering}&page_size=2', []
+            while url:
+                body = self.client.get(url).json()
+                pages.append(body)
+                url = body['next']
+            self.assertEqual([row['id'] for page in pages for row in page['results']], self.expected(descending))
+            # 从空值所在的页向前翻页，回到的页与正向时一致
+            for previous, page in zip(pages, pages[1:]):
+                back = self.client.get(page['previous']).json()
+                self.assertEqual(back['results'], previous['results'])
+
+
+class TimeStatsTests(TestCase):
+    """成绩秒数字段和各赛事类型的成绩统计"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_seconds_fields(self):
+        marathon = create_marathon(finish_time='3:30:00', pace='5:30/km')
+        self.assertEqual((marathon.finish_seconds, marathon.pace_seconds), (12600, 330))
+        marathon.finish_time, marathon.pace = '25:30', '无'
+        marathon.save(update_fields=['finish_time', 'pace'])
+        marathon.refresh_from_db()
+        self.assertEqual((marathon.finish_seconds, marathon.pace_seconds), (1530, None))
+
+    def test_time_stats(self):
+        create_marathon(finish_time='3:30:00', pace='04:58')
+        create_marathon(finish_time='3:10:00', pace='04:30')
+        create_marathon(event_type='half', finish_time='', pace='')
+        data = self.client.get('/api/marathon/stats/times/').json()
+        self.assertEqual([(row['event_type'], row['count']) for row in data], [('full', 2), ('half', 1)])
+        full, half = data
+        self.assertEqual((full['min_finish_time'], full['max_finish_time'], full['avg_finish_time']),
+                         ('3:10:00', '3:30:00', '3:20:00'))
+        self.assertEqual((full['min_pace'], full['avg_pace_seconds']), ('04:30', 284.0))
+        self.assertIsNone(half['avg_pace'])
+
+
+class ProgressionStatsTests(TestCase):
+    """个人最好成绩和逐年进步"""
+
+    def setUp(self):
+        cache.clear()
+        self.first = create_marathon(event_date=datetime.date(2023, 4, 1), finish_time='4:00:00', pace='05:41')
+        create_marathon(event_date=datetime.date(2023, 11, 1), finish_time='3:50:00', pace='05:27')
+        self.pb = create_marathon(event_date=datetime.date(2024, 11, 1), finish_time='3:30:00', pace='04:58')
+        create_marathon(event_date=datetime.date(2025, 4, 1), finish_time='3:40:00', pace='05:13')
+        create_marathon(event_date=datetime.date(2025, 5, 1), event_type='half', finish_time='', pace='')
+
+    def test_progression(self):
+        data = self.client.get('/api/marathon/stats/progression/').json()
+        # 没有完赛时间的赛事不参与统计
+        self.assertEqual([item['event_type'] for item in data], ['full'])
+        full = data[0]
+        self.assertEqual(full['personal_best']['id'], self.pb.pk)
+        self.assertEqual(full['personal_best']['event_date'], '2024-11-01')
+        self.assertEqual([(year['year'], year['count'], year['best_finish_time']) for year in full['years']],
+                         [(2023, 2, '3:50:00'), (2024, 1, '3:30:00'), (2025, 1, '3:40:00')])
+        self.assertEqual([year['best_finish_delta'] for year in full['years']], [None, -1200, 600])
+        self.assertEqual([year['running_best_finish_time'] for year in full['years']],
+                         ['3:50:00', '3:30:00', '3:30:00'])
+        self.assertEqual(full['years'][0]['avg_pace_seconds'], 334.0)
+        self.assertEqual(full['years'][1]['avg_pace_delta'], -36.0)
+
+    def test_filters(self):
+        data = self.client.get('/api/marathon/stats/progression/', {'start_date': '2024-01-01'}).json()
+        self.assertEqual([year['year'] for year in data[0]['years']], [2024, 2025])
+        self.assertIsNone(data[0]['years'][0]['best_finish_delta'])
+
+    def test_personal_best_tie_prefers_earlier_event(self):
+        create_marathon(event_date=datetime.date(2025, 10, 1), finish_time='3:30:00', pace='04:58')
+        data = self.client.get('/api/marathon/stats/progression/').json()
+        self.assertEqual(data[0]['personal_best']['id'], self.pb.pk)
+
+
+class ListPayloadTests(TestCase):
+    """列表接口直接生成的JSON与序列化器的输出一致"""
+
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            create_marathon(event_name=f'赛事{i}', event_date=datetime.date(2025, 4, 20 + i),
+                            pace='' if i == 1 else f'05:0{i}')
+            create_registration(event_name=f'报名{i}', event_date=datetime.date(2026, 1, 4 + i),
+                                registration_fee='120.50' if i else None)
+
+    def test_matches_serializer(self):
+        for url, queryset, serializer in (
+            ('/api/marathon/', Marathon.objects.order_by('-event_date', '-id'), MarathonListSerializer),
+            ('/api/marathon/registration/', MarathonRegistration.objects.order_by('event_date', 'id'),
+             MarathonRegistrationListSerializer),
+        ):
+            expected = JSONRenderer().render(serializer(queryset, many=True).data)
+            self.assertEqual(self.client.get(url).content, expected)
+            page = self.client.get(url, {'page_size': 2}).json()['results']
+            self.assertEqual(page, serializer(queryset[:2], many=True).data)
+
+    def test_datetime_fields_match_serializer(self):
+        # DateTimeField 与DRF一样输出当前时区、"Z"结尾的时间，其余类型同样一致
+        fields = [field for field in MarathonSerializer.Meta.fields if field != 'certificate']
+        queryset = Marathon.objects.order_by('id')
+        data = rows_to_data(Marathon, fields, queryset.values_list(*fields))
+        expected = [{name: row[name] for name in fields} for row in MarathonSerializer(queryset, many=True).data]
+        self.assertEqual(render_json(data), JSONRenderer().render(expected))
+        self.assertTrue(data[0]['created_at'].endswith('Z'))
+
+    def test_cursor_page_for_each_ordering(self):
+        for url, pagination, fields in (
+            ('/api/marathon/', MarathonCursorPagination, MarathonListSerializer.Meta.fields),
+            ('/api/marathon/registration/', RegistrationCursorPagination,
+             MarathonRegistrationListSerializer.Meta.fields),
+        ):
+            for field in pagination.ordering_fields:
+                for ordering in (field, '-' + field):
+                    seen, next_url = [], f'{url}?page_size=2&ordering={ordering}'
+                    while next_url:
+                        response = self.client.get(next_url)
+                        self.assertEqual(response.status_code, 200, next_url)
+                        body = response.json()
+                        # 只额外读取、不输出排序字段
+                        self.assertTrue(all(list(row) == fields for row in body['results']))
+                        seen.extend(row['id'] for row in body['results'])
+                        next_url = body['next']
+                    self.assertEqual(len(seen), 3, ordering)
+                    self.assertEqual(len(set(seen)), 3, ordering)
+
+
+class RegionIndexTests(TestCase):
+    """进程内地区索引：同步外键不查询地区表，地区表变化后重新加载"""
+
+    def setUp(self):
+        cache.clear()
+        # 迁移只导入了省份和部分城市
+        self.hangzhou = City.objects.get(name='杭州市')
+
+    def tearDown(self):
+        # 测试中新建的地区随事务回滚，而地区数据版本号不会回滚，使索引在下次使用时重新加载
+        invalidate_region_index()
+
+    def test_index_is_reused(self):
+        index = get_region_index()
+        with self.assertNumQueries(0):
+            self.assertIs(get_region_index(), index)
+        self.assertEqual(index.city_id(self.hangzhou.province_id, '杭州市'), self.hangzhou.pk)
+
+    def test_sync_region_fields(self):
+        District.objects.create(name='西湖区', code='330106', city=self.hangzhou)
+        marathon = create_marathon(province='浙江', city='杭州市', district='西湖区')
+        self.assertEqual(marathon.province_obj_id, self.hangzhou.province_id)
+        self.assertEqual(marathon.city_obj_id, self.hangzhou.pk)
+        self.assertEqual(marathon.district_obj.name, '西湖区')
+        # 只有外键时补全名称
+        registration = create_registration(location='', city_obj=self.hangzhou)
+        self.assertEqual(registration.city, '杭州市')
+
+    def test_reload_after_region_changes(self):
+        get_region_index()
+        district = District.objects.create(name='测试新区', code='330199', city=self.hangzhou)
+        self.assertEqual(get_region_index().district_id(self.hangzhou.pk, '测试新区'), district.pk)
+        marathon = create_marathon(province='浙江省', city='杭州市', district='测试新区')
+        self.assertEqual(marathon.district_obj_id, district.pk)
+
+        district.name = '测试改名区'
+        district.save()
+        index = get_region_index()
+        self.assertIsNone(index.district_id(self.hangzhou.pk, '测试新区'))
+        self.assertEqual(index.district_name(district.pk), '测试改名区')
+
+        district.delete()
+        self.assertIsNone(get_region_index().district_name(district.pk))
+
+
+class ImportTests(TestCase):
+    """CSV / NDJSON 批量导入"""
+
+    CSV = (
+        'event_name,event_date,location,province,city,event_type,finish_time,pace,extra\n'
+        '杭州马拉松,2025-11-02,杭州,浙江,杭州市,full,3:20:00,04:44,x\n'
+        ',2025-11-09,上海,,,full,3:30:00,04:58,\n'
+        '半马,2025-13-01,上海,,,half,1:40:00,04:44,\n'
+        '\n'
+        '苏州半马,2025-03-16,苏州,,,half,1:45:00,04:58,\n'
+    )
+
+    def setUp(self):
+        cache.clear()
+        session = self.client.session
+        session['is_admin'] = True
+        session.save()
+
+    def test_parse_rows(self):
+        rows = list(parse_rows(self.CSV, 'csv'))
+        self.assertEqual([line for line, _ in rows], [2, 3, 4, 6])
+        self.assertNotIn(None, rows[0][1])
+        rows = list(parse_rows('{"event_name": "a"}\n\n[1]\n{oops\n', 'ndjson'))
+        self.assertEqual([line for line, _ in rows], [1, 3, 4])
+        self.assertIsInstance(rows[1][1], str)
+        self.assertEqual(detect_format('events.jsonl'), 'ndjson')
+        self.assertEqual(detect_format(content_type='text/csv; charset=utf-8'), 'csv')
+
+    def test_import_csv(self):
+        report = import_rows('marathon', parse_rows(self.CSV, 'csv'))
+        self.assertEqual((report['total'], report['valid'], report['created']), (4, 2, 2))
+        self.assertEqual([error['line'] for error in report['errors']], [3, 4])
+        self.assertIn('event_name', report['errors'][0]['errors'])
+        self.assertIn('event_date', report['errors'][1]['errors'])
+        self.assertEqual(report['ignored_fields'], ['extra'])
+        marathon = Marathon.objects.get(event_name='杭州马拉松')
+        # 地区名称标准化并解析外键，成绩秒数与 save() 一致
+        self.assertEqual((marathon.province, marathon.city_obj.name), ('浙江省', '杭州市'))
+        self.assertEqual((marathon.finish_seconds, marathon.pace_seconds), (12000, 284))
+
+    def test_import_invalidates_list(self):
+        etag = self.client.get('/api/marathon/')['ETag']
+        self.assertEqual(self.client.get('/api/marathon/').json(), [])
+        import_rows('marathon', parse_rows(self.CSV, 'csv'))
+        self.assertEqual(len(self.client.get('/api/marathon/').json()), 2)
+        self.assertEqual(self.client.get('/api/marathon/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_dry_run_and_strict(self):
+        report = import_rows('marathon', parse_rows(self.CSV, 'csv'), dry_run=True)
+        self.assertEqual((report['valid'], report['created'], report['dry_run']), (2, 0, True))
+        report = import_rows('marathon', parse_rows(self.CSV, 'csv'), strict=True)
+        self.assertEqual(report['created'], 0)
+        self.assertFalse(Marathon.objects.exists())
+
+    def test_import_endpoint(self):
+        body = '\n'.join([
+            '{"event_name": "厦门马拉松", "event_date": "2026-01-04", "location": "厦门", '
+            '"registration_status": "won", "registration_fee": "200"}',
+            '{"event_name": "无锡马拉松", "event_date": "2026-03-22", "location": "无锡", "registration_status": "x"}',
+        ])
+        response = self.client.post('/api/marathon/import/?kind=registration', body,
+                                    content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(MarathonRegistration.objects.get().registration_fee, 200)
+
+        response = self.client.post('/api/marathon/import/?kind=registration&strict=1', body,
+                                    content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(MarathonRegistration.objects.count(), 1)
+
+    def test_import_endpoint_errors(self):
+        response = self.client.post('/api/marathon/import/?kind=user', '', content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/marathon/import/', 'a,b\n', content_type='text/plain')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/marathon/import/', '杭州'.encode('gbk'), content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.client.logout()
+        response = self.client.post('/api/marathon/import/', self.CSV, content_type='text/csv')
+        self.assertEqual(response.status_code, 403)
+
+
+class GeocoderTests(TestCase):
+    """地点文本识别省市区（使用内存中的地区索引，不依赖数据库中的地区数据）"""
+
+    def setUp(self):
+        self.matcher = RegionMatcher(RegionIndex(
+            [(1, '北京市'), (2, '吉林省'), (3, '湖北省'), (4, '江西省'), (5, '上海市'), (6, '新疆维吾尔自治区')],
+            [(11, '北京市', 1), (21, '长春市', 2), (31, '武汉市', 3), (41, '南昌市', 4), (51, '上海市', 5),
+             (61, '乌鲁木齐市', 6)],
+            [(111, '朝阳区', 11), (211, '朝阳区', 21), (311, '洪山区', 31), (411, '东湖区', 41),
+             (511, '浦东新区', 51), (611, '乌鲁木齐县', 61)],
+        ))
+
+    def match(self, text):
+        result = self.matcher.match(text)
+        return result and (result['province'], result['city'], result['district'])
+
+    def test_most_specific_chain(self):
+        self.assertEqual(self.match('武汉洪山体育中心'), ('湖北省', '武汉市', '洪山区'))
+        self.assertEqual(self.match('上海浦东新区世纪公园'), ('上海市', '上海市', '浦东新区'))
+        self.assertEqual(self.match('乌鲁木齐'), ('新疆维吾尔自治区', '乌鲁木齐市', None))
+        self.assertIsNone(self.match('奥林匹克森林公园'))
+
+    def test_same_name_resolved_by_ancestor(self):
+        self.assertEqual(self.match('北京朝阳'), ('北京市', '北京市', '朝阳区'))
+        self.assertEqual(self.match('长春朝阳区'), ('吉林省', '长春市', '朝阳区'))
+        # 只有同名区县时上级无法确定
+        self.assertIsNone(self.match('朝阳区'))
+
+    def test_conflicting_ancestor_does_not_win(self):
+        # 东湖区在南昌市，与文本中的武汉矛盾：不能因为级别更深而选中南昌市东湖区
+        self.assertEqual(self.match('武汉东湖'), ('湖北省', '武汉市', None))
+        self.assertEqual(self.match('湖北东湖'), ('湖北省', None, None))
+        self.assertEqual(self.match('南昌东湖'), ('江西省', '南昌市', '东湖区'))
+
+
+class BatchCommandTests(TestCase):
+    """分批修复命令：差异输出、断点续跑"""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(BATCH_CHECKPOINT_DIR=Path(directory.name))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.checkpoint_path = Path(directory.name) / 'migrate_location_data.json'
+
+    def run_command(self, name, *args):
+        out = io.StringIO()
+        call_command(name, *args, stdout=out)
+        return out.getvalue()
+
+    def test_fix_pace_format(self):
+        marathons = [create_marathon(pace='5:30/km'), create_marathon(pace='04:58'), create_marathon(pace='abc')]
+        output = self.run_command('fix_pace_format', '--dry-run')
+        # 没有读取的 pace_seconds 列输出数据库中的原值
+        self.assertIn(f"ID {marathons[0].pk}: pace: '5:30/km' -> '05:30'，pace_seconds: 330 -> 330", output)
+        self.assertIn('无法识别的配速格式 "abc"', output)
+        self.assertEqual(Marathon.objects.get(pk=marathons[0].pk).pace, '5:30/km')
+
+        self.run_command('fix_pace_format', '--batch-size', '1')
+        self.assertEqual(Marathon.objects.get(pk=marathons[0].pk).pace, '05:30')
+        self.assertEqual(list(self.checkpoint_path.parent.iterdir()), [])
+
+    def test_diff_limit(self):
+        for _ in range(3):
+            create_marathon(pace='5:30/km')
+        output = self.run_command('fix_pace_format', '--dry-run', '--diff-limit', '2', '--batch-size', '1')
+        self.assertEqual(output.count('pace_seconds'), 2)
+        self.assertEqual(output.count('更多差异省略'), 1)
+
+    def test_resume_from_checkpoint(self):
+        first, second = create_marathon(location='杭州'), create_marathon(location='杭州')
+        Marathon.objects.update(province='', city='', province_obj=None, city_obj=None)
+        self.checkpoint_path.write_text(json.dumps({'马拉松赛事': first.pk}))
+        self.run_command('migrate_location_data', '--model', 'marathon')
+        self.assertEqual(Marathon.objects.get(pk=first.pk).province, '')
+        self.assertEqual(Marathon.objects.get(pk=second.pk).province, '浙江省')
+        self.assertFalse(self.checkpoint_path.exists())
+
+        # --restart 忽略断点
+        self.checkpoint_path.write_text(json.dumps({'马拉松赛事': second.pk}))
+        self.run_command('migrate_location_data', '--model', 'marathon', '--restart')
+        self.assertEqual(Marathon.objects.get(pk=first.pk).province, '浙江省')
+
+    def test_only_processed_targets_are_cleared(self):
+        registration = create_registration(location='杭州')
+        MarathonRegistration.objects.update(province='', province_obj=None)
+        self.checkpoint_path.write_text(json.dumps({'马拉松赛事': 1, '报名赛事': registration.pk}))
+        self.run_command('migrate_location_data', '--model', 'marathon', '--restart')
+        self.assertEqual(json.loads(self.checkpoint_path.read_text()), {'报名赛事': registration.pk})
+        # 报名赛事的断点仍然有效
+        self.run_command('migrate_location_data', '--model', 'registration')
+        self.assertEqual(MarathonRegistration.objects.get().province, '')
+        self.assertFalse(self.checkpoint_path.exists())
+
+
+class AuditRegionFieldsTests(TestCase):
+    """地区名称与外键一致性检查"""
+
+    def setUp(self):
+        cache.clear()
+        self.zhejiang = Province.objects.get(name='浙江省')
+        self.hangzhou = City.objects.get(name='杭州市')
+
+    def run_command(self, *args):
+        out = io.StringIO()
+        call_command('audit_region_fields', *args, stdout=out)
+        return out.getvalue()
+
+    def test_relink_unnormalized_names(self):
+        marathon = create_marathon(province='浙江省', city='杭州市')
+        # 绕过 save()，模拟旧数据中未标准化、未关联外键的名称
+        Marathon.objects.filter(pk=marathon.pk).update(province='浙江', province_obj=None, city_obj=None)
+        output = self.run_command('--model', 'marathon')
+        self.assertIn('有名称无外键（unlinked）', output)
+        self.assertEqual(Marathon.objects.get(pk=marathon.pk).province_obj_id, None)
+
+        self.run_command('--model', 'marathon', '--fix')
+        marathon.refresh_from_db()
+        self.assertEqual((marathon.province, marathon.province_obj_id), ('浙江省', self.zhejiang.pk))
+        # 省份修复后城市在正确的上级下重新关联
+        self.assertEqual(marathon.city_obj_id, self.hangzhou.pk)
+        self.assertIn('全部一致', self.run_command())
+
+    def test_fill_name_from_foreign_key(self):
+        registration = create_registration(province='浙江省')
+        MarathonRegistration.objects.filter(pk=registration.pk).update(province='')
+        self.run_command('--fix')
+        registration.refresh_from_db()
+        self.assertEqual(registration.province, '浙江省')
+
+
+class StubMapHandler(BaseHTTPRequestHandler):
+    """
+    模拟地图数据上游：路径为 /{数据源}/{代码}.json，按 server.modes[数据源] 返回：
+        ok       200 + GeoJSON（带ETag，If-None-Match 匹配时返回304）
+        slow     等待 server.slow_seconds 秒后同 ok
+        error    500
+        invalid  200 + 非JSON内容
+    """
+
+    def do_GET(self):
+        server = self.server
+        source = self.path.strip('/').split('/')[0]
+        with server.lock:
+            server.hits[source] = server.hits.get(source, 0) + 1
+            server.active += 1
+        try:
+            mode = server.modes.get(source, 'ok')
+            if mode == 'slow':
+                time.sleep(server.slow_seconds)
+            if mode == 'error':
+                self.send_response(500)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if mode == 'invalid':
+                body = b'var map = {};'
+            else:
+                version = server.versions.get(source, 1)
+                etag = f'"{source}-{version}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                body = json.dumps({
+                    'type': 'FeatureCollection', 'features': [],
+                    'properties': {'source': source, 'version': version},
+                }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            if mode != 'invalid':
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MapDataTestCase(TestCase):
+    """在本地模拟的上游数据源（primary、backup）上测试地图数据代理"""
+    # 子类覆盖的地图数据设置
+    map_settings = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubMapHandler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        server = self.server
+        server.modes, server.hits, server.versions, server.active, server.slow_seconds = {}, {}, {}, 0, 0.5
+        mapdata._source_health.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        sources = [f'{self.base_url}/primary/{{code}}.json', f'{self.base_url}/backup/{{code}}.json']
+        settings_override = override_settings(**{
+            'MAP_DATA_DIR': directory.name,
+            'MAP_DATA_SOURCES': {'china': sources, 'province': sources},
+            'MAP_DATA_TIMEOUT': 2,
+            'MAP_DATA_HEDGE_DELAY': 0.1,
+            'MAP_DATA_BREAKER_THRESHOLD': 3,
+            'MAP_DATA_BREAKER_COOLDOWN': 60,
+            'MAP_DATA_NEGATIVE_TTL': 30,
+            **self.map_settings,
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # 清理在临时目录删除之前执行（addCleanup 后进先出）
+        self.addCleanup(self.wait_for_upstream)
+        self.templates = sources
+
+    def wait_for_upstream(self):
+        """等待后台刷新线程和还没返回的上游请求结束"""
+        for thread in threading.enumerate():
+            if thread.name.startswith('map-data-refresh-'):
+                thread.join(5)
+        deadline = time.monotonic() + 5
+        while self.server.active and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def read_map(self, code='110000'):
+        path = mapdata.get_map_file(code)
+        if path is None:
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['properties']
+
+    def health(self, index):
+        return mapdata.source_health(self.templates[index])
+
+
+class MapDataFetchTests(MapDataTestCase):
+    """数据源对冲、回退、负缓存和 stale-while-revalidate"""
+
+    def test_fallback_to_backup(self):
+        self.server.modes['primary'] = 'error'
+        self.assertEqual(self.read_map(), {'source': 'backup', 'version': 1})
+        self.assertEqual(self.server.hits, {'primary': 1, 'backup': 1})
+        self.assertEqual(self.health(0).stats()['failures'], 1)
+        # 本地有数据后不再请求上游
+        self.assertEqual(self.read_map()['source'], 'backup')
+        self.assertEqual(self.server.hits, {'primary': 1, 'backup': 1})
+
+    def test_invalid_payload_falls_back(self):
+        self.server.modes['primary'] = 'invalid'
+        self.assertEqual(self.read_map()['source'], 'backup')
+        self.assertEqual(self.health(0).stats()['invalid'], 1)
+
+    def test_hedge_slow_primary(self):
+        self.server.modes['primary'] = 'slow'
+        start = time.monotonic()
+        self.assertEqual(self.read_map()['source'], 'backup')
+        # 不等待主数据源：对冲间隔后请求备用数据源
+        self.assertLess(time.monotonic() - start, self.server.slow_seconds)
+
+    def test_negative_cache(self):
+        self.server.modes.update(primary='error', backup='error')
+        self.assertIsNone(self.read_map())
+        self.assertEqual(self.server.hits, {'primary': 1, 'backup': 1})
+        # 负缓存期间直接返回失败，不再请求上游
+        self.server.modes.clear()
+        self.assertIsNone(self.read_map())
+        self.assertEqual(self.server.hits, {'primary': 1, 'backup': 1})
+        cache.delete(mapdata.NEGATIVE_CACHE_KEY.format(code='110000'))
+        self.assertEqual(self.read_map()['source'], 'primary')
+
+    def test_stale_while_revalidate(self):
+        self.assertEqual(self.read_map(), {'source': 'primary', 'version': 1})
+        store = mapdata.get_store()
+        store.write_meta('110000', dict(store.read_meta('110000'), fetched_at=0))
+        self.server.versions.update(primary=2, backup=2)
+        self.server.modes.update(primary='slow', backup='slow')
+        # 过期的数据立即返回，同时在后台刷新
+        start = time.monotonic()
+        self.assertEqual(self.read_map()['version'], 1)
+        self.assertLess(time.monotonic() - start, self.server.slow_seconds)
+        self.wait_for_upstream()
+        self.assertEqual(self.read_map()['version'], 2)
+        self.assertFalse(store.is_stale(store.read_meta('110000')))
+
+    def test_conditional_refresh(self):
+        self.read_map()
+        store = mapdata.get_store()
+        store.write_meta('110000', dict(store.read_meta('110000'), fetched_at=0))
+        # 上游数据没有变化时返回304，只更新获取时间
+        self.assertEqual(mapdata.refresh_map_data('110000'), store.read('110000')[0])
+        self.assertEqual(self.health(0).stats()['not_modified'], 1)
+        self.assertFalse(store.is_stale(store.read_meta('110000')))
+
+    def test_stale_data_kept_when_upstream_fails(self):
+        self.read_map()
+        store = mapdata.get_store()
+        store.write_meta('110000', dict(store.read_meta('110000'), fetched_at=0))
+        self.server.modes.update(primary='error', backup='error')
+        self.assertEqual(json.loads(mapdata.refresh_map_data('110000'))['properties']['source'], 'primary')
+        self.assertTrue(cache.get(mapdata.NEGATIVE_CACHE_KEY.format(code='110000')))
+
+
+class MapDataViewTests(MapDataTestCase):
+    """地图数据代理接口"""
+
+    def test_map_data(self):
+        response = self.client.get('/api/marathon/map-data/', {'code': '330000'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(json.loads(body)['properties']['source'], 'primary')
+        response = self.client.get('/api/marathon/map-data/', {'code': '330000', 'detail': 'low'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_all_sources_down(self):
+        self.server.modes.update(primary='error', backup='error')
+        response = self.client.get('/api/marathon/map-data/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['features'], [])
+        self.assertIn('error', response.json())
+
+    def test_invalid_params(self):
+        for params in ({'code': '11'}, {'detail': 'tiny'}, {'output': 'svg'}):
+            self.assertEqual(self.client.get('/api/marathon/map-data/', params).status_code, 400)
+        self.assertEqual(self.server.hits, {})
+
+
+class MapDataBreakerTests(MapDataTestCase):
+    """数据源熔断器：断开、试探和恢复"""
+    map_settings = {'MAP_DATA_BREAKER_THRESHOLD': 1, 'MAP_DATA_BREAKER_COOLDOWN': 0.2}
+
+    def fetch(self):
+        return mapdata.fetch_map_data('110000')
+
+    def states(self):
+        return [self.health(0).stats()['state'], self.health(1).stats()['state']]
+
+    def test_recovery(self):
+        self.server.modes.update(primary='error', backup='error')
+        self.assertIsNone(self.fetch())
+        self.assertEqual(self.states(), ['open', 'open'])
+        # 冷却期内不请求
+        self.assertIsNone(self.fetch())
+        self.assertEqual(self.server.hits, {'primary': 1, 'backup': 1})
+
+        time.sleep(0.25)
+        self.server.modes.clear()
+        self.assertIsNotNone(self.fetch())
+        # 主数据源试探成功；没有轮到的备用数据源保持断开，不占用试探机会
+        self.assertEqual(self.states(), ['closed', 'open'])
+        self.assertEqual(self.server.hits, {'primary': 2, 'backup': 1})
+
+        # 主数据源故障时备用数据源可以试探并恢复
+        self.server.modes['primary'] = 'error'
+        body, meta = self.fetch()
+        self.assertEqual(json.loads(body)['properties']['source'], 'backup')
+        self.assertEqual(self.states(), ['open', 'closed'])
+
+    def test_failed_probe_reopens(self):
+        self.server.modes.update(primary='error', backup='error')
+        self.fetch()
+        time.sleep(0.25)
+        self.assertIsNone(self.fetch())
+        self.assertEqual(self.states(), ['open', 'open'])
+        self.assertEqual(self.server.hits, {'primary': 2, 'backup': 2})
+
+    def test_release_unsent_probe(self):
+        health = self.health(0)
+        health.record('failures', 0)
+        time.sleep(0.25)
+        self.assertTrue(health.allow())
+        self.assertEqual(health.state, health.HALF_OPEN)
+        self.assertFalse(health.allow())
+        health.release()
+        self.assertEqual(health.state, health.OPEN)
+        self.assertTrue(health.allow())
+
+
+class DataVersionTests(TestCase):
+    """数据版本号：永不过期，并发递增不丢失"""
+    namespace = 'test_data_version'
+
+    def setUp(self):
+        self.version_cache = caches[settings.DATA_VERSION_CACHE_ALIAS]
+        self.key = VERSION_KEY.format(namespace=self.namespace)
+        self.version_cache.delete(self.key)
+        self.addCleanup(self.version_cache.delete, self.key)
+
+    def expiry(self):
+        """文件缓存中该键的过期时间（None为永不过期）"""
+        path = self.version_cache._key_to_file(self.key)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def test_versions_never_expire(self):
+        version = get_data_version(self.namespace)
+        self.assertIsNone(self.expiry())
+        bump_data_version(self.namespace)
+        self.assertIsNone(self.expiry())
+        self.assertEqual(get_data_version(self.namespace), version + 1)
+
+    def test_reinitialized_after_eviction(self):
+        version = get_data_version(self.namespace)
+        self.version_cache.delete(self.key)
+        bump_data_version(self.namespace)
+        self.assertGreaterEqual(get_data_version(self.namespace), version)
+        self.assertIsNone(self.expiry())
+
+    def test_concurrent_bumps(self):
+        version = get_data_version(self.namespace)
+        threads = [threading.Thread(target=lambda: [bump_data_version(self.namespace) for _ in range(10)])
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(get_data_version(self.namespace), version + 80)
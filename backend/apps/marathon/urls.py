@@ -6,7 +6,14 @@ urlpatterns = [
     path('', views.MarathonListView.as_view(), name='marathon-list'),  # 获取所有马拉松赛事
     path('<int:pk>/', views.MarathonDetail.as_view(), name='marathon-detail'),  # 获取单个马拉松赛事详情
     path('<int:pk>/upload-certificate/', views.UploadCertificate.as_view(), name='upload-certificate'),  # 上传完赛证书
+    path('import/', views.ImportEvents.as_view(), name='import-events'),  # 批量导入赛事/报名赛事（CSV或NDJSON）
+    # 统计API
+    path('stats/regions/', views.RegionStats.as_view(), name='region-stats'),  # 省市区三级赛事统计
+    path('stats/times/', views.TimeStats.as_view(), name='time-stats'),  # 各赛事类型的配速和完赛时间统计
+    path('stats/progression/', views.ProgressionStats.as_view(), name='progression-stats'),  # 个人最好成绩和逐年进步
     # 级联选择API
+    path('regions/tree/', views.RegionTree.as_view(), name='region-tree'),  # 省市区完整树（可只取一个省/市的子树）
+    path('regions/search/', views.RegionSearch.as_view(), name='region-search'),  # 地区名称/简称/拼音首字母自动补全
     path('province/', views.ProvinceList.as_view(), name='province-list'),  # 获取所有省份列表
     path('city/', views.CityListByProvince.as_view(), name='city-list'),  # 根据省份获取城市列表
     path('district/', views.DistrictListByCity.as_view(), name='district-list'),  # 根据城市获取区县列表
@@ -15,4 +22,5 @@ urlpatterns = [
     path('registration/<int:pk>/', views.MarathonRegistrationDetail.as_view(), name='registration-detail'),  # 获取单个报名赛事详情
     # 地图数据代理API
     path('map-data/', views.MapDataProxy.as_view(), name='map-data-proxy'),  # 地图数据代理
+    path('map-data/sources/', views.MapDataSourceStats.as_view(), name='map-data-sources'),  # 地图数据源熔断状态和成功率
 ]
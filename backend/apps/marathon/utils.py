@@ -0,0 +1,53 @@
+"""马拉松应用的通用工具函数"""
+import re
+
+# 时间字符串中的数字段，如 "3:30:00"、"05:30"、"5:30/km"
+_TIME_PARTS = re.compile(r'^\s*(\d{1,3})(?::(\d{1,2}))?(?::(\d{1,2}))?')
+
+
+def _parse_time_parts(value):
+    """把 h:mm:ss / mm:ss 字符串拆分为数字列表，无法解析时返回None"""
+    if not value:
+        return None
+    match = _TIME_PARTS.match(str(value))
+    if not match or match.group(2) is None:
+        return None
+    return [int(part) for part in match.groups() if part is not None]
+
+
+def parse_pace_seconds(pace):
+    """
+    配速字符串转换为每公里秒数：'05:30' / '5:30' / '5:30/km' -> 330
+    无法解析或为0时返回None（与前端 convertPaceToMinutes 一致）
+    """
+    parts = _parse_time_parts(pace)
+    if not parts or len(parts) != 2 or parts[1] >= 60:
+        return None
+    seconds = parts[0] * 60 + parts[1]
+    return seconds or None
+
+
+def parse_duration_seconds(duration):
+    """
+    完赛时间字符串转换为秒数：'3:30:00' -> 12600，'25:30'（分:秒）-> 1530
+    无法解析或为0时返回None
+    """
+    parts = _parse_time_parts(duration)
+    if not parts or any(part >= 60 for part in parts[1:]):
+        return None
+    if len(parts) == 3:
+        hours, minutes, seconds = parts
+    else:
+        hours, (minutes, seconds) = 0, parts
+    total = hours * 3600 + minutes * 60 + seconds
+    return total or None
+
+
+def format_seconds(seconds, with_hours=False):
+    """秒数格式化为 mm:ss（with_hours时为 h:mm:ss），None原样返回"""
+    if seconds is None:
+        return None
+    seconds = int(round(seconds))
+    if with_hours:
+        return f'{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+    return f'{seconds // 60:02d}:{seconds % 60:02d}'
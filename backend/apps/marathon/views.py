@@ -2,31 +2,54 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
+from django.utils.cache import patch_cache_control, patch_vary_headers, get_conditional_response
 from django.utils.decorators import method_decorator
 from .models import Marathon, Province, City, District, MarathonRegistration
 from .serializers import MarathonSerializer, MarathonListSerializer, MarathonRegistrationSerializer, MarathonRegistrationListSerializer
-from .permissions import IsAdminOrReadOnly
+from .permissions import IsAdminOrReadOnly, IsAdmin
+from .pagination import MarathonCursorPagination, RegistrationCursorPagination
+from .filters import filter_events
+from .stats import region_stats, time_stats, progression_stats
+from .payloads import build_list_payload
+from .regions import region_tree_payload
+from .region_search import search_regions
+from .importers import IMPORT_KINDS, IMPORT_FORMATS, detect_format, parse_rows, import_rows
+from .mapdata import ADCODE_RE, CHINA_ADCODE, OUTPUT_FORMATS, get_map_file, open_map_file, source_stats
+from .geosimplify import DETAIL_LEVELS, FULL_DETAIL
+from django.http import HttpResponse, FileResponse
+from .cache import (
+    MARATHON_NAMESPACE, REGISTRATION_NAMESPACE, list_cache_key,
+    marathon_list_validators, marathon_detail_validators, registration_list_validators,
+)
+from apps.common.conditional import conditional_get
 from django.conf import settings
 from django.core.cache import cache
 import os
-import requests
-import json
 
 """马拉松赛事视图"""
 class MarathonListView(APIView):
     """马拉松赛事列表视图"""
     permission_classes = [IsAdminOrReadOnly]
     
-    # 暂时禁用缓存以便调试
-    # @method_decorator(cache_page(settings.CACHE_TIMEOUT['MEDIUM']))  # 缓存30分钟
+    # 条件请求：数据未变化时返回304，不重新传输列表
+    @method_decorator(conditional_get(marathon_list_validators))
     def get(self, request):
-        """获取所有马拉松赛事"""
-        # 使用select_related优化外键查询，减少SQL查询次数
-        # province_obj, city_obj, district_obj是外键字段，使用select_related可以一次性加载相关对象
-        marathons = Marathon.objects.select_related('province_obj', 'city_obj', 'district_obj').all()
-        # 使用精简序列化器减少数据传输量
-        serializer = MarathonListSerializer(marathons, many=True)
-        return Response(serializer.data)
+        """
+        获取马拉松赛事列表
+        支持按日期范围、年份、赛事类型、地区过滤，以及ordering排序（见filters.py）
+        带cursor或page_size参数时按 (event_date, id) 游标分页，否则返回全部赛事（兼容模式）
+        """
+        # 按数据版本号缓存编码后的JSON字节，赛事写入后版本号递增，旧缓存自动失效（见signals.py）
+        cache_key = list_cache_key(MARATHON_NAMESPACE, request)
+        payload = cache.get(cache_key)
+        if payload is None:
+            # 只读取精简序列化器的字段，直接由 .values_list() 生成JSON（见payloads.py），不经过ModelSerializer
+            marathons = filter_events(Marathon.objects.all(), request.query_params)
+            payload = build_list_payload(
+                marathons, MarathonListSerializer.Meta.fields, MarathonCursorPagination(), request)
+            cache.set(cache_key, payload, settings.CACHE_TIMEOUT['MEDIUM'])  # 缓存30分钟
+        return HttpResponse(payload, content_type='application/json')
 
     def post(self, request):
         """添加新的马拉松赛事"""
@@ -48,6 +71,7 @@ class MarathonDetail(APIView):
         except Marathon.DoesNotExist:
             return None
 
+    @method_decorator(conditional_get(marathon_detail_validators))
     def get(self, request, pk):
         """获取单个马拉松赛事详情"""
         marathon = self.get_object(pk)
@@ -110,7 +134,7 @@ class UploadCertificate(APIView):
             if os.path.exists(old_certificate_path):
                 os.remove(old_certificate_path)
 
-        # 保存新证书
+        # 保存新证书（save会触发post_save信号，赛事列表缓存随之失效）
         marathon.certificate = request.FILES['certificate']
         marathon.save()
 
@@ -118,6 +142,102 @@ class UploadCertificate(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class ImportEvents(APIView):
+    """批量导入赛事/报名赛事（CSV或NDJSON）"""
+    permission_classes = [IsAdminOrReadOnly]
+
+    def post(self, request):
+        """
+        批量导入，参数（查询参数）：
+            kind:         marathon（默认）或 registration
+            file_format:  csv 或 ndjson，不传时根据文件名/Content-Type推断
+            dry_run=1:    只校验不写入
+            strict=1:     任意一行出错时整体不导入
+        文件以multipart的file字段上传，或直接作为请求体（Content-Type: text/csv / application/x-ndjson）
+        """
+        kind = request.query_params.get('kind', 'marathon')
+        if kind not in IMPORT_KINDS:
+            return Response({'error': f'不支持的导入类型: {kind}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'error': '未提供导入文件'}, status=status.HTTP_400_BAD_REQUEST)
+            raw = upload.read()
+            fmt = detect_format(upload.name, upload.content_type)
+        else:
+            raw = request.body
+            fmt = detect_format(content_type=request.content_type)
+        fmt = request.query_params.get('file_format') or fmt
+        if fmt not in IMPORT_FORMATS:
+            return Response({'error': '无法识别导入格式，请通过file_format指定csv或ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # utf-8-sig 兼容Excel导出的带BOM的CSV
+            text = raw.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return Response({'error': '导入文件必须是UTF-8编码'}, status=status.HTTP_400_BAD_REQUEST)
+
+        strict = request.query_params.get('strict') in ('1', 'true')
+        report = import_rows(
+            kind, parse_rows(text, fmt),
+            dry_run=request.query_params.get('dry_run') in ('1', 'true'),
+            strict=strict,
+        )
+        if strict and report['errors']:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
+
+
+"""统计API视图"""
+class RegionStats(APIView):
+    """按省、市、区县统计赛事数量和平均配速（地图下钻使用）"""
+    permission_classes = [IsAdminOrReadOnly]
+
+    @method_decorator(conditional_get(marathon_list_validators))
+    def get(self, request):
+        """
+        获取三级地区统计，支持与赛事列表相同的过滤参数（如year、event_type）
+        结果按赛事数据版本号缓存，赛事写入后自动失效
+        """
+        cache_key = list_cache_key(MARATHON_NAMESPACE, request, name='region_stats')
+        data = cache.get(cache_key)
+        if data is None:
+            data = region_stats(filter_events(Marathon.objects.all(), request.query_params))
+            cache.set(cache_key, data, settings.CACHE_TIMEOUT['MEDIUM'])  # 缓存30分钟
+        return Response(data)
+
+
+class TimeStats(APIView):
+    """按赛事类型统计配速和完赛时间的最小值、最大值、平均值"""
+    permission_classes = [IsAdminOrReadOnly]
+
+    @method_decorator(conditional_get(marathon_list_validators))
+    def get(self, request):
+        """获取各赛事类型的成绩统计，支持与赛事列表相同的过滤参数"""
+        cache_key = list_cache_key(MARATHON_NAMESPACE, request, name='time_stats')
+        data = cache.get(cache_key)
+        if data is None:
+            data = time_stats(filter_events(Marathon.objects.all(), request.query_params))
+            cache.set(cache_key, data, settings.CACHE_TIMEOUT['MEDIUM'])  # 缓存30分钟
+        return Response(data)
+
+
+class ProgressionStats(APIView):
+    """各赛事类型的个人最好成绩、年度最好成绩、年度平均配速和逐年进步幅度"""
+    permission_classes = [IsAdminOrReadOnly]
+
+    @method_decorator(conditional_get(marathon_list_validators))
+    def get(self, request):
+        """获取成绩进步分析，支持与赛事列表相同的过滤参数"""
+        cache_key = list_cache_key(MARATHON_NAMESPACE, request, name='progression_stats')
+        data = cache.get(cache_key)
+        if data is None:
+            data = progression_stats(filter_events(Marathon.objects.all(), request.query_params))
+            cache.set(cache_key, data, settings.CACHE_TIMEOUT['MEDIUM'])  # 缓存30分钟
+        return Response(data)
+
+
 """级联选择API视图"""
 class ProvinceList(APIView):
     """获取所有省份列表"""
@@ -169,67 +289,119 @@ class DistrictListByCity(APIView):
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _region_tree_scope(request):
+    """解析地区树的子树参数：(province_id, city_id)，参数不是整数时抛出ValueError"""
+    province_id = request.GET.get('province')
+    city_id = request.GET.get('city')
+    return (int(province_id) if province_id else None, int(city_id) if city_id else None)
+
+
+def region_tree_etag(request, *args, **kwargs):
+    """地区树的强ETag（取自缓存的编码结果），参数无效或子树不存在时返回None"""
+    try:
+        payload = region_tree_payload(*_region_tree_scope(request))
+    except ValueError:
+        return None
+    return payload[1] if payload else None
+
+
+class RegionTree(APIView):
+    """省市区完整树，替代省份/城市/区县三个级联接口"""
+    permission_classes = [IsAdminOrReadOnly]
+
+    @method_decorator(condition(etag_func=region_tree_etag))
+    def get(self, request):
+        """
+        获取省→市→区县树（紧凑嵌套数组，格式见 RegionIndex.tree）
+            province=<ID>: 只返回该省的城市（含区县）
+            city=<ID>:     只返回该市的区县
+        响应按地区数据版本号预先编码缓存，带强ETag，客户端可长期缓存；
+        请求带 v=<当前ETag> 时（版本化URL）返回 immutable，客户端在地区数据更新前无需重新验证
+        """
+        try:
+            scope = _region_tree_scope(request)
+        except ValueError:
+            return Response({'error': '省份ID和城市ID必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+        result = region_tree_payload(*scope)
+        if result is None:
+            return Response({'error': '地区不存在'}, status=status.HTTP_404_NOT_FOUND)
+
+        payload, etag = result
+        response = HttpResponse(payload, content_type='application/json')
+        if request.GET.get('v') == etag.strip('"'):
+            patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=settings.CACHE_TIMEOUT['LONG'])
+        return response
+
+
+class RegionSearch(APIView):
+    """地区名称自动补全：按名称、简称或拼音首字母前缀检索省市区"""
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get(self, request):
+        """
+        检索地区，参数：
+            q:      检索词，如"浦东"、"pd"
+            limit:  返回数量，默认10，最多50
+        每个结果带完整的上级路径（省→市→区县），检索在进程内的索引上完成，不查询数据库
+        """
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({'error': '缺少检索词'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response({'error': 'limit必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(search_regions(query, limit=limit))
+
+
+def map_file_response(request, path):
+    """按客户端的 Accept-Encoding 返回地图数据文件或其预压缩版本，带 ETag（每种编码各自不同）"""
+    f, encoding = open_map_file(path, request.META.get('HTTP_ACCEPT_ENCODING'))
+    stat = os.fstat(f.fileno())
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}-{encoding or "identity"}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        f.close()
+    else:
+        response = FileResponse(f, content_type='application/json')
+        # FileResponse 会根据文件名加上 Content-Disposition，地图数据不需要
+        del response['Content-Disposition']
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
 class MapDataProxy(APIView):
     """地图数据代理，避免前端CORS问题"""
     permission_classes = [IsAdminOrReadOnly]  # 允许游客读取
     
     def get(self, request):
-        """代理获取地图数据（带缓存）"""
-        code = request.GET.get('code', '100000')  # 默认是中国地图 100000
-        
-        # 检查缓存
-        cache_key = f'map_data_{code}'
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data, content_type='application/json')
-        
-        # 多个备用数据源（按优先级排序，优先使用阿里云，因为GitHub可能较慢）
-        map_data_sources = []
-        
-        # 对于中国地图，使用更可靠的数据源
-        if code == '100000':
-            map_data_sources = [
-                f'https://geo.datav.aliyun.com/areas_v3/bound/{code}_full.json',  # 优先使用阿里云
-                'https://raw.githubusercontent.com/DataV-Team/datav.geo.atlas/master/china.json',
-                'https://raw.githubusercontent.com/lyhmyd1211/GeoMapData_CN/master/geojson/100000_full.json',
-            ]
-        else:
-            # 省份地图数据源
-            map_data_sources = [
-                f'https://geo.datav.aliyun.com/areas_v3/bound/{code}_full.json',  # 优先使用阿里云
-                f'https://raw.githubusercontent.com/lyhmyd1211/GeoMapData_CN/master/geojson/{code}_full.json',
-            ]
-        
-        # 减少超时时间到3秒，加快失败重试
-        timeout = 3
-        
-        for source_url in map_data_sources:
-            try:
-                response = requests.get(
-                    source_url,
-                    timeout=timeout,
-                    headers={
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                        'Accept': 'application/json',
-                    }
-                )
-                
-                if response.status_code == 200:
-                    try:
-                        map_data = response.json()
-                        # 验证数据格式
-                        if isinstance(map_data, dict) and ('features' in map_data or 'type' in map_data):
-                            # 缓存数据（2小时，因为地图数据基本不变）
-                            cache.set(cache_key, map_data, settings.CACHE_TIMEOUT['LONG'])
-                            return Response(map_data, content_type='application/json')
-                    except json.JSONDecodeError:
-                        # 如果不是JSON，尝试作为文本处理（可能是JS文件）
-                        continue
-                        
-            except (requests.exceptions.RequestException, requests.exceptions.Timeout) as e:
-                # 继续尝试下一个数据源
-                continue
-        
+        """
+        代理获取地图数据，参数：
+            code:    行政区划代码，默认是中国地图 100000
+            detail:  显示级别 low（全国视图）/ medium（省级视图）/ high（市级视图）/ full（原始数据，默认）
+            output:  geojson（默认）或 topojson（相邻区域的公共边只传一次）
+        数据按行政区划代码保存在本地（见mapdata.py），获取过一次的代码直接读取本地文件，过期后在后台刷新
+        """
+        code = request.GET.get('code', CHINA_ADCODE)
+        if not ADCODE_RE.match(code):
+            return Response({'error': '无效的行政区划代码'}, status=status.HTTP_400_BAD_REQUEST)
+        detail = request.GET.get('detail', FULL_DETAIL)
+        if detail != FULL_DETAIL and detail not in DETAIL_LEVELS:
+            return Response({'error': f'detail必须是 {", ".join([*DETAIL_LEVELS, FULL_DETAIL])} 之一'}, status=status.HTTP_400_BAD_REQUEST)
+        output = request.GET.get('output', 'geojson')
+        if output not in OUTPUT_FORMATS:
+            return Response({'error': 'output必须是 geojson 或 topojson'}, status=status.HTTP_400_BAD_REQUEST)
+
+        path = get_map_file(code, detail, output)
+        if path is not None:
+            # 直接返回本地保存的预压缩文件，不经过JSONRenderer重新编码，也不在请求时压缩
+            return map_file_response(request, path)
+
         # 如果所有数据源都失败，返回一个最小化的GeoJSON结构
         return Response({
             'type': 'FeatureCollection',
@@ -238,19 +410,37 @@ class MapDataProxy(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class MapDataSourceStats(APIView):
+    """地图数据源的熔断状态和请求统计（当前进程），仅管理员可见"""
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(source_stats())
+
+
 """马拉松报名赛事视图"""
 class MarathonRegistrationListView(APIView):
     """马拉松报名赛事列表视图"""
     permission_classes = [IsAdminOrReadOnly]
     
-    # 暂时禁用缓存以便调试
-    # @method_decorator(cache_page(settings.CACHE_TIMEOUT['MEDIUM']))  # 缓存30分钟
+    # 条件请求：数据未变化时返回304，不重新传输列表
+    @method_decorator(conditional_get(registration_list_validators))
     def get(self, request):
-        """获取所有报名赛事"""
-        registrations = MarathonRegistration.objects.all()
-        # 使用精简序列化器减少数据传输量
-        serializer = MarathonRegistrationListSerializer(registrations, many=True)
-        return Response(serializer.data)
+        """
+        获取报名赛事列表
+        支持按日期范围、年份、赛事类型、地区、报名状态过滤，以及ordering排序（见filters.py）
+        带cursor或page_size参数时按 (event_date, id) 游标分页，否则返回全部报名赛事（兼容模式）
+        """
+        # 按数据版本号缓存编码后的JSON字节，报名赛事写入后旧缓存自动失效
+        cache_key = list_cache_key(REGISTRATION_NAMESPACE, request)
+        payload = cache.get(cache_key)
+        if payload is None:
+            # 只读取精简序列化器的字段，直接由 .values_list() 生成JSON（见payloads.py），不经过ModelSerializer
+            registrations = filter_events(MarathonRegistration.objects.all(), request.query_params)
+            payload = build_list_payload(
+                registrations, MarathonRegistrationListSerializer.Meta.fields, RegistrationCursorPagination(), request)
+            cache.set(cache_key, payload, settings.CACHE_TIMEOUT['MEDIUM'])  # 缓存30分钟
+        return HttpResponse(payload, content_type='application/json')
 
     def post(self, request):
         """添加新的报名赛事"""
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from .models import Post, PostMedia
 
 
@@ -39,6 +40,12 @@ class PostAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """
+        列表页用一条带 COUNT 的查询统计媒体数量，不再逐行查询
+        """
+        return super().get_queryset(request).annotate(media_total=Count('media'))
+    
     def content_preview(self, obj):
         """
         返回文字内容的预览（最多50个字）
@@ -52,8 +59,9 @@ class PostAdmin(admin.ModelAdmin):
         """
         返回媒体文件的数量
         """
-        return obj.media.count()
+        return obj.media_total
     media_count.short_description = '媒体数量'
+    media_count.admin_order_field = 'media_total'
 
 
 @admin.register(PostMedia)
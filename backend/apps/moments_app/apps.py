@@ -13,3 +13,9 @@ class MomentsAppConfig(AppConfig):
     
     # 应用的显示名称
     verbose_name = '朋友圈'
+    
+    def ready(self):
+        """
+        注册信号处理函数（缓存失效）
+        """
+        from . import signals  # noqa: F401
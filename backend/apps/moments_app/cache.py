@@ -0,0 +1,15 @@
+"""
+朋友圈应用的缓存工具
+"""
+from apps.common.conditional import collection_validators
+from .models import Post
+
+# 数据版本号的命名空间
+POSTS_NAMESPACE = 'posts'
+
+
+def post_list_validators(request, *args, **kwargs):
+    """
+    朋友圈列表的条件请求验证器
+    """
+    return collection_validators(POSTS_NAMESPACE, Post.objects.all())
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moments_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-is_pinned', '-created_at', '-id'], name='post_feed_idx'),
+        ),
+    ]
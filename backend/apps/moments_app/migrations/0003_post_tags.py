@@ -0,0 +1,83 @@
+# Generated by Django 5.2.3 on 2026-10-18 02:24
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# 迁移时的标签解析规则（复制自 apps/moments_app/tags.py，之后修改解析规则不影响这次迁移）
+# 标签分隔符：英文/中文逗号、#号、顿号
+SEPARATOR_RE = re.compile(r'[,，#＃、]+')
+
+
+def parse_tags(value):
+    """解析标签文本，返回去掉空白和重复后的标签列表（保持原有顺序）"""
+    names = []
+    for name in SEPARATOR_RE.split(value or ''):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill_post_tags(apps, schema_editor):
+    """由已有朋友圈的标签文本建立标签和关联，同时把标签文本规范化为逗号分隔的格式"""
+    Post = apps.get_model('moments_app', 'Post')
+    Tag = apps.get_model('moments_app', 'Tag')
+    PostTag = apps.get_model('moments_app', 'PostTag')
+    tagged = {}
+    normalized = []
+    for pk, tags in Post.objects.exclude(tags='').values_list('pk', 'tags').iterator(chunk_size=BATCH_SIZE):
+        names = parse_tags(tags)
+        tagged[pk] = names
+        if ','.join(names) != tags:
+            normalized.append(Post(pk=pk, tags=','.join(names)))
+    # bulk_update 不修改 updated_at
+    Post.objects.bulk_update(normalized, ['tags'], batch_size=BATCH_SIZE)
+
+    all_names = sorted({name for names in tagged.values() for name in names})
+    Tag.objects.bulk_create([Tag(name=name) for name in all_names], batch_size=BATCH_SIZE)
+    tag_ids = dict(Tag.objects.values_list('name', 'id'))
+    PostTag.objects.bulk_create(
+        [PostTag(post_id=pk, tag_id=tag_ids[name]) for pk, names in tagged.items() for name in names],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moments_app', '0002_post_feed_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='标签名称')),
+            ],
+            options={
+                'verbose_name': '标签',
+                'verbose_name_plural': '标签',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='moments_app.post', verbose_name='朋友圈')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='moments_app.tag', verbose_name='标签')),
+            ],
+            options={
+                'verbose_name': '朋友圈标签',
+                'verbose_name_plural': '朋友圈标签',
+                'indexes': [models.Index(fields=['tag', 'post'], name='post_tag_tag_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'tag'), name='post_tag_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_post_tags, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import FileExtensionValidator
+from .tags import normalize_tags
 
 
 class Post(models.Model):
@@ -13,7 +14,7 @@ class Post(models.Model):
     # 是否置顶
     is_pinned = models.BooleanField(default=False, verbose_name='是否置顶')
     
-    # 标签，手动输入，用逗号分隔
+    # 标签，手动输入，用逗号分隔（同时解析到 Tag / PostTag 表，见tags.py）
     tags = models.CharField(max_length=200, blank=True, verbose_name='标签')
     
     # 创建时间
@@ -28,10 +29,70 @@ class Post(models.Model):
         verbose_name_plural = '朋友圈'
         # 默认按置顶和创建时间倒序排序（置顶的在前，然后是最新发布的）
         ordering = ['-is_pinned', '-created_at']
+        indexes = [
+            # 列表排序和游标分页使用的复合索引（见pagination.py）
+            models.Index(fields=['-is_pinned', '-created_at', '-id'], name='post_feed_idx'),
+        ]
     
     def __str__(self):
         # 返回朋友圈的文字内容，如果没有文字则返回ID
         return self.content if self.content else f'朋友圈 {self.id}'
+    
+    def save(self, *args, **kwargs):
+        # 标签统一为逗号分隔、去重后的格式（支持#号、中文逗号等分隔），标签关联表由信号同步
+        self.tags = normalize_tags(self.tags)
+        super().save(*args, **kwargs)
+
+
+class Tag(models.Model):
+    """
+    标签
+    由朋友圈的标签文本解析得到，名称唯一
+    """
+    name = models.CharField(max_length=200, unique=True, verbose_name='标签名称')
+    
+    class Meta:
+        verbose_name = '标签'
+        verbose_name_plural = '标签'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class PostTag(models.Model):
+    """
+    朋友圈与标签的关联
+    (post, tag) 唯一约束用于同步和级联删除，(tag, post) 索引用于按标签筛选朋友圈，
+    两个外键不再单独建索引
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        db_index=False,
+        verbose_name='朋友圈'
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        db_index=False,
+        verbose_name='标签'
+    )
+    
+    class Meta:
+        verbose_name = '朋友圈标签'
+        verbose_name_plural = '朋友圈标签'
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'tag'], name='post_tag_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'post'], name='post_tag_tag_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.post_id}: {self.tag_id}'
 
 
 class PostMedia(models.Model):
@@ -0,0 +1,39 @@
+"""朋友圈应用的分页类"""
+from rest_framework.pagination import BasePagination, PageNumberPagination
+
+from apps.common.pagination import KeysetPagination
+
+
+class PostCursorPagination(KeysetPagination):
+    """
+    朋友圈游标分页：按 (is_pinned, created_at, id) 倒序，与默认排序一致（置顶在前，然后是最新发布的）
+    使用三列的复合索引，每一页的代价相同，不执行COUNT(*)
+    """
+    ordering = ('-is_pinned', '-created_at', '-id')
+
+    def is_requested(self, request):
+        """只有带cursor参数（第一页为空值）时使用游标分页；page_size参数在页码分页中同样使用"""
+        return self.cursor_query_param in request.query_params
+
+
+class PostPagination(BasePagination):
+    """
+    朋友圈列表分页：
+      带cursor参数时按游标分页，响应为 {next, previous, results}，不统计总数，适合无限滚动
+      否则使用页码分页（?page=），响应带count，兼容原有接口
+    """
+
+    def __init__(self):
+        self.cursor_pagination = PostCursorPagination()
+        self.page_number_pagination = PageNumberPagination()
+        self.active = self.page_number_pagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_pagination.is_requested(request):
+            self.active = self.cursor_pagination
+        else:
+            self.active = self.page_number_pagination
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
@@ -69,8 +69,9 @@ class PostSerializer(serializers.ModelSerializer):
     def get_media_count(self, obj):
         """
         获取媒体文件的数量
+        使用已预取的媒体文件计数（见 PostViewSet.get_queryset），不再单独执行 COUNT 查询
         """
-        return obj.media.count()
+        return len(obj.media.all())
     
     def get_created_at_formatted(self, obj):
         """
@@ -0,0 +1,46 @@
+"""
+朋友圈应用的信号处理
+朋友圈保存后同步标签关联表；朋友圈或媒体文件变更后递增数据版本号，使列表的ETag和标签统计缓存立即失效
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.common.cache_version import bump_data_version
+from apps.common.conditional import bump_deletion_generation
+from .cache import POSTS_NAMESPACE
+from .models import Post, PostMedia
+from .tags import sync_post_tags
+
+
+@receiver(post_save, sender=Post)
+def sync_tags(sender, instance, **kwargs):
+    """
+    按标签文本同步标签关联表
+    在递增版本号之前注册（信号按注册顺序执行），新版本号下缓存的标签统计一定包含本次变更
+    """
+    sync_post_tags(instance)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_cache(sender, **kwargs):
+    """
+    朋友圈变更后使缓存的验证器失效
+    """
+    bump_data_version(POSTS_NAMESPACE)
+
+
+@receiver(post_delete, sender=Post)
+def bump_post_deletion_generation(sender, **kwargs):
+    """
+    朋友圈删除后递增删除代数
+    """
+    bump_deletion_generation(POSTS_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=PostMedia)
+def invalidate_post_media_cache(sender, **kwargs):
+    """
+    媒体文件变更不会更新 Post.updated_at，同样需要递增代数才能改变列表的ETag
+    """
+    bump_data_version(POSTS_NAMESPACE)
+    bump_deletion_generation(POSTS_NAMESPACE)
@@ -0,0 +1,84 @@
+"""
+朋友圈标签
+
+Post.tags 保存逗号分隔的标签文本（接口返回和前端展示使用），同时解析为 Tag / PostTag 两张表：
+  按标签筛选（?tag=）通过 PostTag 的 (tag, post) 索引精确匹配，不再对 tags 文本做 LIKE 全表扫描；
+  标签统计（/tags/）对 PostTag 分组计数，结果按朋友圈数据版本号缓存。
+朋友圈保存时先把 tags 规范化（Post.save），再由 post_save 信号同步关联表（见signals.py）；
+QuerySet.update() / bulk_create 不触发信号，之后需要对相应的朋友圈调用 sync_post_tags。
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from apps.common.cache_version import get_data_version
+
+# 标签分隔符：英文/中文逗号、#号、顿号
+_SEPARATOR_RE = re.compile(r'[,，#＃、]+')
+
+TAG_FACETS_CACHE_KEY = 'posts_tag_facets:{version}'
+
+
+def parse_tags(value):
+    """解析标签文本，返回去掉空白和重复后的标签列表（保持原有顺序）"""
+    names = []
+    for name in _SEPARATOR_RE.split(value or ''):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def normalize_tags(value):
+    """规范化标签文本：如 "#跑步 #马拉松" -> "跑步,马拉松" """
+    return ','.join(parse_tags(value))
+
+
+def get_tag_ids(names):
+    """标签名称 -> ID，不存在的标签批量创建"""
+    from .models import Tag
+    if not names:
+        return {}
+    ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in ids]
+    if missing:
+        # 并发创建同名标签时忽略冲突，之后重新读取ID
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+    return ids
+
+
+def sync_post_tags(post):
+    """按 post.tags 同步该朋友圈的标签关联，只增删有变化的关联"""
+    from .models import PostTag
+    tag_ids = get_tag_ids(parse_tags(post.tags))
+    wanted = set(tag_ids.values())
+    with transaction.atomic():
+        current = set(PostTag.objects.filter(post=post).values_list('tag_id', flat=True))
+        if current - wanted:
+            PostTag.objects.filter(post=post, tag_id__in=current - wanted).delete()
+        if wanted - current:
+            PostTag.objects.bulk_create([PostTag(post=post, tag_id=tag_id) for tag_id in wanted - current])
+
+
+def tag_facets():
+    """
+    各标签的朋友圈数量：[{'name': '跑步', 'count': 12}]，按数量倒序、名称排序，不包括没有朋友圈的标签
+    结果按朋友圈数据版本号缓存，朋友圈增删改后自动失效
+    """
+    from .cache import POSTS_NAMESPACE
+    from .models import Tag
+    cache_key = TAG_FACETS_CACHE_KEY.format(version=get_data_version(POSTS_NAMESPACE))
+    facets = cache.get(cache_key)
+    if facets is None:
+        facets = list(
+            Tag.objects.annotate(count=Count('post_tags'))
+            .filter(count__gt=0)
+            .order_by('-count', 'name')
+            .values('name', 'count')
+        )
+        cache.set(cache_key, facets, settings.CACHE_TIMEOUT['MEDIUM'])
+    return facets
@@ -0,0 +1,168 @@
+import datetime
+import importlib
+
+from django.apps import apps as django_apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import Post, PostMedia, PostTag, Tag
+
+
+class PostQueryCountTests(TestCase):
+    """
+    朋友圈列表、详情和后台列表页的查询数不随朋友圈数量（每页条数）变化
+    """
+
+    def setUp(self):
+        # 列表的条件请求验证器会缓存，每个测试从空缓存开始
+        cache.clear()
+
+    def create_posts(self, count, media_per_post=3):
+        posts = Post.objects.bulk_create(Post(content=f'朋友圈 {i}', tags='跑步,马拉松') for i in range(count))
+        PostMedia.objects.bulk_create(
+            PostMedia(post=post, media_type='image', file=f'posts/{post.pk}_{i}.jpg', order=i)
+            for post in posts
+            for i in range(media_per_post)
+        )
+        return posts
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_list_query_count(self):
+        """列表：验证器聚合 + COUNT + 当前页 + 媒体文件预取"""
+        self.create_posts(10)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/moments/posts/')
+        results = response.json()['results']
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(post['media_count'] == 3 and len(post['media']) == 3 for post in results))
+
+    def test_list_query_count_independent_of_page_size(self):
+        self.create_posts(1)
+        one_post = self.count_queries('/api/moments/posts/')
+        self.create_posts(20)
+        self.assertEqual(self.count_queries('/api/moments/posts/'), one_post)
+
+    def test_detail_query_count(self):
+        """详情：朋友圈 + 媒体文件预取"""
+        post = self.create_posts(1, media_per_post=9)[0]
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/moments/posts/{post.pk}/')
+        self.assertEqual(response.json()['media_count'], 9)
+
+    def test_admin_changelist_query_count_independent_of_page_size(self):
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        self.create_posts(1)
+        one_post = self.count_queries('/admin/moments_app/post/')
+        self.create_posts(19)
+        self.assertEqual(self.count_queries('/admin/moments_app/post/'), one_post)
+
+    def test_cursor_page_query_count(self):
+        """游标分页：验证器聚合 + 当前页 + 媒体文件预取，没有COUNT"""
+        self.create_posts(30)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/moments/posts/?cursor=')
+        self.assertNotIn('count', response.json())
+
+
+class PostCursorPaginationTests(TestCase):
+    """朋友圈游标分页按 (is_pinned, created_at, id) 倒序，翻页不重复、不遗漏"""
+
+    def setUp(self):
+        cache.clear()
+        now = timezone.now().replace(microsecond=123456)
+        posts = Post.objects.bulk_create(Post(content=f'朋友圈 {i}', is_pinned=i % 7 == 0) for i in range(25))
+        # created_at 是 auto_now_add，创建后再改：每3条同一秒，同一秒内的记录只相差100微秒（同一毫秒）
+        for i, post in enumerate(posts):
+            Post.objects.filter(pk=post.pk).update(
+                created_at=now - datetime.timedelta(seconds=i // 3, microseconds=(i % 3) * 100))
+
+    def test_walk_all_pages(self):
+        expected = list(Post.objects.order_by('-is_pinned', '-created_at', '-id').values_list('id', flat=True))
+        seen = []
+        url = '/api/moments/posts/?cursor=&page_size=4'
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 4)
+            seen.extend(post['id'] for post in data['results'])
+            url = data['next']
+        self.assertEqual(seen, expected)
+
+    def test_previous_page(self):
+        first = self.client.get('/api/moments/posts/?cursor=&page_size=5').json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual([post['id'] for post in back['results']], [post['id'] for post in first['results']])
+
+    def test_page_number_mode_unchanged(self):
+        data = self.client.get('/api/moments/posts/?page=2').json()
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(len(data['results']), 10)
+
+
+class PostTagTests(TestCase):
+    """标签文本规范化、标签关联表同步、按标签精确筛选和标签统计"""
+
+    def setUp(self):
+        cache.clear()
+
+    def tag_names(self, post):
+        return sorted(post.post_tags.values_list('tag__name', flat=True))
+
+    def test_create_normalizes_and_indexes_tags(self):
+        response = self.client.post('/api/moments/posts/', {'content': '周末长距离', 'tags': '#跑步 #马拉松，跑步、 '})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['tags'], '跑步,马拉松')
+        self.assertEqual(self.tag_names(Post.objects.get()), ['跑步', '马拉松'])
+
+    def test_update_and_delete_sync_tags(self):
+        post = Post.objects.create(content='训练', tags='跑步,间歇')
+        response = self.client.patch(f'/api/moments/posts/{post.pk}/', {'tags': '跑步#恢复'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.tag_names(post), ['恢复', '跑步'])
+        post.delete()
+        self.assertFalse(PostTag.objects.exists())
+
+    def test_exact_tag_filter(self):
+        running = Post.objects.create(content='一', tags='跑步')
+        Post.objects.create(content='二', tags='跑步机')
+        Post.objects.create(content='三', tags='')
+        results = self.client.get('/api/moments/posts/', {'tag': '跑步'}).json()['results']
+        self.assertEqual([post['id'] for post in results], [running.pk])
+        self.assertEqual(self.client.get('/api/moments/posts/', {'tag': '跑'}).json()['results'], [])
+
+    def test_facets_follow_changes(self):
+        Post.objects.create(content='一', tags='跑步,马拉松')
+        post = Post.objects.create(content='二', tags='跑步')
+        self.assertEqual(self.client.get('/api/moments/tags/').json(), [
+            {'name': '跑步', 'count': 2}, {'name': '马拉松', 'count': 1},
+        ])
+        # 第二次请求的验证器和标签统计都命中缓存，不查询数据库
+        with self.assertNumQueries(0):
+            self.client.get('/api/moments/tags/')
+        post.tags = '越野'
+        post.save()
+        self.assertEqual(self.client.get('/api/moments/tags/').json(), [
+            {'name': '越野', 'count': 1}, {'name': '跑步', 'count': 1}, {'name': '马拉松', 'count': 1},
+        ])
+
+    def test_backfill_migration(self):
+        backfill = importlib.import_module('apps.moments_app.migrations.0003_post_tags').backfill_post_tags
+        # bulk_create 不触发信号，模拟迁移前的数据
+        first, second = Post.objects.bulk_create([Post(tags='跑步, 马拉松'), Post(tags='#马拉松')])
+        backfill(django_apps, None)
+        first.refresh_from_db()
+        self.assertEqual(first.tags, '跑步,马拉松')
+        self.assertEqual(self.tag_names(first), ['跑步', '马拉松'])
+        self.assertEqual(self.tag_names(second), ['马拉松'])
+        self.assertEqual(Tag.objects.count(), 2)
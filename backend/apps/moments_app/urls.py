@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, PostMediaViewSet
+from .views import PostViewSet, PostMediaViewSet, TagViewSet
 
 # 创建路由器
 router = DefaultRouter()
@@ -11,6 +11,9 @@ router.register(r'posts', PostViewSet, basename='post')
 # 注册朋友圈媒体文件视图集
 router.register(r'media', PostMediaViewSet, basename='postmedia')
 
+# 注册标签统计视图集
+router.register(r'tags', TagViewSet, basename='tag')
+
 # URL 配置
 urlpatterns = [
     # 包含路由器的 URL
@@ -2,8 +2,14 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from django.db.models import Q
+from django.db.models import Q, prefetch_related_objects
+from django.utils.decorators import method_decorator
+from apps.common.conditional import conditional_get
+from apps.search.index import is_available as is_search_available, matching_ids
+from .cache import post_list_validators
 from .models import Post, PostMedia
+from .pagination import PostPagination
+from .tags import tag_facets
 from .serializers import (
     PostSerializer,
     PostCreateSerializer,
@@ -23,20 +29,33 @@ class PostViewSet(viewsets.ModelViewSet):
     # 默认序列化器
     serializer_class = PostSerializer
     
+    # 带cursor参数时游标分页，否则页码分页（见pagination.py）
+    pagination_class = PostPagination
+    
     def get_queryset(self):
         """
         获取查询集
-        支持搜索和日期筛选
+        支持搜索、标签和日期筛选
+        媒体文件用 prefetch_related 一次查出，列表和详情的查询数不随朋友圈数量增加
         """
-        queryset = Post.objects.all()
+        queryset = Post.objects.prefetch_related('media')
         
         # 获取搜索关键词
         search = self.request.query_params.get('search', None)
         if search:
-            # 搜索文字内容和标签
-            queryset = queryset.filter(
-                Q(content__icontains=search) | Q(tags__icontains=search)
-            )
+            # 搜索文字内容和标签：使用全文检索索引（见 apps/search），不支持时退回到模糊匹配
+            if is_search_available():
+                ids = matching_ids('post', search)
+                queryset = queryset.filter(pk__in=ids) if ids is not None else queryset.none()
+            else:
+                queryset = queryset.filter(
+                    Q(content__icontains=search) | Q(tags__icontains=search)
+                )
+        
+        # 按标签精确筛选：通过标签关联表的 (tag, post) 索引查找，不扫描标签文本
+        tag = self.request.query_params.get('tag', None)
+        if tag:
+            queryset = queryset.filter(post_tags__tag__name=tag.strip())
         
         # 获取开始日期
         start_date = self.request.query_params.get('start_date', None)
@@ -52,6 +71,14 @@ class PostViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    @method_decorator(conditional_get(post_list_validators))
+    def list(self, request, *args, **kwargs):
+        """
+        获取朋友圈列表
+        支持条件请求：数据未变化时返回304
+        """
+        return super().list(request, *args, **kwargs)
+    
     def get_serializer_class(self):
         """
         根据不同的操作返回不同的序列化器
@@ -99,13 +126,8 @@ class PostViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 处理标签：将#号分隔的标签转换为逗号分隔
+        # 标签：#号、中文逗号等分隔的标签在保存时统一转换为逗号分隔（见 Post.save）
         tags = request.data.get('tags', '')
-        if tags:
-            # 将#号替换为逗号
-            tags = tags.replace('#', ',')
-            # 去除首尾的逗号和空格
-            tags = tags.strip(', ')
         
         # 创建数据字典，不要使用request.data.copy()，它会破坏FormData结构
         data = {
@@ -121,6 +143,8 @@ class PostViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             # 保存朋友圈
             serializer.save()
+            # 一次查出媒体文件，序列化时不再逐个查询
+            prefetch_related_objects([serializer.instance], 'media')
             # 返回创建的朋友圈数据
             return Response(
                 PostSerializer(serializer.instance).data,
@@ -193,6 +217,23 @@ class PostViewSet(viewsets.ModelViewSet):
         })
 
 
+class TagViewSet(viewsets.ViewSet):
+    """
+    朋友圈标签视图集
+    提供标签统计（各标签的朋友圈数量）
+    """
+    # 暂时移除认证要求，方便测试
+    permission_classes = []
+    
+    @method_decorator(conditional_get(post_list_validators))
+    def list(self, request):
+        """
+        获取标签统计：[{'name': '跑步', 'count': 12}]，按数量倒序
+        结果按朋友圈数据版本号缓存；支持条件请求，数据未变化时返回304
+        """
+        return Response(tag_facets())
+
+
 class PostMediaViewSet(viewsets.ModelViewSet):
     """
     朋友圈媒体文件视图集
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.search'
+    verbose_name = '全文检索'
+
+    def ready(self):
+        # 注册信号处理函数（同步全文检索索引）
+        from . import signals  # noqa: F401
@@ -0,0 +1,241 @@
+"""
+全文检索索引（SQLite FTS5）
+
+朋友圈、马拉松赛事和报名赛事写入同一张 FTS5 虚拟表 search_document，每个对象一行：
+    rowid                     对象ID * KIND_SLOTS + 类型编号，写入和删除都按 rowid 定位
+    title / body              分词后的标题、正文（参与检索，见 tokenizer.py）
+    kind / object_id / date   类型、对象ID、日期（不参与检索）
+    title_text / body_text    原文（不参与检索，用于返回标题和生成摘要，不需要再查询模型表）
+检索按 bm25 相关度排序（标题权重更高，写在表的 rank 配置中，ORDER BY rank 由 FTS5 直接计算），
+一次检索只执行一条 SQL，耗时取决于检索词命中的行数，与总行数基本无关。
+
+同步：模型的 post_save / post_delete 信号更新索引（见 signals.py），批量导入在 bulk_create 之后调用 index_instances。
+QuerySet.update() / bulk_update 不触发信号：只修改不参与检索的字段时（如地区字段的批量修复）不需要处理，
+修改了检索字段时调用 index_instances，或运行 manage.py rebuild_search_index 重建。
+只支持SQLite（项目使用的数据库）；其他数据库下 is_available() 为False，信号不写索引，检索接口不可用。
+"""
+import html
+import re
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.db import connection, connections
+from django.db.models.expressions import RawSQL
+
+from .tokenizer import match_expression, query_terms, tokenize
+
+TABLE = 'search_document'
+KIND_SLOTS = 8
+# bm25 各列的权重（依次为 title、body）
+RANK_FUNCTION = 'bm25(5.0, 1.0)'
+# 摘要长度（字符数）
+SNIPPET_LENGTH = 80
+
+CREATE_TABLE_SQL = (
+    f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+    "title, body, kind UNINDEXED, object_id UNINDEXED, date UNINDEXED, "
+    "title_text UNINDEXED, body_text UNINDEXED, "
+    # 单字前缀索引：单个汉字的检索（"跑"*）和英文单词前几个字母的检索不需要扫描整个词表
+    "tokenize='unicode61 remove_diacritics 2', prefix='1 2')"
+)
+INSERT_SQL = (
+    f'INSERT OR REPLACE INTO {TABLE}'
+    '(rowid, title, body, kind, object_id, date, title_text, body_text) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)'
+)
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    """
+    一类检索对象
+        kind:          类型名称（接口参数和返回值中使用）
+        code:          类型编号（rowid 的低位）
+        model:         模型标签（app_label.ModelName）
+        title_fields:  标题字段
+        body_fields:   正文字段
+        date_field:    日期字段
+    """
+    kind: str
+    code: int
+    model: str
+    title_fields: tuple
+    body_fields: tuple
+    date_field: str
+
+
+SOURCES = {
+    source.kind: source for source in (
+        SearchSource('post', 1, 'moments_app.Post', ('tags',), ('content',), 'created_at'),
+        SearchSource('marathon', 2, 'marathon.Marathon', ('event_name',),
+                     ('location', 'description', 'event_log'), 'event_date'),
+        SearchSource('registration', 3, 'marathon.MarathonRegistration', ('event_name',),
+                     ('location', 'notes'), 'event_date'),
+    )
+}
+_SOURCES_BY_MODEL = {source.model: source for source in SOURCES.values()}
+
+
+def is_available(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def source_for_model(model):
+    """模型对应的检索对象类型，不参与检索的模型返回None"""
+    return _SOURCES_BY_MODEL.get(model._meta.label)
+
+
+def get_source_model(source):
+    return apps.get_model(source.model)
+
+
+def _rowid(source, pk):
+    return pk * KIND_SLOTS + source.code
+
+
+def _document(source, instance):
+    """一个对象的索引行（与 INSERT_SQL 的列顺序一致）"""
+    title = ' '.join(filter(None, (getattr(instance, name) for name in source.title_fields)))
+    body = '\n'.join(filter(None, (getattr(instance, name) for name in source.body_fields)))
+    date = getattr(instance, source.date_field)
+    return (
+        _rowid(source, instance.pk), tokenize(title), tokenize(body),
+        source.kind, instance.pk, date.isoformat() if date else None, title, body,
+    )
+
+
+def write_documents(source, instances, using='default'):
+    """写入（或覆盖）一批同类对象的索引"""
+    rows = [_document(source, instance) for instance in instances if instance.pk is not None]
+    if rows:
+        with connections[using].cursor() as cursor:
+            cursor.executemany(INSERT_SQL, rows)
+
+
+def index_instances(instances):
+    """写入一批对象的索引（可以是不同模型），用于不触发信号的批量写入之后"""
+    if not is_available():
+        return
+    groups = {}
+    for instance in instances:
+        source = source_for_model(type(instance))
+        if source is not None:
+            groups.setdefault(source, []).append(instance)
+    for source, items in groups.items():
+        write_documents(source, items)
+
+
+def remove_documents(source, pks):
+    if not is_available() or not pks:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(_rowid(source, pk),) for pk in pks])
+
+
+def rebuild_source(source, model=None, using='default', batch_size=2000):
+    """
+    重建一类对象的索引：删除该类型的全部索引行后按主键分批重新写入，返回写入的对象数
+    model 默认为当前模型，数据迁移中传入历史模型
+    """
+    model = model or get_source_model(source)
+    fields = ('pk', *source.title_fields, *source.body_fields, source.date_field)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE kind = %s', [source.kind])
+    queryset = model._default_manager.using(using).order_by('pk').only(*fields)
+    count, last_pk = 0, None
+    while True:
+        batch = list((queryset if last_pk is None else queryset.filter(pk__gt=last_pk))[:batch_size])
+        if not batch:
+            break
+        write_documents(source, batch, using=using)
+        count += len(batch)
+        last_pk = batch[-1].pk
+    return count
+
+
+def optimize(using='default'):
+    """合并 FTS5 的索引段（大量写入后执行，检索更快）"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+
+
+def matching_ids(kind, query):
+    """
+    检索某一类对象，返回对象ID的子查询（用于 queryset.filter(pk__in=...)）
+    检索词中没有可检索的文字时返回None
+    """
+    expression = match_expression(query)
+    if not expression:
+        return None
+    return RawSQL(
+        f'SELECT object_id FROM {TABLE} WHERE {TABLE} MATCH %s AND kind = %s',
+        (expression, kind),
+    )
+
+
+def _highlight(text, pattern):
+    """转义HTML，检索词用 <mark> 标出"""
+    if pattern is None:
+        return html.escape(text)
+    parts, last = [], 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[last:match.start()]))
+        parts.append(f'<mark>{html.escape(match.group())}</mark>')
+        last = match.end()
+    parts.append(html.escape(text[last:]))
+    return ''.join(parts)
+
+
+def make_snippet(text, pattern, length=SNIPPET_LENGTH):
+    """截取第一个检索词附近的一段文字（连续空白合并为一个空格）并标出检索词"""
+    text = ' '.join(text.split())
+    match = pattern.search(text) if pattern else None
+    # 检索词前保留约四分之一的长度作为上文
+    start = max(0, match.start() - length // 4) if match else 0
+    end = min(len(text), start + length)
+    start = max(0, end - length)
+    return ('…' if start else '') + _highlight(text[start:end], pattern) + ('…' if end < len(text) else '')
+
+
+def _highlight_pattern(query):
+    words = {run for runs in query_terms(query) for run, _ in runs}
+    if not words:
+        return None
+    return re.compile('|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True)), re.IGNORECASE)
+
+
+def search(query, kinds=None, limit=20, offset=0):
+    """
+    全文检索，按相关度排序，返回 (结果列表, 是否还有更多)：
+        {'type': 'marathon', 'id': 赛事ID, 'date': '2025-04-20',
+         'title': '<mark>上海</mark>马拉松', 'snippet': '...', 'score': 12.3}
+    title 和 snippet 为转义后的HTML，检索词用 <mark> 标出
+    """
+    expression = match_expression(query)
+    if not expression:
+        return [], False
+    sql = f'SELECT kind, object_id, date, title_text, body_text, rank FROM {TABLE} WHERE {TABLE} MATCH %s'
+    params = [expression]
+    if kinds:
+        sql += f" AND kind IN ({', '.join(['%s'] * len(kinds))})"
+        params.extend(kinds)
+    # 多取一条判断是否还有下一页
+    sql += ' ORDER BY rank LIMIT %s OFFSET %s'
+    params.extend([limit + 1, offset])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    pattern = _highlight_pattern(query)
+    results = [
+        {
+            'type': kind,
+            'id': object_id,
+            'date': date,
+            'title': _highlight(title, pattern),
+            'snippet': make_snippet(body, pattern),
+            # bm25 越相关越小（负数），取反后越大越相关
+            'score': round(-rank, 3),
+        }
+        for kind, object_id, date, title, body, rank in rows[:limit]
+    ]
+    return results, len(rows) > limit
@@ -0,0 +1,31 @@
+"""
+重建全文检索索引（见 apps/search/index.py）
+用于首次部署后、通过 QuerySet.update() / bulk_update 修改了检索字段之后，或索引与数据不一致时
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.search.index import SOURCES, is_available, optimize, rebuild_source
+
+
+class Command(BaseCommand):
+    help = '重建朋友圈、赛事和报名赛事的全文检索索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=list(SOURCES) + ['all'], default='all', help='重建的类型（默认全部）')
+        parser.add_argument('--batch-size', type=int, default=2000, help='每次读取和写入的记录数（默认2000）')
+
+    def handle(self, *args, **options):
+        if not is_available():
+            raise CommandError('当前数据库不支持全文检索（需要SQLite FTS5）')
+        kinds = list(SOURCES) if options['type'] == 'all' else [options['type']]
+        for kind in kinds:
+            started = time.monotonic()
+            # 删除和重新写入在一个事务中，重建期间的检索仍能看到旧索引
+            with transaction.atomic():
+                count = rebuild_source(SOURCES[kind], batch_size=options['batch_size'])
+            self.stdout.write(f'{kind}：已写入 {count} 条（{time.monotonic() - started:.1f}秒）')
+        optimize()
+        self.stdout.write(self.style.SUCCESS('全文检索索引重建完成'))
@@ -0,0 +1,38 @@
+"""
+创建全文检索的 FTS5 虚拟表，并为已有的朋友圈、赛事和报名赛事建立索引
+非SQLite数据库跳过（全文检索不可用，见 apps/search/index.py）
+"""
+from django.db import migrations
+
+from apps.search.index import CREATE_TABLE_SQL, RANK_FUNCTION, SOURCES, TABLE, rebuild_source
+
+
+def create_search_document(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        # 默认的排序函数（ORDER BY rank），标题权重更高
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}, rank) VALUES ('rank', %s)", [RANK_FUNCTION])
+    for source in SOURCES.values():
+        rebuild_source(source, model=apps.get_model(source.model), using=connection.alias)
+
+
+def drop_search_document(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marathon', '0012_marathon_finish_seconds_marathon_pace_seconds_and_more'),
+        ('moments_app', '0002_post_feed_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_document, drop_search_document),
+    ]
@@ -0,0 +1,26 @@
+"""
+全文检索索引的同步：朋友圈、赛事和报名赛事保存后写入索引，删除后移除索引
+写入与模型的保存在同一个事务中，事务回滚时索引一起回滚
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.marathon.models import Marathon, MarathonRegistration
+from apps.moments_app.models import Post
+from .index import index_instances, remove_documents, source_for_model
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Marathon)
+@receiver(post_save, sender=MarathonRegistration)
+def update_search_document(sender, instance, **kwargs):
+    """保存后重新写入该对象的索引"""
+    index_instances([instance])
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Marathon)
+@receiver(post_delete, sender=MarathonRegistration)
+def remove_search_document(sender, instance, **kwargs):
+    """删除后移除该对象的索引"""
+    remove_documents(source_for_model(sender), [instance.pk])
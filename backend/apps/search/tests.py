@@ -0,0 +1,109 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.marathon.importers import import_rows
+from apps.marathon.models import Marathon, MarathonRegistration
+from apps.moments_app.models import Post
+from .index import SOURCES, rebuild_source
+from .tokenizer import match_expression, tokenize
+
+
+class TokenizerTests(TestCase):
+
+    def test_cjk_bigrams(self):
+        self.assertEqual(tokenize('北京马拉松'), '北京 京马 马拉 拉松 松')
+        self.assertEqual(tokenize('跑 Marathon2025！'), '跑 marathon2025')
+
+    def test_match_expression(self):
+        self.assertEqual(match_expression('马拉松'), '"马拉 拉松"*')
+        self.assertEqual(match_expression('跑 mara'), '"跑"* AND "mara"*')
+        self.assertEqual(match_expression('北京abc'), '"北京 京 abc"*')
+        self.assertEqual(match_expression('"*() OR'), '"or"*')
+        self.assertEqual(match_expression('！？'), '')
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.marathon = Marathon.objects.create(
+            event_name='上海马拉松', event_date=datetime.date(2025, 11, 30), location='外滩',
+            finish_time='3:30:00', pace='04:58', description='沿黄浦江的赛道，风景很好',
+        )
+        self.beijing = Marathon.objects.create(
+            event_name='北京半程马拉松', event_date=datetime.date(2025, 4, 20), location='天安门',
+            finish_time='1:40:00', pace='04:44', event_type='half',
+            event_log='# 比赛日志\n\n前半程跟着**上海**的跑友一起跑',
+        )
+        self.registration = MarathonRegistration.objects.create(
+            event_name='厦门马拉松', event_date=datetime.date(2026, 1, 4), location='厦门', notes='记得订机票',
+        )
+        self.post = Post.objects.create(content='今天在外滩跑了十公里 <b>开心</b>', tags='跑步,上海')
+
+    def search(self, **params):
+        response = self.client.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_search_across_types_ranked_by_title(self):
+        results = self.search(q='上海')['results']
+        self.assertEqual({(r['type'], r['id']) for r in results}, {
+            ('marathon', self.marathon.pk), ('marathon', self.beijing.pk), ('post', self.post.pk),
+        })
+        # 标题命中的排在只有正文命中的前面
+        marathons = [r for r in results if r['type'] == 'marathon']
+        self.assertEqual([r['id'] for r in marathons], [self.marathon.pk, self.beijing.pk])
+        self.assertEqual(marathons[0]['title'], '<mark>上海</mark>马拉松')
+        self.assertEqual(marathons[0]['date'], '2025-11-30')
+        self.assertEqual(marathons[1]['snippet'], '天安门 # 比赛日志 前半程跟着**<mark>上海</mark>**的跑友一起跑')
+
+    def test_single_character_and_substring(self):
+        self.assertEqual({r['type'] for r in self.search(q='厦')['results']}, {'registration'})
+        self.assertEqual([r['id'] for r in self.search(q='浦江')['results']], [self.marathon.pk])
+        self.assertEqual(self.search(q='机票', type='marathon')['results'], [])
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        result = self.search(q='开心', type='post')['results'][0]
+        self.assertEqual(result['snippet'], '今天在外滩跑了十公里 &lt;b&gt;<mark>开心</mark>&lt;/b&gt;')
+
+    def test_index_follows_updates_and_deletes(self):
+        self.marathon.event_name = '苏州马拉松'
+        self.marathon.save()
+        self.assertEqual(self.search(q='苏州')['results'][0]['id'], self.marathon.pk)
+        self.assertNotIn(self.marathon.pk, [r['id'] for r in self.search(q='上海', type='marathon')['results']])
+        self.post.delete()
+        self.assertEqual(self.search(q='外滩', type='post')['results'], [])
+
+    def test_paging(self):
+        first = self.search(q='马拉松', limit=2)
+        self.assertEqual(len(first['results']), 2)
+        self.assertEqual(first['next_offset'], 2)
+        second = self.search(q='马拉松', limit=2, offset=2)
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next_offset'])
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': '上海', 'type': 'user'}).status_code, 400)
+
+    def test_bulk_import_is_indexed(self):
+        report = import_rows('marathon', [(2, {
+            'event_name': '杭州马拉松', 'event_date': '2025-11-02', 'location': '杭州',
+            'finish_time': '3:20:00', 'pace': '04:44',
+        })])
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(len(self.search(q='杭州')['results']), 1)
+
+    def test_rebuild(self):
+        # QuerySet.update() 不触发信号，重建后索引与数据一致
+        Post.objects.filter(pk=self.post.pk).update(content='西湖边慢跑')
+        self.assertEqual(self.search(q='西湖')['results'], [])
+        self.assertEqual(rebuild_source(SOURCES['post']), 1)
+        self.assertEqual([r['id'] for r in self.search(q='西湖')['results']], [self.post.pk])
+
+    def test_moments_search_uses_index(self):
+        Post.objects.create(content='休息日', tags='')
+        results = self.client.get('/api/moments/posts/', {'search': '外滩'}).json()['results']
+        self.assertEqual([post['id'] for post in results], [self.post.pk])
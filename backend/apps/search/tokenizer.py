@@ -0,0 +1,66 @@
+"""
+全文检索的分词（写入索引和构造检索表达式使用同一套规则）
+
+FTS5 自带的 unicode61 分词器按空格和标点切分，中文句子没有空格，整句会成为一个词，无法检索其中的词语。
+写入索引前先在这里切分，再以空格连接交给 unicode61：
+  中日韩文字：按相邻两字切分（bigram），并在每段末尾补上最后一个字，如"北京马拉松" -> 北京 京马 马拉 拉松 松
+  其他文字：  按单词切分，统一小写
+检索时每个检索词切分后作为短语查询（词元必须连续出现），最后一个词元按前缀匹配：
+  "马拉松" -> "马拉 拉松"*，"跑" -> "跑"*（匹配以"跑"开头的两字词元和段末的单字），"mara" -> "mara"*
+因此任意长度的中文检索词（包括单字）都能用索引查到，效果与子串匹配相同；英文单词按前缀匹配。
+"""
+import re
+
+# 中日韩文字：假名、中日韩统一表意文字（含扩展A）、谚文音节、兼容表意文字
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+_RUN_RE = re.compile(rf'([{_CJK}]+)|([^\W_{_CJK}]+)')
+
+# 一次检索最多使用的检索词数
+MAX_TERMS = 8
+
+
+def _runs(text):
+    """按文字类型切分为连续片段，返回 [(片段, 是否中日韩文字)]"""
+    return [(match.group(), match.group(1) is not None) for match in _RUN_RE.finditer(text.lower())]
+
+
+def _run_tokens(run, cjk, final=False):
+    """
+    一个片段的词元；中日韩文字按两字切分并补上末尾单字
+    final 为 True 时（检索词的最后一段）不补末尾单字，检索词不必出现在一段文字的末尾
+    """
+    if not cjk or len(run) == 1:
+        return [run]
+    tokens = [run[i:i + 2] for i in range(len(run) - 1)]
+    if not final:
+        tokens.append(run[-1])
+    return tokens
+
+
+def tokenize(text):
+    """写入索引的文本：词元以空格连接"""
+    return ' '.join(token for run, cjk in _runs(text or '') for token in _run_tokens(run, cjk))
+
+
+def query_terms(query):
+    """检索词列表（按空格切分，去掉不含文字的检索词），每个检索词为其文字片段的列表"""
+    terms = []
+    for word in query.split()[:MAX_TERMS]:
+        runs = _runs(word)
+        if runs:
+            terms.append(runs)
+    return terms
+
+
+def match_expression(query):
+    """
+    由检索词构造 FTS5 检索表达式，多个检索词同时包含（AND）
+    没有可检索的文字时返回空字符串；词元只包含文字和数字，放在引号中不需要转义
+    """
+    phrases = []
+    for runs in query_terms(query):
+        tokens = []
+        for i, (run, cjk) in enumerate(runs):
+            tokens.extend(_run_tokens(run, cjk, final=i == len(runs) - 1))
+        phrases.append('"%s"*' % ' '.join(tokens))
+    return ' AND '.join(phrases)
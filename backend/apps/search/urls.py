@@ -0,0 +1,7 @@
+"""全文检索的URL配置"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.SearchView.as_view(), name='search'),  # 朋友圈、赛事、报名赛事的全文检索
+]
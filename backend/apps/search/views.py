@@ -0,0 +1,42 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from .index import SOURCES, is_available, search
+
+
+class SearchView(APIView):
+    """全文检索：朋友圈、马拉松赛事和报名赛事（允许游客读取）"""
+    permission_classes = []
+
+    def get(self, request):
+        """
+        检索，参数：
+            q:       检索词，多个检索词用空格分隔（同时包含）
+            type:    限定类型 post / marathon / registration，多个用逗号分隔，默认全部
+            limit:   返回数量，默认20，最多50
+            offset:  跳过的结果数（翻页），最多1000
+        结果按相关度排序，title 和 snippet 为转义后的HTML，检索词用 <mark> 标出；
+        next_offset 为下一页的 offset，没有下一页时为 null
+        """
+        if not is_available():
+            return Response({'error': '当前数据库不支持全文检索'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({'error': '缺少检索词'}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = [kind for kind in request.GET.get('type', '').split(',') if kind]
+        unknown = [kind for kind in kinds if kind not in SOURCES]
+        if unknown:
+            return Response({'error': f'不支持的类型: {", ".join(unknown)}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+            offset = min(max(int(request.GET.get('offset', 0)), 0), 1000)
+        except ValueError:
+            return Response({'error': 'limit和offset必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results, has_more = search(query, kinds=kinds, limit=limit, offset=offset)
+        return Response({
+            'query': query,
+            'results': results,
+            'next_offset': offset + limit if has_more else None,
+        })
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'apps.marathon',
     'apps.admin_app',
     'apps.moments_app',
+    'apps.search',
 ]
 
 # REST Framework 配置
@@ -203,8 +204,51 @@ CACHES = {
         'OPTIONS': {
             'MAX_ENTRIES': 1000,  # 最大缓存条目数
         }
-    }
+    },
+    # 数据版本号缓存：存放在文件中，由所有 worker 进程共享
+    # 写操作递增版本号后，其他进程的内存缓存也能立即感知到失效
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'versions',
+    },
+}
+
+# 保存数据版本号的缓存别名（见 apps/common/cache_version.py）
+DATA_VERSION_CACHE_ALIAS = 'versions'
+# 递增版本号时各进程共用的文件锁
+DATA_VERSION_LOCK_FILE = BASE_DIR / 'cache' / 'versions.lock'
+
+# 数据修复命令的断点文件目录（见 apps/common/batch.py），中断后重新运行从断点继续
+BATCH_CHECKPOINT_DIR = BASE_DIR / 'cache' / 'checkpoints'
+
+# 地图数据（GeoJSON）的本地存储目录（见 apps/marathon/mapdata.py），按行政区划代码保存，重启后依然可用
+MAP_DATA_DIR = BASE_DIR / 'cache' / 'map_data'
+# 本地地图数据超过该时间（秒）后在后台刷新，刷新完成前继续使用旧数据
+MAP_DATA_MAX_AGE = 60 * 60 * 24 * 7
+
+# 地图数据源（按优先级排序，{code} 为行政区划代码），优先使用阿里云，因为GitHub可能较慢
+MAP_DATA_SOURCES = {
+    # 对于中国地图，使用更可靠的数据源
+    'china': [
+        'https://geo.datav.aliyun.com/areas_v3/bound/{code}_full.json',
+        'https://raw.githubusercontent.com/DataV-Team/datav.geo.atlas/master/china.json',
+        'https://raw.githubusercontent.com/lyhmyd1211/GeoMapData_CN/master/geojson/100000_full.json',
+    ],
+    'province': [
+        'https://geo.datav.aliyun.com/areas_v3/bound/{code}_full.json',
+        'https://raw.githubusercontent.com/lyhmyd1211/GeoMapData_CN/master/geojson/{code}_full.json',
+    ],
 }
+# 请求上游的总超时时间（秒），所有数据源共用
+MAP_DATA_TIMEOUT = 3
+# 当前数据源超过该时间（秒）没有结果时，并发请求下一个数据源
+MAP_DATA_HEDGE_DELAY = 0.5
+
+# 地图数据源熔断：连续失败次数达到阈值后断开，冷却时间（秒）后放行一个试探请求
+MAP_DATA_BREAKER_THRESHOLD = 3
+MAP_DATA_BREAKER_COOLDOWN = 60
+# 所有数据源都失败的行政区划代码在该时间（秒）内不再请求上游
+MAP_DATA_NEGATIVE_TTL = 30
 
 # 缓存超时设置（秒）
 CACHE_TIMEOUT = {
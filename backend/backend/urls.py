@@ -24,6 +24,7 @@ urlpatterns = [
     path('api/marathon/', include('apps.marathon.urls')),  # 马拉松相关API
     path('api/admin/', include('apps.admin_app.urls')),    # 管理员相关API
     path('api/moments/', include('apps.moments_app.urls')), # 朋友圈相关API
+    path('api/search/', include('apps.search.urls')),      # 全文检索API
 ]
 
 # 开发环境下的媒体文件和静态文件访问
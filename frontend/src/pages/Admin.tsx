@@ -1,5 +1,5 @@
-import React, { useState, useEffect } from 'react';
-import { Card, Table, Button, Form, Input, DatePicker, Select, Upload, Modal, message, Space, Row, Col, Tabs, Tag, Checkbox, Popconfirm } from 'antd';
+import React, { useState, useEffect, useRef } from 'react';
+import { Card, Table, Button, Form, Input, DatePicker, Select, Upload, Modal, message, Space, Row, Col, Tabs, Tag, Checkbox, Popconfirm, AutoComplete } from 'antd';
 import { PlusOutlined, EditOutlined, DeleteOutlined, UploadOutlined, EyeOutlined, LockOutlined, SettingOutlined } from '@ant-design/icons';
 import { useNavigate } from 'react-router-dom';
 import apiClient from '../services/axios';
@@ -34,6 +34,8 @@ const Admin: React.FC = () => {
   const [registrationCities, setRegistrationCities] = useState<any[]>([]);
   const [registrationDistricts, setRegistrationDistricts] = useState<any[]>([]);
   const [provinces, setProvinces] = useState<any[]>([]);
+  // 省市区树：[[省份ID, 名称, [[城市ID, 名称, [[区县ID, 名称]]]]]]，页面加载时请求一次
+  const regionTree = useRef<any[]>([]);
   const [posts, setPosts] = useState<Post[]>([]);
   const [postForm] = Form.useForm();
   const [postModalVisible, setPostModalVisible] = useState(false);
@@ -66,54 +68,80 @@ const Admin: React.FC = () => {
 
   const fetchProvinces = async () => {
     try {
-      const raw = await apiClient.get('/api/marathon/province/');
-      const data = Array.isArray(raw) ? raw : [];
-      setProvinces(data);
+      const raw = await apiClient.get('/api/marathon/regions/tree/');
+      regionTree.current = Array.isArray(raw) ? raw : [];
+      setProvinces(regionTree.current.map(([id, name]: any[]) => ({ id, name })));
     } catch (error) {
       message.error('获取省份数据失败');
     }
   };
 
-  const fetchCities = async (provinceId: number) => {
-    try {
-      const raw = await apiClient.get(`/api/marathon/city/?province=${provinceId}`);
-      const data = Array.isArray(raw) ? raw : [];
-      setCities(data);
-      setDistricts([]);
-    } catch (error) {
-      message.error('获取城市数据失败');
+  // 从省市区树中查找城市/区县，不再请求接口
+  const findCities = (provinceId: number) => {
+    const province = regionTree.current.find((p: any[]) => p[0] === provinceId);
+    return province ? province[2].map(([id, name]: any[]) => ({ id, name })) : [];
+  };
+
+  const findDistricts = (cityId: number) => {
+    for (const province of regionTree.current) {
+      const city = province[2].find((c: any[]) => c[0] === cityId);
+      if (city) {
+        return city[2].map(([id, name]: any[]) => ({ id, name }));
+      }
     }
+    return [];
   };
 
-  const fetchDistricts = async (cityId: number) => {
+  // 地区自动补全：输入名称、简称或拼音首字母（如"浦东"、"pd"），选中后一次填好省市区
+  const [regionOptions, setRegionOptions] = useState<any[]>([]);
+
+  const searchRegions = async (text: string) => {
+    if (!text.trim()) {
+      setRegionOptions([]);
+      return;
+    }
     try {
-      const raw = await apiClient.get(`/api/marathon/district/?city=${cityId}`);
+      const raw = await apiClient.get(`/api/marathon/regions/search/?q=${encodeURIComponent(text)}`);
       const data = Array.isArray(raw) ? raw : [];
-      setDistricts(data);
+      setRegionOptions(data.map((region: any) => ({
+        value: region.path.map((p: any[]) => p[1]).join(' / '),
+        path: region.path,
+      })));
     } catch (error) {
-      message.error('获取区县数据失败');
+      setRegionOptions([]);
     }
   };
 
+  const applyRegionPath = (path: any[][], isRegistration: boolean) => {
+    const [province, city, district] = path;
+    const targetForm = isRegistration ? registrationForm : form;
+    const setCityList = isRegistration ? setRegistrationCities : setCities;
+    const setDistrictList = isRegistration ? setRegistrationDistricts : setDistricts;
+    setCityList(findCities(province[0]));
+    setDistrictList(city ? findDistricts(city[0]) : []);
+    targetForm.setFieldsValue({
+      province: province[1],
+      city: city ? city[1] : undefined,
+      district: district ? district[1] : undefined,
+    });
+  };
+
+  const fetchCities = async (provinceId: number) => {
+    setCities(findCities(provinceId));
+    setDistricts([]);
+  };
+
+  const fetchDistricts = async (cityId: number) => {
+    setDistricts(findDistricts(cityId));
+  };
+
   const fetchRegistrationCities = async (provinceId: number) => {
-    try {
-      const raw = await apiClient.get(`/api/marathon/city/?province=${provinceId}`);
-      const data = Array.isArray(raw) ? raw : [];
-      setRegistrationCities(data);
-      setRegistrationDistricts([]);
-    } catch (error) {
-      message.error('获取城市数据失败');
-    }
+    setRegistrationCities(findCities(provinceId));
+    setRegistrationDistricts([]);
   };
 
   const fetchRegistrationDistricts = async (cityId: number) => {
-    try {
-      const raw = await apiClient.get(`/api/marathon/district/?city=${cityId}`);
-      const data = Array.isArray(raw) ? raw : [];
-      setRegistrationDistricts(data);
-    } catch (error) {
-      message.error('获取区县数据失败');
-    }
+    setRegistrationDistricts(findDistricts(cityId));
   };
 
   const fetchMarathons = async () => {
@@ -305,7 +333,7 @@ const Admin: React.FC = () => {
         // 3. 如果有城市，加载区县列表
         if (record.city) {
           // 从已加载的城市列表中查找对应的城市对象
-          const selectedCity = cities.find((c: any) => c.name === record.city);
+          const selectedCity = findCities(selectedProvince.id).find((c: any) => c.name === record.city);
           if (selectedCity) {
             // 4. 加载区县列表
             await fetchDistricts(selectedCity.id);
@@ -538,8 +566,7 @@ const Admin: React.FC = () => {
         // 等待城市加载完成后再加载区县
         setTimeout(async () => {
           if (record.city) {
-            const cityList = await apiClient.get(`/api/marathon/city/?province=${selectedProvince.id}`);
-            const selectedCity = Array.isArray(cityList) ? cityList.find((c: any) => c.name === record.city) : null;
+            const selectedCity = findCities(selectedProvince.id).find((c: any) => c.name === record.city);
             if (selectedCity) {
               await fetchRegistrationDistricts(selectedCity.id);
             }
@@ -1246,6 +1273,16 @@ const Admin: React.FC = () => {
             <Input placeholder="请输入赛事地点" />
           </Form.Item>
 
+          <Form.Item label="快速选择地区">
+            <AutoComplete
+              options={regionOptions}
+              onSearch={searchRegions}
+              onSelect={(_: string, option: any) => applyRegionPath(option.path, false)}
+              placeholder="输入地区名称或拼音首字母，如：浦东、pd"
+              allowClear
+            />
+          </Form.Item>
+
           <Row gutter={16}>
             <Col span={8}>
               <Form.Item
@@ -1505,6 +1542,16 @@ const Admin: React.FC = () => {
             <Input placeholder="请输入赛事地点" />
           </Form.Item>
 
+          <Form.Item label="快速选择地区">
+            <AutoComplete
+              options={regionOptions}
+              onSearch={searchRegions}
+              onSelect={(_: string, option: any) => applyRegionPath(option.path, true)}
+              placeholder="输入地区名称或拼音首字母，如：浦东、pd"
+              allowClear
+            />
+          </Form.Item>
+
           <Row gutter={16}>
             <Col span={8}>
               <Form.Item
@@ -1,9 +1,9 @@
-import React, { useState, useEffect } from 'react';
-import { Card, Row, Col, Image, Tag, Spin, Empty, Pagination, Modal, Button, Space } from 'antd';
+import React, { useState, useEffect, useRef, useCallback } from 'react';
+import { Card, Row, Col, Image, Tag, Spin, Empty, Modal, Button, Space } from 'antd';
 import { PushpinOutlined, CalendarOutlined, AppstoreOutlined, UnorderedListOutlined } from '@ant-design/icons';
 import Navigation from '../components/Common/Navigation';
 import apiClient from '../services/axios';
-import { Post, PaginatedResponse } from '../services/types';
+import { Post, CursorPaginatedResponse } from '../services/types';
 import dayjs from 'dayjs';
 import relativeTime from 'dayjs/plugin/relativeTime';
 import '../styles/Moments.css';
@@ -16,46 +16,71 @@ type ViewMode = 'card' | 'timeline';
 const Moments: React.FC = () => {
   const [posts, setPosts] = useState<Post[]>([]);
   const [loading, setLoading] = useState(false);
-  const [currentPage, setCurrentPage] = useState(1);
   const [pageSize] = useState(10);
-  const [totalCount, setTotalCount] = useState(0);
+  // 下一页的游标，null 表示没有更多
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const loadingMoreRef = useRef(false);
+  const sentinelRef = useRef<HTMLDivElement>(null);
   const [previewVisible, setPreviewVisible] = useState(false);
   const [previewImage] = useState('');
   const [viewMode, setViewMode] = useState<ViewMode>('card');
 
-  useEffect(() => {
-    fetchPosts();
-  }, [currentPage]);
+  // 从 next 链接中取出游标
+  const parseCursor = (next: string | null): string | null => {
+    if (!next) return null;
+    return new URL(next, window.location.origin).searchParams.get('cursor');
+  };
 
-  const fetchPosts = async () => {
-    setLoading(true);
+  // 游标分页（按置顶、发布时间倒序），每一页的查询代价相同；cursor 为空字符串时加载第一页
+  const fetchPosts = useCallback(async (cursor: string = '') => {
+    const isFirstPage = cursor === '';
+    if (isFirstPage) {
+      setLoading(true);
+    } else {
+      if (loadingMoreRef.current) return;
+      loadingMoreRef.current = true;
+      setLoadingMore(true);
+    }
     try {
-      const params: any = {
-        page: currentPage,
-        page_size: pageSize,
-      };
-
-      const response: PaginatedResponse<Post> | Post[] = await apiClient.get('/api/moments/posts/', { params });
-      
-      if (response && typeof response === 'object' && 'results' in response) {
-        const paginatedResponse = response as PaginatedResponse<Post>;
-        setPosts(Array.isArray(paginatedResponse.results) ? paginatedResponse.results : []);
-        setTotalCount(paginatedResponse.count || 0);
-      } else if (Array.isArray(response)) {
-        setPosts(response);
-        setTotalCount(response.length);
-      } else {
-        setPosts([]);
-        setTotalCount(0);
-      }
+      const response: CursorPaginatedResponse<Post> = await apiClient.get('/api/moments/posts/', {
+        params: { cursor, page_size: pageSize },
+      });
+      const results = Array.isArray(response?.results) ? response.results : [];
+      setPosts(prev => (isFirstPage ? results : [...prev, ...results]));
+      setNextCursor(parseCursor(response?.next ?? null));
     } catch (error) {
       console.error('获取朋友圈数据失败:', error);
-      setPosts([]);
-      setTotalCount(0);
+      if (isFirstPage) {
+        setPosts([]);
+      }
+      setNextCursor(null);
     } finally {
-      setLoading(false);
+      if (isFirstPage) {
+        setLoading(false);
+      } else {
+        loadingMoreRef.current = false;
+        setLoadingMore(false);
+      }
     }
-  };
+  }, [pageSize]);
+
+  useEffect(() => {
+    fetchPosts('');
+  }, [fetchPosts]);
+
+  // 无限滚动：底部占位元素进入视口时加载下一页
+  useEffect(() => {
+    const sentinel = sentinelRef.current;
+    if (!sentinel || !nextCursor) return;
+    const observer = new IntersectionObserver(entries => {
+      if (entries[0].isIntersecting) {
+        fetchPosts(nextCursor);
+      }
+    }, { rootMargin: '200px' });
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [nextCursor, fetchPosts, loading]);
 
   const renderMedia = (media: any[], isTimeline: boolean = false) => {
     if (!media || !Array.isArray(media) || media.length === 0) return null;
@@ -339,18 +364,15 @@ const Moments: React.FC = () => {
               renderTimelineView()
             )}
 
-            {totalCount > 0 && (
-              <div className="moments-pagination">
-                <Pagination
-                  current={currentPage}
-                  pageSize={pageSize}
-                  total={totalCount}
-                  onChange={(page) => setCurrentPage(page)}
-                  showSizeChanger={false}
-                  showQuickJumper
-                />
-              </div>
-            )}
+            <div ref={sentinelRef} className="moments-pagination">
+              {loadingMore ? (
+                <Spin />
+              ) : nextCursor ? (
+                <Button onClick={() => fetchPosts(nextCursor)}>加载更多</Button>
+              ) : (
+                <span style={{ color: '#999' }}>没有更多了</span>
+              )}
+            </div>
           </>
         )}
       </div>
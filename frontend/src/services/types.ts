@@ -61,6 +61,13 @@ export interface PaginatedResponse<T> {
   results: T[];
 }
 
+// 游标分页的响应（不统计总数）
+export interface CursorPaginatedResponse<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
 // 朋友圈媒体文件类型定义
 export interface PostMedia {
   id: number;